@@ -0,0 +1,84 @@
+"""Auto-alpha background removal: pixel-by-pixel fill vs NumPy, same output.
+
+Synthetic renders (noisy near-uniform background, subjects with enclosed
+background-coloured holes that must stay opaque, a few specks touching the
+border) at each size go through both implementations from
+scripts/comfyui/generate-assets.py; the alpha channels must match exactly.
+--gradient shades the background from white to grey, as some checkpoints
+render "white background".
+Usage: python scripts/benchmarks/bench_auto_alpha.py [--sizes 512,1024,2048] [--gradient]
+"""
+import argparse
+import importlib.util
+import os
+import random
+import sys
+import time
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+CLI_PATH = os.path.join(REPO_ROOT, "scripts", "comfyui", "generate-assets.py")
+
+
+def load_cli():
+    spec = importlib.util.spec_from_file_location("generate_assets", CLI_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_render(size, seed, gradient=False):
+    rng = random.Random(seed)
+    noise = np.random.default_rng(seed).integers(-6, 7, size=(size, size, 3))
+    base = np.array([236, 238, 242])
+    if gradient:
+        base = base + np.linspace(18, -50, size)[:, None, None]
+    background = np.clip(base + noise, 0, 255).astype(np.uint8)
+    image = Image.fromarray(background).convert("RGBA")
+    draw = ImageDraw.Draw(image)
+    for _ in range(6):
+        x, y = rng.randrange(size // 8, size * 5 // 8), rng.randrange(size // 8, size * 5 // 8)
+        r = rng.randrange(size // 16, size // 5)
+        draw.ellipse((x, y, x + 2 * r, y + 2 * r), fill=(rng.randrange(40, 200), 60, 120, 255))
+        # Background-coloured hole inside the subject: not reachable from the edge.
+        draw.ellipse((x + r - r // 3, y + r - r // 3, x + r + r // 3, y + r + r // 3), fill=(236, 238, 242, 255))
+    for _ in range(20):
+        x = rng.randrange(size)
+        draw.rectangle((x, 0, x + 3, rng.randrange(2, 12)), fill=(20, 20, 20, 255))
+    return image
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="512,1024,2048")
+    parser.add_argument("--tolerance", type=int, default=24)
+    parser.add_argument("--samples", type=int, default=12)
+    parser.add_argument("--gradient", action="store_true", help="Vertical white-to-grey background")
+    args = parser.parse_args()
+
+    cli = load_cli()
+    failed = False
+    for size in (int(s) for s in args.sizes.split(",")):
+        source = synthetic_render(size, seed=size, gradient=args.gradient)
+        results = {}
+        for label, run in (
+            ("bfs", lambda im: cli._apply_auto_alpha_bfs(im, args.tolerance, args.samples)),
+            ("numpy", lambda im: cli._apply_auto_alpha_numpy(np, im, args.tolerance, args.samples)),
+        ):
+            image = source.copy()
+            start = time.perf_counter()
+            changed = run(image)
+            results[label] = (time.perf_counter() - start, changed, image.getchannel("A").tobytes())
+        (bfs_s, bfs_changed, bfs_alpha), (np_s, np_changed, np_alpha) = results["bfs"], results["numpy"]
+        same = bfs_alpha == np_alpha and bfs_changed == np_changed
+        failed |= not same
+        cleared = bfs_alpha.count(0) / (size * size)
+        print(f"{size:5d}px  bfs {bfs_s * 1000:9.1f} ms  numpy {np_s * 1000:7.1f} ms  "
+              f"({bfs_s / np_s:5.1f}x)  cleared {cleared:.0%}  identical: {'yes' if same else 'NO'}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""Memory benchmark: dict-per-item expansion vs compact ExpandedEntry items.
+
+Each variant runs in a fresh interpreter so peak RSS is comparable.
+Usage: python scripts/benchmarks/bench_entries.py [--combos 200000]
+"""
+import argparse
+import itertools
+import os
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from studio.backend.specs import SpecManager
+
+
+def synthetic_index(combos):
+    side = max(2, round(combos ** (1 / 3)))
+    lists = {f"l{i}": [f"v{i}_{j:03d}" for j in range(side)] for i in range(3)}
+    entry = {
+        "id": "bench-sheet",
+        "type": "pattern",
+        "pattern": "sprites/{outfit}/{anim}/{outfit}-{anim}-{frame}.png",
+        "vars": {"outfit": "l0", "anim": "l1", "frame": "l2"},
+        "size": "256x256",
+        "status": "planned",
+        "animation": {"type": "walk", "frames": 8, "fps": 12, "loop": True},
+        "compositeType": "overlay",
+        "compositeGroup": "body",
+        "compositeOver": ["base"],
+    }
+    return {
+        "root": "assets/bench",
+        "lists": lists,
+        "entries": [entry],
+        "animationTypes": {"walk": {"promptHints": ["walking pose", "side view"]}},
+        "compositeTypes": {"overlay": {"layerOrder": 2, "description": "Overlay layer"}},
+    }
+
+
+def legacy_expand(entry, lists, root, animation_types, composite_types):
+    """The pre-compact expansion: one dict (and config copies) per item."""
+    anim = dict(entry["animation"])
+    type_def = animation_types.get(anim.get("type"), {})
+    if "promptHints" in type_def:
+        anim["promptHints"] = type_def["promptHints"]
+    comp_def = composite_types[entry["compositeType"]]
+    comp = {
+        "type": entry["compositeType"],
+        "group": entry.get("compositeGroup"),
+        "over": entry.get("compositeOver", []),
+        "layerOrder": comp_def.get("layerOrder", 0),
+        "description": comp_def.get("description"),
+    }
+    var_names = list(entry["vars"])
+    values = [lists[entry["vars"][name]] for name in var_names]
+    items = []
+    for combo in itertools.product(*values):
+        path = entry["pattern"]
+        for name, value in zip(var_names, combo):
+            path = path.replace(f"{{{name}}}", value)
+        path = f"{root}/{path}"
+        items.append({
+            "id": path.replace("/", "-").replace(".", "-"),
+            "name": os.path.basename(path).replace(".png", ""),
+            "path": path,
+            "format": entry.get("format", "png"),
+            "size": entry.get("size"),
+            "status": entry.get("status", "planned"),
+            "source_entry_id": entry.get("id"),
+            "vars": dict(zip(var_names, combo)),
+            "type": "pattern-expanded",
+            "animation": anim.copy(),
+            "composite": comp.copy(),
+            "exists": False,
+        })
+    return items
+
+
+def run_variant(variant, combos):
+    index = synthetic_index(combos)
+    entry = index["entries"][0]
+    args = (entry, index["lists"], index["root"], index["animationTypes"], index["compositeTypes"])
+    manager = SpecManager(REPO_ROOT)
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if variant == "legacy":
+        items = legacy_expand(*args)
+    else:
+        items = manager.expand_index_entry(*args)
+        for item in items:
+            item.exists = False
+    elapsed = time.perf_counter() - start
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{variant} {len(items)} {retained} {rss_kb} {elapsed}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--combos", type=int, default=200000)
+    parser.add_argument("--variant", choices=("legacy", "compact"))
+    args = parser.parse_args()
+
+    if args.variant:
+        run_variant(args.variant, args.combos)
+        return
+
+    results = {}
+    for variant in ("legacy", "compact"):
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--variant", variant, "--combos", str(args.combos)],
+            check=True, capture_output=True, text=True,
+        ).stdout.split()
+        results[variant] = (int(out[1]), int(out[2]), int(out[3]), float(out[4]))
+
+    count = results["legacy"][0]
+    print(f"{count} expanded items")
+    for variant, (_, retained, rss_kb, elapsed) in results.items():
+        print(f"  {variant:<8} retained {retained / 2**20:7.1f} MiB  peak RSS {rss_kb / 1024:7.1f} MiB"
+              f"  {retained / count:6.0f} B/item  {elapsed * 1000:7.1f} ms")
+    legacy, compact = results["legacy"], results["compact"]
+    print(f"  savings  retained {(1 - compact[1] / legacy[1]) * 100:.0f}%"
+          f"  peak RSS {(1 - compact[2] / legacy[2]) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""End-to-end generation throughput against the stand-in ComfyUI server.
+
+Runs ``generator.generate_asset`` (sheets in batch and per-frame mode) and the
+CLI ``scripts/comfyui/generate-assets.py`` against ``mock_comfyui.py`` with a
+fixed per-step render time, so whatever the wall time exceeds the mock's GPU
+time is pipeline overhead. Reports frames/s, client overhead per frame, p50/p95
+latency per asset and the completion-to-download lag per frame. The result
+cache is bypassed. With --max-overhead-ms the exit status is 1 when a scenario
+exceeds that overhead per frame, for use as a regression check.
+Usage: python scripts/benchmarks/bench_generation.py [--sheets 5] [--frames 8] [--step-ms 5]
+"""
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from scripts.benchmarks.mock_comfyui import MockComfyUI
+from studio.backend import generator
+from studio.backend.journal import COMPLETED, SUBMITTED
+
+CLI_PATH = os.path.join(REPO_ROOT, "scripts", "comfyui", "generate-assets.py")
+# Items the CLI has prompt mappings for (one render each).
+CLI_ITEMS = [
+    "backgrounds/constellation-pattern.png",
+    "backgrounds/nebula-overlay.png",
+    "backgrounds/starfield-tile.png",
+    "effects/glow-cyan.png",
+    "effects/portal-energy.png",
+    "effects/stargate-ring.png",
+    "effects/warp-streaks.png",
+    "sprites/astro-duck/base/astro-duck-base-front.png",
+    "sprites/astro-duck/base/astro-duck-base-side.png",
+    "sprites/astro-duck/base/astro-duck-base-three-quarter.png",
+    "ui/button-primary-states.png",
+    "ui/input-states.png",
+    "ui/modal-frame.png",
+    "ui/toast-variants.png",
+]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile (0.0 for no values)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class Measure:
+    """Wall time vs the mock's GPU time over one scenario."""
+
+    def __init__(self, mock):
+        self.mock = mock
+
+    def __enter__(self):
+        self.busy = self.mock.stats()["busy_s"]
+        self.images = self.mock.stats()["images"]
+        self.lags = len(self.mock.fetch_lags)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self.start
+        stats = self.mock.stats()
+        self.gpu = stats["busy_s"] - self.busy
+        self.frames = stats["images"] - self.images
+        self.fetch_lags = self.mock.fetch_lags[self.lags:]
+
+
+def report(label, measure, latencies):
+    frames = max(1, measure.frames)
+    overhead_ms = max(0.0, measure.wall - measure.gpu) / frames * 1000
+    print(
+        f"{label:16s} {measure.frames:4d} frames {measure.wall:7.2f}s  {measure.frames / measure.wall:6.1f} frames/s  "
+        f"overhead {overhead_ms:6.2f} ms/frame  "
+        f"latency p50 {percentile(latencies, 50) * 1000:7.1f} p95 {percentile(latencies, 95) * 1000:7.1f} ms  "
+        f"fetch lag p50 {percentile(measure.fetch_lags, 50) * 1000:5.1f} p95 {percentile(measure.fetch_lags, 95) * 1000:5.1f} ms"
+    )
+    return overhead_ms
+
+
+def bench_generator(mock, out_dir, sheets, frames, frame_mode):
+    config = {
+        "prompt": "benchmark sprite",
+        "output_folder": out_dir,
+        "use_cache": False,
+        "frame_mode": frame_mode,
+        "animation": {"frameCount": frames},
+    }
+    workflow_path = generator.find_workflow_path()
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Warm-up: plan analysis, pool health check, /ws connect.
+        generator.generate_asset("bench/warmup-sheet.png", workflow_path, config=dict(config, seed=1))
+        with Measure(mock) as measure:
+            for i in range(sheets):
+                start = time.perf_counter()
+                result = generator.generate_asset(
+                    f"bench/{frame_mode}-{i}-sheet.png", workflow_path, config=dict(config, seed=1000 * (i + 1))
+                )
+                latencies.append(time.perf_counter() - start)
+                if result.get("status") != "success":
+                    raise RuntimeError(f"generate_asset failed: {result.get('error')}")
+    return measure, latencies
+
+
+def bench_cli(mock, out_dir, rounds, concurrency):
+    spec = importlib.util.spec_from_file_location("generate_assets", CLI_PATH)
+    cli = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(cli)
+
+    report_path = os.path.join(out_dir, "report.json")
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump({"missing": [{"rel_path": p, "expected_size": [256, 256]} for p in CLI_ITEMS]}, f)
+
+    latencies = []
+    saved_argv = sys.argv
+    with Measure(mock) as measure:
+        for r in range(rounds):
+            journal_path = os.path.join(out_dir, f"journal-{r}.jsonl")
+            sys.argv = [
+                CLI_PATH, "--report", report_path, "--comfy", mock.url,
+                "--output-root", os.path.join(out_dir, f"cli-{r}"), "--journal", journal_path,
+                "--concurrency", str(concurrency), "--no-cache", "--seed", str(r + 1),
+            ]
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    status = cli.main()
+            finally:
+                sys.argv = saved_argv
+            if status:
+                raise RuntimeError(f"generate-assets.py exited with {status}")
+            latencies += _journal_latencies(journal_path)
+    return measure, latencies
+
+
+def _journal_latencies(path):
+    # Submit-to-completed per item, from the events' timestamps.
+    submitted = {}
+    latencies = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            record = json.loads(line)
+            if record["event"] == SUBMITTED:
+                submitted[record["sig"]] = record["t"]
+            elif record["event"] == COMPLETED and record["sig"] in submitted:
+                latencies.append(record["t"] - submitted[record["sig"]])
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sheets", type=int, default=5, help="Sheets per generator scenario")
+    parser.add_argument("--frames", type=int, default=8, help="Frames per sheet")
+    parser.add_argument("--rounds", type=int, default=2, help=f"CLI runs over its {len(CLI_ITEMS)} items")
+    parser.add_argument("--concurrency", type=int, default=2, help="CLI --concurrency")
+    parser.add_argument("--step-ms", type=float, default=5.0, help="Mock render time per sampler step")
+    parser.add_argument("--no-ws", action="store_true", help="Mock without /ws (clients poll /history)")
+    parser.add_argument("--max-overhead-ms", type=float, default=None,
+                        help="Exit with status 1 when any scenario's overhead per frame exceeds this")
+    args = parser.parse_args()
+
+    mock = MockComfyUI(step_ms=args.step_ms, ws=not args.no_ws).start()
+    generator.COMFY_URLS = [mock.url]
+    print(f"Mock ComfyUI at {mock.url}: {args.step_ms} ms/step, /ws {'off' if args.no_ws else 'on'}")
+
+    overheads = {}
+    try:
+        with tempfile.TemporaryDirectory(prefix="bench-generation-") as out_dir:
+            for mode in ("batch", "frames"):
+                measure, latencies = bench_generator(mock, out_dir, args.sheets, args.frames, mode)
+                overheads[f"generator/{mode}"] = report(f"generator/{mode}", measure, latencies)
+            measure, latencies = bench_cli(mock, out_dir, args.rounds, args.concurrency)
+            overheads["cli"] = report("cli", measure, latencies)
+    finally:
+        mock.stop()
+
+    if args.max_overhead_ms is not None:
+        over = {k: v for k, v in overheads.items() if v > args.max_overhead_ms}
+        for label, value in over.items():
+            print(f"REGRESSION: {label} overhead {value:.2f} ms/frame > {args.max_overhead_ms} ms")
+        return 1 if over else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
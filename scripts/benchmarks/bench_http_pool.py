@@ -0,0 +1,110 @@
+"""Per-frame HTTP overhead: urllib (new connection per call) vs ConnectionPool.
+
+A "frame" is what the generator does per image against ComfyUI: POST
+/prompt, GET /history/<id>, GET /view. Both clients talk to an in-process
+keep-alive stand-in server, so the difference is connection handling only.
+Usage: python scripts/benchmarks/bench_http_pool.py [--frames 500]
+"""
+import argparse
+import http.server
+import json
+import os
+import socketserver
+import sys
+import threading
+import time
+import urllib.request
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from studio.backend.http_pool import ConnectionPool
+
+IMAGE = os.urandom(64 * 1024)
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, content_type="application/json"):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(b'{"prompt_id": "p1"}')
+
+    def do_GET(self):
+        if self.path.startswith("/view"):
+            self._reply(IMAGE, "image/png")
+        else:
+            self._reply(b'{"p1": {"outputs": {"9": {"images": [{"filename": "f.png"}]}}}}')
+
+
+class StandInServer(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+def urllib_frame(base_url, workflow):
+    req = urllib.request.Request(
+        f"{base_url}/prompt",
+        data=json.dumps({"prompt": workflow}).encode("utf-8"),
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=60) as resp:
+        json.loads(resp.read().decode("utf-8"))
+    with urllib.request.urlopen(f"{base_url}/history/p1", timeout=60) as resp:
+        json.loads(resp.read().decode("utf-8"))
+    with urllib.request.urlopen(f"{base_url}/view?filename=f.png", timeout=60) as resp:
+        resp.read()
+
+
+def pooled_frame(pool, base_url, workflow):
+    pool.post_json(f"{base_url}/prompt", {"prompt": workflow})
+    json.loads(pool.get(f"{base_url}/history/p1").decode("utf-8"))
+    pool.get(f"{base_url}/view?filename=f.png")
+
+
+def run(label, frame, frames):
+    frame()  # warm-up
+    start = time.perf_counter()
+    for _ in range(frames):
+        frame()
+    elapsed = time.perf_counter() - start
+    per_frame_ms = elapsed / frames * 1000
+    print(f"{label:8s} {frames} frames in {elapsed:.3f}s  ({per_frame_ms:.3f} ms/frame)")
+    return per_frame_ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--frames", type=int, default=500)
+    args = parser.parse_args()
+
+    server = StandInServer(("127.0.0.1", 0), StandInHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    workflow = {str(i): {"class_type": "Node", "inputs": {"text": "x" * 64}} for i in range(40)}
+
+    pool = ConnectionPool()
+    try:
+        legacy = run("urllib", lambda: urllib_frame(base_url, workflow), args.frames)
+        pooled = run("pooled", lambda: pooled_frame(pool, base_url, workflow), args.frames)
+    finally:
+        pool.close()
+        server.shutdown()
+    print(f"per-frame overhead: {legacy:.3f} ms -> {pooled:.3f} ms ({legacy / pooled:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
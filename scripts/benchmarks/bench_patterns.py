@@ -0,0 +1,79 @@
+"""Micro-benchmark: legacy str.replace expansion vs the compiled pattern engine.
+
+Usage: python scripts/benchmarks/bench_patterns.py [--combos 100000] [--repeat 5]
+"""
+import argparse
+import itertools
+import os
+import sys
+import time
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from studio.backend.patterns import ExpansionPlan, plan_cache
+
+
+def legacy_expand(pattern, vars_def, lists):
+    var_names = list(vars_def.keys())
+    var_values = [lists.get(vars_def[name], []) for name in var_names]
+    out = []
+    for combo in itertools.product(*var_values):
+        path = pattern
+        for i, var_name in enumerate(var_names):
+            path = path.replace(f"{{{var_name}}}", combo[i])
+        out.append(path)
+    return out
+
+
+def compiled_expand(pattern, vars_def, lists, cache_key=None):
+    def build():
+        return ExpansionPlan.from_entry(pattern, vars_def, lists)
+
+    plan = plan_cache.get(cache_key, build) if cache_key else build()
+    return list(plan.paths())
+
+
+def synthetic(combos):
+    # Four vars; sizes chosen so the product is close to ``combos``.
+    side = max(2, round(combos ** 0.25))
+    lists = {f"l{i}": [f"v{i}_{j:03d}" for j in range(side)] for i in range(4)}
+    vars_def = {"outfit": "l0", "view": "l1", "anim": "l2", "frame": "l3"}
+    pattern = "sprites/{outfit}/{view}/{anim}/{outfit}-{view}-{anim}-{frame}.png"
+    return pattern, vars_def, lists, side ** 4
+
+
+def best_of(fn, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--combos", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    pattern, vars_def, lists, total = synthetic(args.combos)
+    assert legacy_expand(pattern, vars_def, lists) == compiled_expand(pattern, vars_def, lists)
+
+    key = ("bench", "entry")
+    rows = [
+        ("legacy replace", lambda: legacy_expand(pattern, vars_def, lists)),
+        ("compiled", lambda: compiled_expand(pattern, vars_def, lists)),
+        ("compiled+cached", lambda: compiled_expand(pattern, vars_def, lists, key)),
+    ]
+    print(f"{total} combinations, best of {args.repeat}")
+    for label, fn in rows:
+        elapsed = best_of(fn, args.repeat)
+        print(f"  {label:<16} {elapsed * 1000:8.1f} ms  {elapsed / total * 1e9:7.0f} ns/path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,363 @@
+"""Stand-in ComfyUI server for benchmarks and local testing (stdlib only).
+
+Implements the parts of the ComfyUI API the studio and the CLI use:
+``POST /prompt``, ``GET /history[/<id>]``, ``GET /view``, ``GET/POST /queue``,
+``POST /interrupt``, ``GET /system_stats`` and (optionally) the ``/ws`` event
+stream. Prompts run one at a time like on a real GPU. A prompt takes
+``steps * step_ms`` (its sampler's ``steps``; latent batches cost
+``batch_cost`` extra per additional image) plus ``load_ms`` whenever the
+checkpoint differs from the previous prompt's. Output images are solid-colour
+PNGs of the workflow's latent size, coloured by seed. ``fetch_lags`` records,
+per image, the seconds from its prompt finishing to the client's first
+``/view`` of it (completion notice + history lookup on the client side).
+
+Usage: python scripts/benchmarks/mock_comfyui.py [--port 8188] [--step-ms 10]
+"""
+import argparse
+import base64
+import hashlib
+import http.server
+import json
+import queue
+import socketserver
+import struct
+import threading
+import time
+import urllib.parse
+import uuid
+import zlib
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+def png_bytes(width, height, rgba):
+    """Solid-colour RGBA PNG."""
+    def chunk(kind, data):
+        body = kind + data
+        return struct.pack(">I", len(data)) + body + struct.pack(">I", zlib.crc32(body) & 0xFFFFFFFF)
+
+    row = b"\x00" + bytes(rgba) * width
+    raw = zlib.compress(row * height, 6)
+    header = struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", raw) + chunk(b"IEND", b"")
+
+
+def _inputs(workflow):
+    for node in workflow.values():
+        if isinstance(node, dict) and isinstance(node.get("inputs"), dict):
+            yield node.get("class_type", ""), node["inputs"]
+
+
+class MockComfyUI:
+    def __init__(self, host="127.0.0.1", port=0, step_ms=10.0, load_ms=0.0, batch_cost=0.35,
+                 default_steps=20, ws=True):
+        self.step_ms = step_ms
+        self.load_ms = load_ms
+        self.batch_cost = batch_cost
+        self.default_steps = default_steps
+        self.ws_enabled = ws
+        self.history = {}
+        self.pending = []          # [(number, prompt_id, workflow, client_id)]
+        self.running = None
+        self.busy_s = 0.0          # simulated GPU time spent so far
+        self.prompts_done = 0
+        self.images_done = 0
+        self.model_loads = 0
+        self.fetch_lags = []
+        self._loaded = None
+        self._number = 0
+        self._deleted = set()
+        self._interrupt = threading.Event()
+        self._lock = threading.Lock()
+        self._work = queue.Queue()
+        self._sockets = {}         # client_id -> socket
+        self._images = {}          # filename -> (width, height, rgba)
+        self._done_at = {}         # filename -> time its prompt finished (until first /view)
+        self._png_cache = {}
+
+        mock = self
+
+        class Handler(_Handler):
+            server_state = mock
+
+        self.httpd = _Server((host, port), Handler)
+        self.url = f"http://{host}:{self.httpd.server_address[1]}"
+        self._threads = []
+
+    # ── Lifecycle ────────────────────────────────────────────────────────
+
+    def start(self):
+        for target in (self.httpd.serve_forever, self._worker):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._work.put(None)
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "prompts": self.prompts_done,
+                "images": self.images_done,
+                "busy_s": round(self.busy_s, 4),
+                "model_loads": self.model_loads,
+            }
+
+    # ── Queue ────────────────────────────────────────────────────────────
+
+    def queue_prompt(self, workflow, client_id=None):
+        prompt_id = uuid.uuid4().hex
+        with self._lock:
+            self._number += 1
+            self.pending.append((self._number, prompt_id, workflow, client_id))
+        self._work.put(prompt_id)
+        return prompt_id
+
+    def queue_state(self):
+        with self._lock:
+            running = [[self.running[0], self.running[1], {}, {}, []]] if self.running else []
+            pending = [[n, pid, {}, {}, []] for n, pid, _, _ in self.pending]
+        return {"queue_running": running, "queue_pending": pending}
+
+    def delete(self, prompt_ids):
+        with self._lock:
+            self._deleted.update(prompt_ids)
+            self.pending = [p for p in self.pending if p[1] not in self._deleted]
+
+    def interrupt(self):
+        self._interrupt.set()
+
+    def _worker(self):
+        while True:
+            prompt_id = self._work.get()
+            if prompt_id is None:
+                return
+            with self._lock:
+                item = next((p for p in self.pending if p[1] == prompt_id), None)
+                if item is None:
+                    continue  # deleted while pending
+                self.pending.remove(item)
+                self.running = item
+            self._execute(*item)
+            with self._lock:
+                self.running = None
+
+    def _execute(self, number, prompt_id, workflow, client_id):
+        steps, width, height, batch, seed, ckpt = self.default_steps, 512, 512, 1, 0, None
+        for class_type, inputs in _inputs(workflow):
+            if "sampler" in class_type.lower() and isinstance(inputs.get("steps"), int):
+                steps = inputs["steps"]
+            if isinstance(inputs.get("width"), int) and isinstance(inputs.get("height"), int) \
+                    and "latent" in class_type.lower():
+                width, height = inputs["width"], inputs["height"]
+                batch = inputs.get("batch_size", 1) or 1
+            if isinstance(inputs.get("seed"), int):
+                seed = inputs["seed"]
+            if isinstance(inputs.get("ckpt_name"), str):
+                ckpt = inputs["ckpt_name"]
+
+        self._interrupt.clear()
+        self._send(client_id, "execution_start", {"prompt_id": prompt_id})
+        start = time.perf_counter()
+        if ckpt != self._loaded and self.load_ms:
+            time.sleep(self.load_ms / 1000)
+            with self._lock:
+                self.model_loads += 1
+        self._loaded = ckpt
+        step_s = self.step_ms / 1000 * (1 + self.batch_cost * (batch - 1))
+        interrupted = False
+        for step in range(steps):
+            if self._interrupt.is_set():
+                interrupted = True
+                break
+            time.sleep(step_s)
+            self._send(client_id, "progress", {"value": step + 1, "max": steps, "prompt_id": prompt_id})
+        elapsed = time.perf_counter() - start
+
+        images = []
+        if not interrupted:
+            for i in range(batch):
+                filename = f"mock_{prompt_id}_{i:05d}_.png"
+                rgba = ((seed + i) % 256, (seed // 256) % 256, 160, 255)
+                images.append({"filename": filename, "subfolder": "", "type": "output"})
+                with self._lock:
+                    self._images[filename] = (width, height, rgba)
+        now = time.perf_counter()
+        with self._lock:
+            for img in images:
+                self._done_at[img["filename"]] = now
+            self.busy_s += elapsed
+            if not interrupted:
+                self.prompts_done += 1
+                self.images_done += len(images)
+            self.history[prompt_id] = {
+                "prompt": [number, prompt_id, workflow, {}, []],
+                "outputs": {"9": {"images": images}} if images else {},
+                "status": {"status_str": "error" if interrupted else "success", "completed": not interrupted},
+            }
+        if interrupted:
+            self._send(client_id, "execution_interrupted", {"prompt_id": prompt_id})
+        else:
+            self._send(client_id, "executing", {"node": None, "prompt_id": prompt_id})
+
+    def image(self, filename):
+        with self._lock:
+            spec = self._images.get(filename)
+            if spec is None:
+                return None
+            done_at = self._done_at.pop(filename, None)
+            if done_at is not None:
+                self.fetch_lags.append(time.perf_counter() - done_at)
+            data = self._png_cache.get(spec)
+        if data is None:
+            data = png_bytes(*spec)
+            with self._lock:
+                self._png_cache[spec] = data
+        return data
+
+    # ── WebSocket ────────────────────────────────────────────────────────
+
+    def _send(self, client_id, msg_type, data):
+        sock = self._sockets.get(client_id) if client_id else None
+        if sock is None:
+            return
+        payload = json.dumps({"type": msg_type, "data": data}).encode("utf-8")
+        if len(payload) < 126:
+            header = struct.pack(">BB", 0x81, len(payload))
+        elif len(payload) < 1 << 16:
+            header = struct.pack(">BBH", 0x81, 126, len(payload))
+        else:
+            header = struct.pack(">BBQ", 0x81, 127, len(payload))
+        try:
+            sock.sendall(header + payload)
+        except OSError:
+            self._sockets.pop(client_id, None)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class _Handler(http.server.BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server_state = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, body, content_type="application/json", status=200):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _body(self):
+        raw = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        return json.loads(raw or b"{}")
+
+    def do_POST(self):
+        mock = self.server_state
+        path = self.path.split("?", 1)[0]
+        if path == "/prompt":
+            data = self._body()
+            prompt_id = mock.queue_prompt(data.get("prompt") or {}, data.get("client_id"))
+            self._reply({"prompt_id": prompt_id, "number": mock._number, "node_errors": {}})
+        elif path == "/queue":
+            mock.delete(self._body().get("delete") or [])
+            self._reply(b"", "text/plain")
+        elif path == "/interrupt":
+            self._body()
+            mock.interrupt()
+            self._reply(b"", "text/plain")
+        else:
+            self._reply({"error": "not found"}, status=404)
+
+    def do_GET(self):
+        mock = self.server_state
+        parsed = urllib.parse.urlsplit(self.path)
+        path = parsed.path
+        if path.startswith("/history/"):
+            prompt_id = urllib.parse.unquote(path[len("/history/"):])
+            with mock._lock:
+                entry = mock.history.get(prompt_id)
+            self._reply({prompt_id: entry} if entry else {})
+        elif path == "/history":
+            with mock._lock:
+                self._reply(dict(mock.history))
+        elif path == "/view":
+            filename = urllib.parse.parse_qs(parsed.query).get("filename", [""])[0]
+            data = mock.image(filename)
+            if data is None:
+                self._reply({"error": "not found"}, status=404)
+            else:
+                self._reply(data, "image/png")
+        elif path == "/queue":
+            self._reply(mock.queue_state())
+        elif path == "/system_stats":
+            self._reply({"system": {"os": "mock"}, "devices": [{"name": "mock-gpu", "type": "cpu"}]})
+        elif path == "/ws" and mock.ws_enabled:
+            self._websocket(urllib.parse.parse_qs(parsed.query).get("clientId", [""])[0])
+        else:
+            self._reply({"error": "not found"}, status=404)
+
+    def _websocket(self, client_id):
+        mock = self.server_state
+        key = self.headers.get("Sec-WebSocket-Key", "")
+        accept = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+        self.send_response(101)
+        self.send_header("Upgrade", "websocket")
+        self.send_header("Connection", "Upgrade")
+        self.send_header("Sec-WebSocket-Accept", accept)
+        self.end_headers()
+        self.wfile.flush()
+        client_id = client_id or uuid.uuid4().hex
+        mock._sockets[client_id] = self.connection
+        mock._send(client_id, "status", {"sid": client_id})
+        try:
+            # Client frames (pongs, close) are not interpreted; EOF ends it.
+            while self.connection.recv(4096):
+                pass
+        except OSError:
+            pass
+        mock._sockets.pop(client_id, None)
+        self.close_connection = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8188)
+    parser.add_argument("--step-ms", type=float, default=10.0, help="Simulated time per sampler step")
+    parser.add_argument("--load-ms", type=float, default=0.0, help="Simulated checkpoint load time")
+    parser.add_argument("--no-ws", action="store_true", help="Do not serve the /ws event stream")
+    args = parser.parse_args()
+
+    mock = MockComfyUI(args.host, args.port, step_ms=args.step_ms, load_ms=args.load_ms, ws=not args.no_ws)
+    print(f"Mock ComfyUI at {mock.url} (step {args.step_ms} ms, /ws {'off' if args.no_ws else 'on'})")
+    mock.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        mock.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,20 @@ import os
 import re
 import time
 import urllib.parse
-import urllib.error
-import urllib.request
 import uuid
+import sys
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+REPO_ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from studio.backend.comfy_pool import ComfyPool
+from studio.backend.http_pool import HTTPError, default_pool
+from studio.backend.journal import COMPLETED, FAILED, PLANNED, SUBMITTED, RunJournal
+from studio.backend.result_cache import ResultCache, result_key
+from studio.backend.workflow_plan import load_plan
 
 
 def _maybe_import_pil_image():
@@ -19,6 +29,15 @@ def _maybe_import_pil_image():
         return None
 
 
+def _maybe_import_numpy():
+    try:
+        import numpy  # type: ignore
+
+        return numpy
+    except Exception:  # noqa: BLE001
+        return None
+
+
 def _fit_size(width: int, height: int, max_dim: int) -> tuple[int, int]:
     if max_dim <= 0:
         return width, height
@@ -45,6 +64,15 @@ def _collect_edge_colors(image, samples_per_edge: int) -> list[tuple[int, int, i
     if width <= 1 or height <= 1:
         return []
 
+    np = _maybe_import_numpy()
+    if np is not None:
+        # Only the border is read: two rows and two columns.
+        strips = [image.crop(box).convert("RGB") for box in (
+            (0, 0, width, 1), (0, height - 1, width, height), (0, 1, 1, height - 1), (width - 1, 1, width, height - 1)
+        )]
+        border = np.concatenate([np.asarray(strip).reshape(-1, 3) for strip in strips])
+        return _edge_colors_histogram(np, border, samples_per_edge)
+
     def _rgb_at(x: int, y: int) -> tuple[int, int, int]:
         r, g, b, _a = image.getpixel((x, y))
         return int(r), int(g), int(b)
@@ -78,12 +106,48 @@ def _collect_edge_colors(image, samples_per_edge: int) -> list[tuple[int, int, i
     return merged
 
 
-def _apply_auto_alpha(image, tolerance: int, samples_per_edge: int) -> bool:
+def _edge_colors_histogram(np, border, samples_per_edge: int) -> list[tuple[int, int, int]]:
+    """Dominant colors of the whole image border, most common first.
+
+    Border pixels are binned at 16 levels per channel; every bin holding at
+    least the share one sample point had (1 / (4 * samples_per_edge)) yields
+    its mean color. Gradients become several candidates, thin details that
+    touch the edge none. ``border`` is an (n, 3) array of the border pixels.
+    """
+    border = border.astype(np.int32)
+    quantized = border >> 4
+    bins = (quantized[:, 0] << 8) | (quantized[:, 1] << 4) | quantized[:, 2]
+    counts = np.bincount(bins, minlength=4096)
+    min_count = max(1, int(np.ceil(len(border) / (4.0 * max(2, samples_per_edge)))))
+    dominant = np.flatnonzero(counts >= min_count)
+    dominant = dominant[np.argsort(-counts[dominant], kind="stable")]
+
+    sums = np.stack([np.bincount(bins, weights=border[:, c], minlength=4096)[dominant] for c in range(3)], axis=1)
+    means = np.rint(sums / counts[dominant, None]).astype(int)
+
+    merged: list[tuple[int, int, int]] = []
+    merge_tol = 12
+    for color in (tuple(int(c) for c in mean) for mean in means):
+        if not any(_rgb_close(color, existing, merge_tol) for existing in merged):
+            merged.append(color)
+    return merged
+
+
+def _apply_auto_alpha(image, tolerance: int, samples_per_edge: int, soft_edge: int = 0) -> bool:
     """Make background transparent by flood-filling from the edges.
 
+    Uses the NumPy implementation when NumPy is installed (same result as the
+    pixel-by-pixel fill); ``soft_edge`` needs NumPy and is ignored without it.
     Returns True if any pixels were made transparent.
     """
+    np = _maybe_import_numpy()
+    if np is not None:
+        return _apply_auto_alpha_numpy(np, image, tolerance, samples_per_edge, soft_edge)
+    return _apply_auto_alpha_bfs(image, tolerance, samples_per_edge)
 
+
+def _apply_auto_alpha_bfs(image, tolerance: int, samples_per_edge: int) -> bool:
+    # Reference implementation: breadth-first fill over pixel_access.
     width, height = image.size
     if width <= 2 or height <= 2:
         return False
@@ -142,6 +206,104 @@ def _apply_auto_alpha(image, tolerance: int, samples_per_edge: int) -> bool:
     return made_transparent > 0
 
 
+def _border_components(np, mask):
+    """Pixels of ``mask`` 4-connected to the image border through ``mask``.
+
+    Labels horizontal runs instead of pixels: runs in neighbouring rows that
+    share a column are joined with a vectorized union-find, then every run in
+    a component that touches the border is filled back in.
+    """
+    height, width = mask.shape
+    padded = np.zeros((height, width + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    edges = np.diff(padded, axis=1)
+    run_rows, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)  # same row-major order as the starts
+    count = run_rows.size
+    if count == 0:
+        return np.zeros_like(mask)
+
+    # Overlapping runs of row r (earlier) and r + 1 (later): for each later
+    # run the matching earlier runs are a contiguous slice, found by
+    # searching row-offset keys.
+    stride = width + 1
+    start_keys = run_rows * stride + run_starts
+    end_keys = run_rows * stride + run_ends
+    later = np.flatnonzero(run_rows > 0)
+    base = (run_rows[later] - 1) * stride
+    lo = np.searchsorted(end_keys, base + run_starts[later], side="right")
+    hi = np.searchsorted(start_keys, base + run_ends[later], side="left")
+    span = np.maximum(hi - lo, 0)
+    a = np.repeat(later, span)
+    b = np.repeat(lo, span) + (np.arange(span.sum()) - np.repeat(np.cumsum(span) - span, span))
+
+    # Hook the larger root onto the smaller one, then compress paths, until
+    # both ends of every link share a label.
+    labels = np.arange(count)
+    while a.size:
+        la, lb = labels[a], labels[b]
+        differ = la != lb
+        if not differ.any():
+            break
+        np.minimum.at(labels, np.maximum(la[differ], lb[differ]), np.minimum(la[differ], lb[differ]))
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+
+    on_border = (run_rows == 0) | (run_rows == height - 1) | (run_starts == 0) | (run_ends == width)
+    keep = np.isin(labels, labels[on_border])
+    delta = np.zeros((height, width + 1), dtype=np.int8)
+    delta[run_rows[keep], run_starts[keep]] = 1
+    delta[run_rows[keep], run_ends[keep]] = -1
+    return np.cumsum(delta, axis=1, dtype=np.int8)[:, :width] > 0
+
+
+def _apply_auto_alpha_numpy(np, image, tolerance: int, samples_per_edge: int, soft_edge: int = 0) -> bool:
+    width, height = image.size
+    if width <= 2 or height <= 2:
+        return False
+
+    pixels = np.asarray(image.convert("RGBA"))  # (height, width, 4)
+    rgb = pixels[:, :, :3]
+    border = np.concatenate((rgb[0], rgb[-1], rgb[1:-1, 0], rgb[1:-1, -1]))
+    background_colors = _edge_colors_histogram(np, border, samples_per_edge)
+    if not background_colors:
+        return False
+
+    # Chebyshev distance to the closest background candidate (as _rgb_close),
+    # on contiguous channel planes: a reduction over the last axis is slow.
+    planes = [rgb[:, :, channel].astype(np.int16) for channel in range(3)]
+    distance = None
+    for color in background_colors:
+        d = np.abs(planes[0] - color[0])
+        np.maximum(d, np.abs(planes[1] - color[1]), out=d)
+        np.maximum(d, np.abs(planes[2] - color[2]), out=d)
+        distance = d if distance is None else np.minimum(distance, d, out=distance)
+
+    fill = _border_components(np, distance <= tolerance)
+    alpha = pixels[:, :, 3].copy()
+    made_transparent = int(np.count_nonzero(alpha[fill]))
+    alpha[fill] = 0
+
+    if soft_edge > 0 and fill.any():
+        # Anti-alias the cut: pixels next to the cleared area fade out the
+        # closer their colour is to the background (tolerance..+soft_edge).
+        near = np.zeros_like(fill)
+        near[1:, :] |= fill[:-1, :]
+        near[:-1, :] |= fill[1:, :]
+        near[:, 1:] |= fill[:, :-1]
+        near[:, :-1] |= fill[:, 1:]
+        near &= ~fill
+        ramp = np.clip((distance[near] - tolerance) / float(soft_edge), 0.0, 1.0)
+        alpha[near] = np.round(alpha[near] * ramp).astype(np.uint8)
+
+    if fill.any():
+        image.putalpha(_maybe_import_pil_image().fromarray(alpha))
+    return made_transparent > 0
+
+
 # ---------------------------------------------------------------------------
 # Prompt style presets
 # ---------------------------------------------------------------------------
@@ -323,49 +485,29 @@ def _write_debug_file(repo_root: str, filename: str, content: str) -> None:
         return
 
 
-def _http_json(url: str, payload: dict, *, debug_tag: str | None = None, repo_root: str | None = None) -> dict:
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    try:
-        with urllib.request.urlopen(req, timeout=60) as resp:
-            return json.loads(resp.read().decode("utf-8"))
-    except urllib.error.HTTPError as e:
-        raw = b""
+def _prompt_error(e: HTTPError, payload: dict, *, debug_tag: str | None = None, repo_root: str | None = None) -> RuntimeError:
+    raw = e.body or b""
+    body_text = raw.decode("utf-8", errors="replace") if raw else ""
+
+    # Persist details for debugging (especially useful for long workflows).
+    if repo_root and debug_tag:
+        ts = time.strftime("%Y%m%d_%H%M%S")
+        _write_debug_file(repo_root, f"comfyui-{debug_tag}-http-error-{ts}.txt", body_text or "(no body)")
         try:
-            raw = e.read() or b""
+            pretty = json.dumps(payload, indent=2, ensure_ascii=False)
         except Exception:  # noqa: BLE001
-            raw = b""
-        body_text = raw.decode("utf-8", errors="replace") if raw else ""
+            pretty = "(failed to serialize payload for debug)"
+        _write_debug_file(repo_root, f"comfyui-{debug_tag}-payload-{ts}.json", pretty)
 
-        # Persist details for debugging (especially useful for long workflows).
-        if repo_root and debug_tag:
-            ts = time.strftime("%Y%m%d_%H%M%S")
-            _write_debug_file(repo_root, f"comfyui-{debug_tag}-http-error-{ts}.txt", body_text or "(no body)")
-            try:
-                pretty = json.dumps(payload, indent=2, ensure_ascii=False)
-            except Exception:  # noqa: BLE001
-                pretty = "(failed to serialize payload for debug)"
-            _write_debug_file(repo_root, f"comfyui-{debug_tag}-payload-{ts}.json", pretty)
-
-        detail = body_text.strip() or "(no response body)"
-        raise RuntimeError(f"ComfyUI request failed: HTTP {e.code} {e.reason} for {url}\n{detail}") from e
+    detail = body_text.strip() or "(no response body)"
+    return RuntimeError(f"ComfyUI request failed: HTTP {e.code} {e.reason} for {e.url}\n{detail}")
 
 
 def _http_get(url: str) -> bytes:
     try:
-        with urllib.request.urlopen(url, timeout=60) as resp:
-            return resp.read()
-    except urllib.error.HTTPError as e:
-        raw = b""
-        try:
-            raw = e.read() or b""
-        except Exception:  # noqa: BLE001
-            raw = b""
+        return default_pool.get(url)
+    except HTTPError as e:
+        raw = e.body or b""
         body_text = raw.decode("utf-8", errors="replace") if raw else ""
         detail = body_text.strip() or "(no response body)"
         raise RuntimeError(f"ComfyUI GET failed: HTTP {e.code} {e.reason} for {url}\n{detail}") from e
@@ -378,214 +520,6 @@ def _normalize_base_url(base_url: str) -> str:
     return base_url
 
 
-def _set_workflow_text_inputs(workflow: dict, positive: str, negative: str) -> None:
-    # Try to locate prompt text nodes. Support both:
-    # - SD1.5/"simple" workflows: inputs.text
-    # - SDXL workflows: inputs.text_g / inputs.text_l (CLIPTextEncodeSDXL)
-    text_nodes = []
-    for node_id, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-        if "text" in inputs and isinstance(inputs.get("text"), str):
-            text_nodes.append((node_id, node, "text"))
-        elif ("text_g" in inputs or "text_l" in inputs) and (
-            isinstance(inputs.get("text_g", ""), str) or isinstance(inputs.get("text_l", ""), str)
-        ):
-            text_nodes.append((node_id, node, "sdxl"))
-
-    if not text_nodes:
-        return
-
-    positives = []
-    negatives = []
-    for node_id, node, kind in text_nodes:
-        meta = node.get("_meta") or {}
-        title = (meta.get("title") or "").lower()
-        if "neg" in title or "negative" in title:
-            negatives.append((node_id, node, kind))
-        else:
-            positives.append((node_id, node, kind))
-
-    def _apply(node: dict, kind: str, value: str) -> None:
-        if kind == "text":
-            node["inputs"]["text"] = value
-        else:
-            # SDXL: set both text_g and text_l to the same string unless you want to
-            # separately control them.
-            if "text_g" in node["inputs"]:
-                node["inputs"]["text_g"] = value
-            if "text_l" in node["inputs"]:
-                node["inputs"]["text_l"] = value
-
-    if positives:
-        for _, node, kind in positives:
-            _apply(node, kind, positive)
-    if negatives:
-        for _, node, kind in negatives:
-            _apply(node, kind, negative)
-
-    if not negatives and len(text_nodes) >= 2:
-        # Assume 2-encoder layout: first positive, second negative.
-        _apply(text_nodes[0][1], text_nodes[0][2], positive)
-        _apply(text_nodes[1][1], text_nodes[1][2], negative)
-
-
-def _set_workflow_size_inputs(workflow: dict, width: int, height: int) -> None:
-    for _, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-        # Common nodes: EmptyLatentImage, etc.
-        if "width" in inputs and "height" in inputs:
-            if isinstance(inputs.get("width"), int) and isinstance(inputs.get("height"), int):
-                inputs["width"] = width
-                inputs["height"] = height
-
-        # SDXL text-encode nodes often carry target dimensions.
-        if "target_width" in inputs and isinstance(inputs.get("target_width"), int):
-            inputs["target_width"] = width
-        if "target_height" in inputs and isinstance(inputs.get("target_height"), int):
-            inputs["target_height"] = height
-        if "crop_w" in inputs and isinstance(inputs.get("crop_w"), int):
-            inputs["crop_w"] = 0
-        if "crop_h" in inputs and isinstance(inputs.get("crop_h"), int):
-            inputs["crop_h"] = 0
-
-
-def _set_workflow_seed_inputs(workflow: dict, seed: int | None) -> None:
-    if seed is None:
-        return
-    for _, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-        if "seed" in inputs and isinstance(inputs.get("seed"), int):
-            inputs["seed"] = seed
-
-
-def _set_workflow_checkpoint_inputs(workflow: dict, ckpt_name: str | None) -> None:
-    """Best-effort checkpoint override.
-
-    Different workflows use different loader nodes/keys; we scan common input keys.
-    """
-
-    if not ckpt_name:
-        return
-
-    keys = ("ckpt_name", "checkpoint", "model_name")
-    for _, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-        for key in keys:
-            if key in inputs and isinstance(inputs.get(key), str):
-                inputs[key] = ckpt_name
-
-
-def _set_workflow_vae_inputs(workflow: dict, vae_name: str | None) -> bool:
-    """Best-effort VAE override.
-
-    If the workflow contains a VAELoader-like node, this will:
-    - set its `vae_name`
-    - rewire VAEDecode nodes to use that VAE
-    """
-
-    if not vae_name:
-        return False
-
-    vae_loader_ids: list[str] = []
-
-    for node_id, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        class_type = node.get("class_type")
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-
-        if class_type in ("VAELoader", "VAELoaderSimple") and "vae_name" in inputs:
-            if isinstance(inputs.get("vae_name"), str):
-                inputs["vae_name"] = vae_name
-                vae_loader_ids.append(str(node_id))
-
-    if not vae_loader_ids:
-        return False
-
-    vae_node_id = vae_loader_ids[0]
-
-    for _node_id, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        if node.get("class_type") != "VAEDecode":
-            continue
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-        if "vae" in inputs and isinstance(inputs.get("vae"), list):
-            inputs["vae"] = [vae_node_id, 0]
-
-    return True
-
-
-def _set_workflow_filename_prefix_inputs(workflow: dict, filename_prefix: str) -> None:
-    # Ensure SaveImage nodes don't get fully cached across runs.
-    # ComfyUI caching can result in an empty "outputs" block in /history for cached executions,
-    # which breaks our ability to fetch an image by filename.
-    for _, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-        if "filename_prefix" in inputs and isinstance(inputs.get("filename_prefix"), str):
-            inputs["filename_prefix"] = filename_prefix
-
-
-def _set_workflow_sampler_inputs(workflow: dict, sampler_name: str = None, scheduler: str = None,
-                                   steps: int = None, cfg: float = None) -> None:
-    """Override sampler settings in the workflow.
-    
-    This finds KSampler nodes and updates their parameters.
-    Common class_types: KSampler, KSamplerAdvanced, SamplerCustom, etc.
-    """
-    for _, node in workflow.items():
-        if not isinstance(node, dict):
-            continue
-        class_type = node.get("class_type", "")
-        # Match common sampler node types
-        if "sampler" not in class_type.lower() and "ksampler" not in class_type.lower():
-            continue
-        inputs = node.get("inputs")
-        if not isinstance(inputs, dict):
-            continue
-        
-        # Update sampler_name if present and value provided
-        if sampler_name and "sampler_name" in inputs and isinstance(inputs.get("sampler_name"), str):
-            inputs["sampler_name"] = sampler_name
-        
-        # Update scheduler if present and value provided
-        if scheduler and "scheduler" in inputs and isinstance(inputs.get("scheduler"), str):
-            inputs["scheduler"] = scheduler
-        
-        # Update steps if present and value provided
-        if steps is not None and "steps" in inputs and isinstance(inputs.get("steps"), int):
-            inputs["steps"] = steps
-        
-        # Update cfg if present and value provided
-        if cfg is not None and "cfg" in inputs:
-            if isinstance(inputs.get("cfg"), (int, float)):
-                inputs["cfg"] = cfg
-
-
 def _first_output_image(history_entry: dict) -> dict | None:
     outputs = history_entry.get("outputs") or {}
     for _, out in outputs.items():
@@ -595,25 +529,6 @@ def _first_output_image(history_entry: dict) -> dict | None:
     return None
 
 
-def _wait_for_history(base_url: str, prompt_id: str, timeout_s: int = 600) -> dict:
-    deadline = time.time() + timeout_s
-    history_url = f"{base_url}/history/{urllib.parse.quote(prompt_id)}"
-    last_err = None
-
-    while time.time() < deadline:
-        try:
-            raw = _http_get(history_url)
-            history = json.loads(raw.decode("utf-8"))
-            # ComfyUI returns {prompt_id: {...}}
-            if prompt_id in history:
-                return history[prompt_id]
-        except Exception as e:  # noqa: BLE001
-            last_err = e
-        time.sleep(0.5)
-
-    raise TimeoutError(f"Timed out waiting for ComfyUI history for prompt_id={prompt_id}. Last error={last_err}")
-
-
 def build_prompts_for_rel_path(rel_path: str) -> tuple[str, str] | None:
     # Returns (positive, negative) or None if unknown.
 
@@ -1246,7 +1161,16 @@ def main() -> int:
     parser.add_argument(
         "--comfy",
         default="http://127.0.0.1:8188",
-        help="Base URL for the running ComfyUI server",
+        help=(
+            "Base URL of the running ComfyUI server. Comma-separate several URLs to spread "
+            "work across instances (least queued first, with failover)."
+        ),
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=0,
+        help="Assets rendered at once (default: one per ComfyUI instance in --comfy)",
     )
 
     parser.add_argument(
@@ -1297,6 +1221,19 @@ def main() -> int:
         action="store_true",
         help="Print what would be generated but do not call ComfyUI",
     )
+    parser.add_argument(
+        "--journal",
+        default=None,
+        help="Run journal (JSONL) of planned/submitted/completed items (default: build/generate-assets-journal.jsonl)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=(
+            "Continue the run recorded in --journal: skip items already written, pick up prompts "
+            "ComfyUI finished or still has queued, and render only the rest"
+        ),
+    )
     parser.add_argument(
         "--seed",
         type=int,
@@ -1337,7 +1274,19 @@ def main() -> int:
         "--alpha-samples",
         type=int,
         default=12,
-        help="Number of samples per edge used to infer background colors for --auto-alpha (default: 12)",
+        help=(
+            "Number of samples per edge used to infer background colors for --auto-alpha (default: 12). "
+            "With NumPy the whole border is read and a color needs at least the share of one sample."
+        ),
+    )
+    parser.add_argument(
+        "--alpha-soft",
+        type=int,
+        default=0,
+        help=(
+            "Anti-alias the --auto-alpha cut: pixels bordering the removed background fade out over this "
+            "many color steps beyond --alpha-tolerance (default: 0 = hard edge). Requires NumPy."
+        ),
     )
     parser.add_argument(
         "--timeout-s",
@@ -1345,6 +1294,39 @@ def main() -> int:
         default=1800,
         help="Max seconds to wait for a ComfyUI prompt to finish (default: 1800)",
     )
+    parser.add_argument(
+        "--http-timeout",
+        type=float,
+        default=60.0,
+        help="Per-request HTTP timeout in seconds for ComfyUI calls (default: 60)",
+    )
+    parser.add_argument(
+        "--http-retries",
+        type=int,
+        default=2,
+        help="Retries with backoff for transient ComfyUI connection errors (default: 2)",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="Directory of the render result cache (default: build/result-cache)",
+    )
+    parser.add_argument(
+        "--cache-max-mb",
+        type=int,
+        default=2048,
+        help="Size cap of the render result cache in MB; least recently used renders are evicted (default: 2048)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always render through ComfyUI instead of reusing cached results for identical inputs",
+    )
+    parser.add_argument(
+        "--no-ws",
+        action="store_true",
+        help="Poll /history for completion instead of listening on ComfyUI's /ws event stream",
+    )
     parser.add_argument(
         "--prompt-style",
         default="juggernaut",
@@ -1392,7 +1374,10 @@ def main() -> int:
             + default_workflow
         )
 
-    base_url = _normalize_base_url(args.comfy)
+    comfy_urls = [_normalize_base_url(u.strip()) for u in args.comfy.split(",") if u.strip()]
+    default_pool.timeout = args.http_timeout
+    default_pool.retries = max(0, args.http_retries)
+    backends = ComfyPool(comfy_urls, use_ws=not args.no_ws)
 
     with open(args.report, "r", encoding="utf-8") as f:
         report = json.load(f)
@@ -1401,13 +1386,12 @@ def main() -> int:
 
     only_re = re.compile(args.only) if args.only else None
 
-    # Some Windows tooling writes UTF-8 with BOM; json.load() will fail unless we use utf-8-sig.
-    with open(workflow_path, "r", encoding="utf-8-sig") as f:
-        workflow_base = json.load(f)
+    # Analyzed once into the exact inputs we patch per asset (see
+    # studio/backend/workflow_plan.py); reads UTF-8 with or without BOM.
+    plan = load_plan(workflow_path)
 
     if args.vae:
-        applied = _set_workflow_vae_inputs(workflow_base, args.vae)
-        if not applied:
+        if not plan.has_vae_loader:
             print(
                 "WARN: --vae was provided but the workflow has no VAELoader node. "
                 "Update your workflow to include a VAELoader node, or omit --vae to use the checkpoint VAE."
@@ -1418,11 +1402,25 @@ def main() -> int:
 
     output_root = args.output_root
 
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(
+            args.cache_dir or os.path.join(repo_root, "build", "result-cache"),
+            max_bytes=args.cache_max_mb * 1024 * 1024,
+        )
+
+    # One checkpoint/VAE per run; lets the pool keep it on the same GPUs.
+    affinity = (args.ckpt or plan.default_checkpoint, args.vae if plan.has_vae_loader and args.vae else plan.default_vae)
+
     # Used to avoid ComfyUI cache hits across repeated runs.
     # This does not affect image content; it only influences output filenames.
     run_nonce = uuid.uuid4().hex[:8]
 
+    # Apply checkpoint-specific sampler settings
+    sampler_settings = get_sampler_settings(PROMPT_STYLE)
+
     count = 0
+    tasks = []
     for item in missing:
         rel_path = item.get("rel_path")
         full_path = item.get("full_path")
@@ -1457,67 +1455,133 @@ def main() -> int:
                 else rel_path
             )
             print(f"WOULD GENERATE: {rel_path} ({width}x{height}) -> {target_path}")
-            count += 1
-            if args.limit and count >= args.limit:
-                break
-            continue
+        else:
+            if output_root:
+                out_path = os.path.normpath(os.path.join(output_root, rel_path))
+            else:
+                out_path = os.path.normpath(full_path) if full_path else None
+            # The filename prefix only names ComfyUI's output file; leave it out of the key.
+            cache_key = result_key(
+                plan.digest,
+                positive=positive,
+                negative=negative,
+                width=render_w,
+                height=render_h,
+                seed=args.seed,
+                ckpt_name=args.ckpt,
+                sampler_name=sampler_settings.get("sampler_name"),
+                scheduler=sampler_settings.get("scheduler"),
+                steps=sampler_settings.get("steps"),
+                cfg=sampler_settings.get("cfg"),
+                vae_name=args.vae,
+            )
+            tasks.append({
+                "rel_path": rel_path,
+                "out_path": out_path,
+                "width": width,
+                "height": height,
+                "render_w": render_w,
+                "render_h": render_h,
+                "positive": positive,
+                "negative": negative,
+                "cache_key": cache_key,
+                # Identifies the item across runs: render inputs, post-processing, destination.
+                "sig": result_key(
+                    cache_key,
+                    out_path=out_path,
+                    size=[width, height],
+                    auto_alpha=(
+                        [args.alpha_tolerance, args.alpha_samples] + ([args.alpha_soft] if args.alpha_soft else [])
+                        if args.auto_alpha
+                        else None
+                    ),
+                ),
+            })
+        count += 1
+        if args.limit and count >= args.limit:
+            break
 
-        workflow = json.loads(json.dumps(workflow_base))  # cheap deep copy
-        _set_workflow_text_inputs(workflow, positive=positive, negative=negative)
-        _set_workflow_size_inputs(workflow, width=render_w, height=render_h)
-        _set_workflow_seed_inputs(workflow, seed=args.seed)
-        _set_workflow_checkpoint_inputs(workflow, ckpt_name=args.ckpt)
+    journal = None
+    if tasks:
+        journal = RunJournal(
+            args.journal or os.path.join(repo_root, "build", "generate-assets-journal.jsonl"),
+            resume=args.resume,
+        )
+        for task in tasks:
+            journal.record(PLANNED, task["sig"], item=task["rel_path"], out=task["out_path"])
+
+    def render(task: dict) -> bool:
+        """Render one item; False when an earlier run already completed it."""
+        rel_path = task["rel_path"]
+        width, height = task["width"], task["height"]
+        render_w, render_h = task["render_w"], task["render_h"]
+        out_path = task["out_path"]
+        if not out_path:
+            raise RuntimeError(
+                f"Report item missing full_path and no --output-root provided for rel_path={rel_path}"
+            )
+
+        previous = journal.state(task["sig"]) or {}
+        if previous.get("event") == COMPLETED and os.path.exists(out_path):
+            print(f"SKIP (completed in an earlier run): {rel_path}")
+            return False
 
-        # Apply checkpoint-specific sampler settings
-        sampler_settings = get_sampler_settings(PROMPT_STYLE)
-        _set_workflow_sampler_inputs(
-            workflow,
+        safe_stem = re.sub(r"[^a-zA-Z0-9_-]+", "_", os.path.splitext(os.path.basename(rel_path))[0])
+        workflow = plan.build(
+            positive=task["positive"],
+            negative=task["negative"],
+            width=render_w,
+            height=render_h,
+            target_size=True,
+            seed=args.seed,
+            ckpt_name=args.ckpt,
             sampler_name=sampler_settings.get("sampler_name"),
             scheduler=sampler_settings.get("scheduler"),
             steps=sampler_settings.get("steps"),
             cfg=sampler_settings.get("cfg"),
+            vae_name=args.vae,
+            filename_prefix=f"assetgen_{run_nonce}_{safe_stem}",
         )
 
-        safe_stem = re.sub(r"[^a-zA-Z0-9_-]+", "_", os.path.splitext(os.path.basename(rel_path))[0])
-        _set_workflow_filename_prefix_inputs(workflow, filename_prefix=f"assetgen_{run_nonce}_{safe_stem}")
-
-        payload = {"prompt": workflow}
-        res = _http_json(
-            f"{base_url}/prompt",
-            payload,
-            debug_tag="prompt",
-            repo_root=repo_root,
-        )
-        prompt_id = res.get("prompt_id")
-        if not prompt_id:
-            raise RuntimeError(f"ComfyUI /prompt did not return prompt_id: {res}")
-
-        hist = _wait_for_history(base_url, prompt_id, timeout_s=int(args.timeout_s))
-        img = _first_output_image(hist)
-        if not img:
-            raise RuntimeError(f"No output image found in history for prompt_id={prompt_id}")
-
-        filename = img.get("filename")
-        subfolder = img.get("subfolder") or ""
-        img_type = img.get("type") or "output"
-
-        if not filename:
-            raise RuntimeError(f"History image missing filename for prompt_id={prompt_id}: {img}")
-
-        view_url = (
-            f"{base_url}/view?filename={urllib.parse.quote(filename)}"
-            f"&subfolder={urllib.parse.quote(subfolder)}&type={urllib.parse.quote(img_type)}"
-        )
-        img_bytes = _http_get(view_url)
+        cache_key = task["cache_key"]
+        img_bytes = cache.get(cache_key) if cache else None
+        from_cache = img_bytes is not None
+        if not from_cache:
+            dispatch = None
+            if previous.get("event") == SUBMITTED:
+                # Finished (or still queued) on ComfyUI since the last run died?
+                dispatch = backends.adopt(workflow, previous.get("backend"), previous.get("prompt_id"),
+                                          affinity=affinity)
+                if dispatch is not None:
+                    print(f"RESUME: {rel_path} (prompt {dispatch.prompt_id} on {dispatch.backend.url})")
+            if dispatch is None:
+                try:
+                    dispatch = backends.submit(workflow, affinity=affinity)
+                except HTTPError as e:
+                    raise _prompt_error(e, {"prompt": workflow}, debug_tag="prompt", repo_root=repo_root) from e
+                journal.record(SUBMITTED, task["sig"], backend=dispatch.backend.url, prompt_id=dispatch.prompt_id)
+            prompt_id = dispatch.prompt_id
+
+            hist = backends.wait(dispatch, timeout_s=int(args.timeout_s))
+            img = _first_output_image(hist)
+            if not img:
+                raise RuntimeError(f"No output image found in history for prompt_id={prompt_id}")
+
+            filename = img.get("filename")
+            subfolder = img.get("subfolder") or ""
+            img_type = img.get("type") or "output"
+
+            if not filename:
+                raise RuntimeError(f"History image missing filename for prompt_id={prompt_id}: {img}")
+
+            view_url = (
+                f"{dispatch.backend.url}/view?filename={urllib.parse.quote(filename)}"
+                f"&subfolder={urllib.parse.quote(subfolder)}&type={urllib.parse.quote(img_type)}"
+            )
+            img_bytes = _http_get(view_url)
+            if cache:
+                cache.put(cache_key, img_bytes)
 
-        if output_root:
-            out_path = os.path.normpath(os.path.join(output_root, rel_path))
-        else:
-            if not full_path:
-                raise RuntimeError(
-                    f"Report item missing full_path and no --output-root provided for rel_path={rel_path}"
-                )
-            out_path = os.path.normpath(full_path)
         os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
 
         needs_pil = args.auto_alpha or (args.fit_vram and (render_w != width or render_h != height))
@@ -1534,7 +1598,10 @@ def main() -> int:
             auto_alpha_applied = False
             if args.auto_alpha:
                 auto_alpha_applied = _apply_auto_alpha(
-                    pil_image, tolerance=args.alpha_tolerance, samples_per_edge=args.alpha_samples
+                    pil_image,
+                    tolerance=args.alpha_tolerance,
+                    samples_per_edge=args.alpha_samples,
+                    soft_edge=args.alpha_soft,
                 )
 
             if args.fit_vram and (render_w != width or render_h != height):
@@ -1547,6 +1614,8 @@ def main() -> int:
                 f.write(img_bytes)
 
         info_bits = []
+        if from_cache:
+            info_bits.append("cached")
         if args.fit_vram and (render_w != width or render_h != height):
             info_bits.append(f"rendered {render_w}x{render_h} -> upscaled {width}x{height}")
         if args.auto_alpha and auto_alpha_applied:
@@ -1555,12 +1624,45 @@ def main() -> int:
             print(f"WROTE: {rel_path} -> {out_path} ({', '.join(info_bits)})")
         else:
             print(f"WROTE: {rel_path} -> {out_path}")
+        journal.record(COMPLETED, task["sig"], item=rel_path, out=out_path)
+        return True
 
-        count += 1
-        if args.limit and count >= args.limit:
-            break
-
-    print(f"Done. Generated: {count}")
+    def run_task(task: dict) -> bool:
+        try:
+            return render(task)
+        except BaseException as e:
+            journal.record(FAILED, task["sig"], item=task["rel_path"], error=str(e) or type(e).__name__)
+            raise
+
+    # Several assets in flight keep every ComfyUI instance busy; the first
+    # failure stops the run like the sequential loop always did.
+    workers = max(1, args.concurrency or len(backends.backends))
+    skipped = 0
+    try:
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                skipped += not run_task(task)
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(run_task, task) for task in tasks]
+                try:
+                    for future in as_completed(futures):
+                        skipped += not future.result()
+                except BaseException:
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    raise
+    finally:
+        if journal is not None:
+            journal.close()
+
+    if tasks and len(backends.backends) > 1:
+        for stats in backends.stats():
+            mean = f"{stats['mean_prompt_s']}s/prompt" if stats["mean_prompt_s"] is not None else "idle"
+            print(f"  {stats['url']}: {stats['completed']} rendered, {stats['failed']} failed, {mean}")
+
+    if skipped:
+        print(f"Skipped {skipped} item(s) completed in an earlier run (--resume)")
+    print(f"Done. Generated: {count - skipped}")
     return 0
 
 
@@ -1,14 +1,16 @@
 import json
 import os
 import sys
-import re
-import itertools
 
 import importlib.util
 
 # Setup path to import generate-assets
 current_dir = os.path.dirname(os.path.abspath(__file__))
 repo_root = os.path.dirname(current_dir)
+if repo_root not in sys.path:
+    sys.path.insert(0, repo_root)
+
+from studio.backend.patterns import PATTERN_VAR_RE, ExpansionPlan
 script_path = os.path.join(repo_root, "scripts", "comfyui", "generate-assets.py")
 
 spec = importlib.util.spec_from_file_location("generate_assets", script_path)
@@ -24,13 +26,13 @@ def expand_pattern(pattern, vars_def, lists_def):
     # Find all {var} in pattern
     # Expand recursively
     
-    # Simple regex to find {name}
-    var_matches = re.findall(r'\{([a-zA-Z0-9_]+)\}', pattern)
+    # Vars in pattern order (each once)
+    var_matches = list(dict.fromkeys(PATTERN_VAR_RE.findall(pattern)))
     if not var_matches:
         return [pattern]
 
-    # Build lists of values for each var
-    var_values = []
+    # Check every var resolves to a non-empty list
+    used_vars = {}
     for var in var_matches:
         list_key = vars_def.get(var)
         if not list_key:
@@ -44,17 +46,10 @@ def expand_pattern(pattern, vars_def, lists_def):
         if not values:
             print(f"Warning: list {list_key} not found in lists definitions")
             return []
-        var_values.append(values)
+        used_vars[var] = list_key
 
-    # Cartesian product
-    expanded_paths = []
-    for combination in itertools.product(*var_values):
-        path = pattern
-        for i, var in enumerate(var_matches):
-            path = path.replace(f'{{{var}}}', combination[i])
-        expanded_paths.append(path)
-    
-    return expanded_paths
+    # Cartesian product via the shared compiled-pattern engine
+    return list(ExpansionPlan.from_entry(pattern, used_vars, lists_def).paths())
 
 def main():
     index_path = os.path.join(repo_root, "database", "specs", "zelos-asset-index.json")
@@ -1,14 +1,19 @@
 import os
+import sys
 import json
 import re
-import glob
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from studio.backend.specs import SpecManager
 
 def generate_kit(root_dir, project_root, output_path):
     """
     Scans the database/specs directory to build the pixi-kit mapping.
     """
     project_name = os.path.basename(project_root.rstrip("/\\"))
-    specs_dir = os.path.join(root_dir, "database", "specs")
     
     # Target structures
     astro_duck_paths = {
@@ -37,13 +42,8 @@ def generate_kit(root_dir, project_root, output_path):
             return p[len(prefix):]
         return p
 
-    # 1. Load all specs
-    specs = []
-    for f in glob.glob(os.path.join(specs_dir, "**", "*.json"), recursive=True):
-        try:
-            with open(f, 'r', encoding='utf-8-sig') as f_in:
-                specs.append(json.load(f_in))
-        except: continue
+    # 1. Load all specs (through the spec catalog: unchanged files are not re-parsed)
+    specs = [s for s in SpecManager(root_dir).iter_spec_documents() if isinstance(s, dict)]
 
     # 2. Process Composite Specs (Mascots etc)
     for s in specs:
@@ -128,9 +128,8 @@ export const zelosPresets = {json.dumps(presets, indent=2)};
     print(f"Generated spec-driven kit at {output_path}")
 
 if __name__ == "__main__":
-    import sys
     # root_dir (repo root), project_assets_dir, output_path
-    repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+    repo_root = REPO_ROOT
     proj_assets = sys.argv[1] if len(sys.argv) > 1 else "assets/zelos"
     out = sys.argv[2] if len(sys.argv) > 2 else "assets/zelos/pixi/zelos-pixi-kit.js"
     generate_kit(repo_root, proj_assets, out)
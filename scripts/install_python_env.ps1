@@ -35,7 +35,7 @@ Write-Host "Installing Pip..."
 & "$destDir\python.exe" "$destDir\get-pip.py" --no-warn-script-location
 
 # Install Dependencies
-Write-Host "Installing Dependencies (Pillow)..."
-& "$destDir\python.exe" -m pip install Pillow --no-warn-script-location
+Write-Host "Installing Dependencies (Pillow, NumPy)..."
+& "$destDir\python.exe" -m pip install Pillow numpy --no-warn-script-location
 
 Write-Host "Local Python Environment Setup Complete."
@@ -25,7 +25,12 @@ async function loadTexture(pixi, path) {
 
 function makeSprite(pixi, texture) {
     const sprite = new pixi.Sprite(texture || pixi.Texture.EMPTY);
-    sprite.anchor.set(0.5, 0.5);
+    // Trimmed atlas/sheet frames carry their pivot (relative to the untrimmed frame) as defaultAnchor.
+    if (texture && texture.trim && texture.defaultAnchor) {
+        sprite.anchor.copyFrom(texture.defaultAnchor);
+    } else {
+        sprite.anchor.set(0.5, 0.5);
+    }
     sprite.visible = Boolean(texture);
     return sprite;
 }
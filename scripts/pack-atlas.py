@@ -0,0 +1,135 @@
+"""Pack the generated images of asset index entries into Pixi texture atlases.
+
+Every existing file of the selected entries becomes one sprite; sprite sheets
+(``*-sheet.png`` or entries with an animation) are cut into their frames and
+also listed under ``animations``. Writes ``<name>.png/.json`` (or
+``<name>-<n>.*`` pages) for ``PIXI.Assets.load("<name>.json")``.
+
+Usage:
+  python scripts/pack-atlas.py --index zelos-minigame-asset-index --entry shooterPlayer --entry shooterEnemies
+"""
+import argparse
+import os
+import re
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from PIL import Image
+
+from studio.backend.specs import SpecManager
+from studio.backend.stitcher import pack_atlas, write_pixi_spritesheet
+
+
+def frame_count(item, image):
+    """Frames in a horizontal sheet: the animation's frameCount, else square frames."""
+    animation = item.animation or {}
+    count = animation.get("frameCount")
+    if isinstance(count, int) and count > 0:
+        return count
+    if item.path.endswith("-sheet.png"):
+        width, height = image.size
+        return max(1, width // max(1, height))
+    return 1
+
+
+def collect_sprites(manager, index_id, entry_ids=None, only=None):
+    """(sprites, animations, files) for the existing images of ``index_id``."""
+    expanded = manager.get_expanded_index(index_id, source_entry_id=entry_ids, include_raw=False)
+    if expanded is None:
+        raise SystemExit(f"Unknown index: {index_id} (have: {', '.join(sorted(manager.load_indexes()))})")
+    root = expanded["root"].rstrip("/") + "/" if expanded["root"] else ""
+    only_re = re.compile(only) if only else None
+
+    sprites = []
+    animations = {}
+    files = 0
+    for item in expanded["entries"]:
+        if not item.exists or (only_re and not only_re.search(item.path)):
+            continue
+        name = item.path[len(root):] if root and item.path.startswith(root) else item.path
+        with Image.open(os.path.join(manager.root_dir, item.path)) as image:
+            image = image.convert("RGBA")
+        files += 1
+        count = frame_count(item, image)
+        if count == 1:
+            sprites.append((name, image))
+            continue
+        stem, ext = os.path.splitext(name)
+        frame_w = image.size[0] // count
+        names = []
+        for i in range(count):
+            frame_name = f"{stem}-{i:02d}{ext}"
+            sprites.append((frame_name, image.crop((i * frame_w, 0, (i + 1) * frame_w, image.size[1]))))
+            names.append(frame_name)
+        animations[stem] = names
+    return sprites, animations, files
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--index", required=True, help="Index id, e.g. zelos-minigame-asset-index")
+    parser.add_argument("--entry", action="append", default=None,
+                        help="Only these index entry ids (repeatable; default: all entries)")
+    parser.add_argument("--only", default=None, help="Optional regex filter on asset paths")
+    parser.add_argument("--name", default=None, help="Atlas file name (default: derived from the index id)")
+    parser.add_argument("--out", default=None, help="Output folder (default: <index root>/atlases)")
+    parser.add_argument("--max-size", type=int, default=2048, help="Max page width/height (default: 2048)")
+    parser.add_argument("--padding", type=int, default=2, help="Transparent pixels between sprites (default: 2)")
+    parser.add_argument("--extrude", type=int, default=1,
+                        help="Edge pixels repeated around each sprite against filtering seams (default: 1)")
+    parser.add_argument("--rotate", action="store_true", help="Allow 90 degree rotation for a tighter fit")
+    parser.add_argument("--no-pot", action="store_true", help="Do not round page sizes up to powers of two")
+    parser.add_argument("--no-trim", action="store_true", help="Keep transparent borders")
+    parser.add_argument("--trim-padding", type=int, default=0,
+                        help="Transparent pixels kept around each trimmed sprite (default: 0)")
+    parser.add_argument("--pivot", default="0.5,0.5",
+                        help="Sprite anchor as x,y fractions of the untrimmed frame (default: 0.5,0.5)")
+    args = parser.parse_args()
+
+    try:
+        pivot = tuple(float(v) for v in args.pivot.split(","))
+    except ValueError:
+        pivot = ()
+    if len(pivot) != 2:
+        parser.error("--pivot expects two numbers, e.g. 0.5,1")
+
+    manager = SpecManager(REPO_ROOT)
+    sprites, animations, files = collect_sprites(manager, args.index, args.entry, args.only)
+    if not sprites:
+        print("No generated images matched; nothing to pack.")
+        return 1
+
+    index_root = manager.load_indexes()[args.index].get("root") or "assets"
+    out_dir = args.out or os.path.join(REPO_ROOT, index_root, "atlases")
+    name = args.name or re.sub(r"-?(asset-)?index$", "", args.index) or "atlas"
+
+    pages = pack_atlas(
+        sprites,
+        animations,
+        max_size=args.max_size,
+        padding=args.padding,
+        extrude=args.extrude,
+        allow_rotation=args.rotate,
+        power_of_two=not args.no_pot,
+        trim=not args.no_trim,
+        trim_padding=args.trim_padding,
+        pivot=pivot,
+    )
+    paths = write_pixi_spritesheet(pages, out_dir, name)
+
+    source_px = sum(image.size[0] * image.size[1] for _, image in sprites)
+    atlas_px = sum(page.size[0] * page.size[1] for page in pages)
+    print(f"Packed {len(sprites)} sprite(s) from {files} file(s) into {len(pages)} page(s): "
+          + ", ".join(f"{w}x{h}" for w, h in (page.size for page in pages)))
+    print(f"Pixels: {source_px} -> {atlas_px} ({atlas_px / source_px:.0%}); "
+          f"textures to load: {files} -> {len(pages)}")
+    for path in paths:
+        print(f"WROTE: {os.path.relpath(path, REPO_ROOT)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
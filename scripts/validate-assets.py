@@ -1,27 +1,21 @@
 import argparse
-import itertools
 import json
 import os
 import re
 import sys
 
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
+
+from studio.backend.patterns import expand_entry_paths
+
 
 PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
 
 
 def expand_pattern(pattern, vars_map, lists):
-    keys = list(vars_map.keys())
-    values = []
-    for key in keys:
-        list_name = vars_map[key]
-        if list_name not in lists:
-            raise KeyError(f"Unknown list '{list_name}' for '{key}'")
-        values.append(lists[list_name])
-    for combo in itertools.product(*values):
-        result = pattern
-        for key, value in zip(keys, combo):
-            result = result.replace("{" + key + "}", value)
-        yield result
+    return expand_entry_paths(pattern, vars_map, lists, strict=True)
 
 
 def parse_size(value):
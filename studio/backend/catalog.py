@@ -0,0 +1,229 @@
+import os
+import threading
+
+from .specs import SpecManager
+from .importer import RequestImporter
+
+
+class SpecCatalog:
+    """Process-wide, thread-safe owner of the spec/index state.
+
+    The studio server keeps one catalog for its whole lifetime, so the parsed
+    specs and expanded indexes survive across HTTP requests. Every write goes
+    through the catalog and invalidates the cached views explicitly; a
+    background watcher does the same when files under ``database/specs`` or
+    ``assets`` change behind our back (CLI runs, git checkouts, editors).
+
+    ``on_change(change)`` is called after every invalidation that changed
+    something, with ``{"specs": bool, "added": [...], "removed": [...]}``;
+    the asset lists hold repo-relative paths created/deleted since the
+    previous notification.
+    """
+
+    # Larger asset deltas are reported as truncated (clients reload instead).
+    MAX_DELTA_PATHS = 500
+
+    def __init__(self, root_dir, poll_interval=2.0, on_change=None):
+        self.root_dir = root_dir
+        self.on_change = on_change
+        self.manager = SpecManager(root_dir)
+        self.importer = RequestImporter(root_dir, spec_manager=self.manager)
+        self.poll_interval = poll_interval
+
+        self._lock = threading.RLock()
+        self._specs = None
+        self._index_summaries = None
+        self._expanded = {}
+        self._manifest = None
+
+        self._known_assets = None
+        self._fingerprint = None
+        self._watcher = None
+        self._stop = threading.Event()
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Invalidation
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def invalidate(self):
+        """Drop every cached view; the next read rebuilds from disk."""
+        with self._lock:
+            self.manager.invalidate()
+            self._specs = None
+            self._index_summaries = None
+            self._expanded = {}
+            self._manifest = None
+        self._notify(specs_changed=True)
+
+    def invalidate_assets(self):
+        """Asset files changed: statuses are stale, parsed specs/indexes are not."""
+        with self._lock:
+            self._specs = None
+            self._index_summaries = None
+            self._expanded = {}
+            self._manifest = None
+        self._notify(specs_changed=False)
+
+    def _asset_delta(self):
+        # The snapshot hands out the same set object until something changes,
+        # so an unchanged tree costs one identity check.
+        files = self.manager.asset_snapshot().files()
+        with self._lock:
+            previous, self._known_assets = self._known_assets, files
+        if previous is None or previous is files:
+            return [], []
+        return sorted(files - previous), sorted(previous - files)
+
+    def _notify(self, specs_changed):
+        if self.on_change is None:
+            return
+        added, removed = self._asset_delta()
+        if not (specs_changed or added or removed):
+            return
+        truncated = len(added) + len(removed) > self.MAX_DELTA_PATHS
+        change = {
+            "specs": specs_changed,
+            "added": [] if truncated else ["assets/" + p for p in added],
+            "removed": [] if truncated else ["assets/" + p for p in removed],
+            "truncated": truncated,
+        }
+        try:
+            self.on_change(change)
+        except Exception as e:
+            print(f"Catalog change hook failed: {e}")
+
+    def _compute_fingerprint(self):
+        # Spec files are tracked individually (edits change their content);
+        # for assets only directory mtimes matter, since a new or deleted file
+        # is what flips a spec between planned and generated.
+        specs = []
+        assets = []
+        self._walk(self.manager.specs_dir, specs, track_files=True)
+        self._walk(self.manager.assets_dir, assets, track_files=False)
+        return hash(tuple(specs)), hash(tuple(assets))
+
+    def _walk(self, directory, out, track_files):
+        try:
+            st = os.stat(directory)
+            out.append((directory, st.st_mtime_ns))
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            return
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    self._walk(entry.path, out, track_files)
+                elif track_files:
+                    st = entry.stat()
+                    out.append((entry.path, st.st_mtime_ns, st.st_size))
+            except OSError:
+                continue
+
+    def check_for_changes(self):
+        """Compare the on-disk fingerprint with the last one; invalidate on change."""
+        fingerprint = self._compute_fingerprint()
+        with self._lock:
+            previous = self._fingerprint
+            self._fingerprint = fingerprint
+        if previous is None:
+            return False
+        specs_changed = fingerprint[0] != previous[0]
+        assets_changed = fingerprint[1] != previous[1]
+        if specs_changed:
+            self.invalidate()
+        elif assets_changed:
+            self.invalidate_assets()
+        return specs_changed or assets_changed
+
+    def start_watcher(self):
+        if self._watcher is not None:
+            return
+        self.check_for_changes()
+        self._asset_delta()
+        self._watcher = threading.Thread(target=self._watch_loop, name="spec-catalog-watcher", daemon=True)
+        self._watcher.start()
+
+    def _watch_loop(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.check_for_changes()
+            except Exception as e:
+                print(f"Spec watcher error: {e}")
+
+    def close(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=self.poll_interval + 1)
+            self._watcher = None
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Reads (cached)
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def list_specs(self):
+        with self._lock:
+            if self._specs is None:
+                self._specs = self.manager.list_specs()
+            return self._specs
+
+    def load_indexes(self):
+        with self._lock:
+            return self.manager.load_indexes()
+
+    def list_all_indexes(self):
+        with self._lock:
+            if self._index_summaries is None:
+                self._index_summaries = self.manager.list_all_indexes()
+            return self._index_summaries
+
+    def get_expanded_index(self, index_id, **query):
+        query = {key: value for key, value in query.items() if value is not None}
+        with self._lock:
+            if query:
+                # Filtered queries are pruned at expansion time; not cached.
+                return self.manager.get_expanded_index(index_id, **query)
+            if index_id not in self._expanded:
+                self._expanded[index_id] = self.manager.get_expanded_index(index_id)
+            return self._expanded[index_id]
+
+    def get_manifest(self):
+        with self._lock:
+            if self._manifest is None:
+                self._manifest = self.manager.get_manifest(
+                    specs=self.list_specs(), indexes=self.list_all_indexes()
+                )
+            return self._manifest
+
+    def get_checkpoints(self):
+        return self.manager.get_checkpoints()
+
+    def list_requests(self):
+        return self.importer.list_requests()
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Writes (invalidate)
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def save_spec(self, data):
+        with self._lock:
+            try:
+                return self.manager.save_spec(data)
+            finally:
+                self.invalidate()
+
+    def parse_and_import(self, filename):
+        with self._lock:
+            try:
+                return self.importer.parse_and_import(filename)
+            finally:
+                self.invalidate()
+
+    def build_kit(self, project_id="zelos"):
+        try:
+            return self.manager.build_kit(project_id)
+        finally:
+            self.invalidate_assets()
+
+    def export_zip(self, project_id="zelos"):
+        return self.manager.export_zip(project_id)
@@ -1,23 +1,17 @@
 import json
-import urllib.request
 import urllib.parse
 import time
 import uuid
+from . import http_pool
 
-def http_json(url: str, payload: dict) -> dict:
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(
-        url,
-        data=data,
-        headers={"Content-Type": "application/json"},
-        method="POST",
-    )
-    with urllib.request.urlopen(req, timeout=60) as resp:
-        return json.loads(resp.read().decode("utf-8"))
-
-def http_get(url: str) -> bytes:
-    with urllib.request.urlopen(url, timeout=60) as resp:
-        return resp.read()
+# With a /ws stream, how often to double-check /history anyway
+WS_RECHECK_S = 5.0
+
+def http_json(url: str, payload: dict, timeout: float = None) -> dict:
+    return http_pool.default_pool.post_json(url, payload, timeout=timeout)
+
+def http_get(url: str, timeout: float = None) -> bytes:
+    return http_pool.default_pool.get(url, timeout=timeout)
 
 def normalize_base_url(base_url: str) -> str:
     base_url = base_url.rstrip("/")
@@ -25,22 +19,81 @@ def normalize_base_url(base_url: str) -> str:
         base_url = "http://" + base_url
     return base_url
 
-def wait_for_history(base_url: str, prompt_id: str, timeout_s: int = 600) -> dict:
+def queue_prompt(base_url: str, workflow: dict, client_id: str = None) -> str:
+    """POST a workflow to /prompt and return its prompt_id.
+
+    ``client_id`` routes the prompt's /ws events to that listener.
+    """
+    payload = {"prompt": workflow}
+    if client_id:
+        payload["client_id"] = client_id
+    return http_json(f"{base_url}/prompt", payload)["prompt_id"]
+
+def wait_for_history(base_url: str, prompt_id: str, timeout_s: int = 600, stop=None,
+                     stream=None) -> dict:
+    """Wait until ComfyUI has a history entry for ``prompt_id``.
+
+    With a connected ``stream`` (comfy_ws.ComfyEventStream the prompt was
+    queued for) this blocks on the pushed completion message and only
+    re-checks history every WS_RECHECK_S in case a message was missed;
+    otherwise it polls every 0.5 s. ``stop`` is an optional
+    threading.Event that aborts the wait early.
+    """
     deadline = time.time() + timeout_s
     history_url = f"{base_url}/history/{urllib.parse.quote(prompt_id)}"
-    
-    while time.time() < deadline:
-        try:
-            raw = http_get(history_url)
-            history = json.loads(raw.decode("utf-8"))
-            if prompt_id in history:
-                return history[prompt_id]
-        except Exception:
-            pass
-        time.sleep(0.5)
-    
+    state = stream.state(prompt_id) if stream is not None else None
+
+    try:
+        while time.time() < deadline:
+            if stop is not None and stop.is_set():
+                raise InterruptedError(f"Stopped waiting for prompt_id={prompt_id}")
+            if state is not None and stream.connected and not state.done.is_set():
+                state.done.wait(min(WS_RECHECK_S, max(0.0, deadline - time.time())))
+            try:
+                raw = http_get(history_url)
+                history = json.loads(raw.decode("utf-8"))
+                if prompt_id in history:
+                    return history[prompt_id]
+            except Exception:
+                pass
+            if state is not None and state.done.is_set():
+                # Finished but history not written yet: retry shortly.
+                time.sleep(0.05)
+            elif state is None or not stream.connected:
+                time.sleep(0.5)
+    finally:
+        if stream is not None:
+            stream.forget(prompt_id)
+
     raise TimeoutError(f"Timed out waiting for ComfyUI history for prompt_id={prompt_id}")
 
+def cancel_prompts(base_url: str, prompt_ids) -> None:
+    """Best-effort removal of our prompts from the ComfyUI queue.
+
+    Pending prompts are deleted; if one of ours is executing right now it is
+    interrupted. Prompts from other clients are left alone.
+    """
+    prompt_ids = [pid for pid in prompt_ids if pid]
+    if not prompt_ids:
+        return
+    try:
+        http_json(f"{base_url}/queue", {"delete": prompt_ids})
+        queue = json.loads(http_get(f"{base_url}/queue").decode("utf-8"))
+        running = {item[1] for item in queue.get("queue_running", []) if len(item) > 1}
+        if running & set(prompt_ids):
+            http_json(f"{base_url}/interrupt", {})
+    except Exception as e:
+        print(f"Could not cancel prompts: {e}")
+
+def view_url(base_url: str, img_info: dict) -> str:
+    """/view URL of one history image entry."""
+    query = urllib.parse.urlencode({
+        "filename": img_info.get("filename") or "",
+        "subfolder": img_info.get("subfolder") or "",
+        "type": img_info.get("type") or "output",
+    })
+    return f"{base_url}/view?{query}"
+
 def get_first_output_image(history_entry: dict) -> dict | None:
     outputs = history_entry.get("outputs") or {}
     for _, out in outputs.items():
@@ -49,6 +102,16 @@ def get_first_output_image(history_entry: dict) -> dict | None:
             return images[0]
     return None
 
+def get_output_images(history_entry: dict) -> list:
+    """Every image in a history entry, in output-node order then batch order."""
+    outputs = history_entry.get("outputs") or {}
+    images = []
+    for node_id in sorted(outputs, key=lambda k: (len(k), k)):
+        node_images = outputs[node_id].get("images")
+        if isinstance(node_images, list):
+            images.extend(node_images)
+    return images
+
 def set_workflow_inputs(workflow: dict, positive: str, negative: str, width: int, height: int,
                         seed: int = None, ckpt_name: str = None,
                         sampler_name: str = None, scheduler: str = None,
@@ -0,0 +1,386 @@
+"""Pool of ComfyUI instances with health checks and least-loaded dispatch.
+
+Each prompt goes to the healthy backend with the fewest queued prompts
+(its ``/queue`` depth from the last health check, corrected by what we have
+dispatched since). A background monitor polls ``/system_stats`` and
+``/queue``; a backend that fails twice in a row is marked down and gets no
+new prompts, unless it is the last healthy one (a busy ComfyUI can miss a
+health check). Prompts already queued on a down backend keep being polled
+and are only resubmitted if it comes back without them (e.g. restarted), so
+no prompt runs twice. Per-backend counters back the ``stats()`` report. Used by ``generator.py`` and
+``scripts/comfyui/generate-assets.py``.
+"""
+import http.client
+import json
+import threading
+import time
+import urllib.parse
+
+from . import comfy, comfy_ws
+from .http_pool import ConnectionPool, HTTPError
+
+# Seconds between background health checks
+CHECK_INTERVAL = 5.0
+# Per-request timeout for health checks
+CHECK_TIMEOUT = 3.0
+# Consecutive failed checks before a backend is taken out of rotation
+MAX_CHECK_FAILURES = 2
+# Times one prompt may be resubmitted after its backend lost it
+MAX_FAILOVERS = 2
+# Cost of loading a different checkpoint, in queued prompts: a backend that
+# already has the prompt's model resident wins unless its queue is this much
+# longer than another's.
+MODEL_SWAP_COST = 3
+
+# Health checks fail fast instead of retrying: the next check is the retry.
+_check_http = ConnectionPool(timeout=CHECK_TIMEOUT, retries=0)
+
+
+class NoBackendAvailable(RuntimeError):
+    pass
+
+
+class Backend:
+    def __init__(self, url):
+        self.url = url
+        self.healthy = True
+        self.checked = False
+        self.down = threading.Event()  # set while out of rotation
+        self.check_failures = 0
+        self.last_error = None
+        self.info = {}
+        self.others = 0      # queued prompts that are not ours (last check)
+        self.inflight = 0    # prompts we dispatched and have not collected
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.failovers = 0
+        self.busy_s = 0.0    # summed submit-to-done time of completed prompts
+        self.first_submit = None
+        self.resident = None  # affinity of the last prompt sent (model it ends up holding)
+
+    @property
+    def load(self):
+        return self.others + self.inflight
+
+    def to_dict(self):
+        elapsed = time.time() - self.first_submit if self.first_submit else 0.0
+        return {
+            "url": self.url,
+            "healthy": self.healthy,
+            "queue": self.load,
+            "inflight": self.inflight,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "failovers": self.failovers,
+            "mean_prompt_s": round(self.busy_s / self.completed, 3) if self.completed else None,
+            "prompts_per_min": round(self.completed * 60 / elapsed, 2) if elapsed > 0 else None,
+            "last_error": self.last_error,
+            "device": self.info.get("device"),
+            "resident": list(self.resident) if isinstance(self.resident, tuple) else self.resident,
+        }
+
+
+class Dispatch:
+    """One prompt on one backend; ``workflow`` is kept for failover."""
+
+    __slots__ = ("workflow", "affinity", "backend", "prompt_id", "stream", "submitted_at", "moves",
+                 "active")
+
+    def __init__(self, workflow, affinity=None):
+        self.workflow = workflow
+        self.affinity = affinity
+        self.active = False
+        self.backend = None
+        self.prompt_id = None
+        self.stream = None
+        self.submitted_at = 0.0
+        self.moves = 0
+
+
+class _Either:
+    """``is_set()`` of either event; lets one wait stop for two reasons."""
+
+    def __init__(self, first, second):
+        self.first = first
+        self.second = second
+
+    def is_set(self):
+        return (self.first is not None and self.first.is_set()) or self.second.is_set()
+
+
+class ComfyPool:
+    def __init__(self, urls, use_ws=True, check_interval=CHECK_INTERVAL):
+        urls = [comfy.normalize_base_url(u) for u in urls if u and u.strip()]
+        if not urls:
+            raise ValueError("ComfyPool needs at least one ComfyUI URL")
+        self.backends = [Backend(u) for u in dict.fromkeys(urls)]
+        self.use_ws = use_ws
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._monitor = None
+
+    # ── Health ───────────────────────────────────────────────────────────
+
+    def check(self, backend):
+        """Refresh one backend's health and queue depth."""
+        try:
+            try:
+                stats = json.loads(_check_http.get(f"{backend.url}/system_stats"))
+                devices = stats.get("devices") or []
+                backend.info = {"device": devices[0].get("name") if devices else None}
+            except HTTPError:
+                pass  # Older builds / stand-ins without /system_stats
+            queue = json.loads(_check_http.get(f"{backend.url}/queue"))
+            depth = len(queue.get("queue_running") or []) + len(queue.get("queue_pending") or [])
+        except (OSError, ValueError, HTTPError, http.client.HTTPException) as e:
+            with self._lock:
+                backend.check_failures += 1
+                backend.last_error = str(e)
+                if backend.check_failures >= MAX_CHECK_FAILURES or not backend.checked:
+                    self._mark_down(backend, e)
+                backend.checked = True
+            return False
+        with self._lock:
+            backend.others = max(0, depth - backend.inflight)
+            backend.check_failures = 0
+            backend.checked = True
+            if not backend.healthy:
+                print(f"ComfyUI backend back up: {backend.url}")
+            backend.healthy = True
+            backend.down.clear()
+        return True
+
+    def check_all(self):
+        for backend in self.backends:
+            self.check(backend)
+
+    def _mark_down(self, backend, error):
+        # Caller holds the lock. The last healthy backend stays in rotation:
+        # with nowhere else to send prompts, failing them gains nothing.
+        backend.last_error = str(error)
+        if not any(b.healthy for b in self.backends if b is not backend):
+            return
+        if backend.healthy:
+            print(f"ComfyUI backend down: {backend.url} ({error})")
+        backend.healthy = False
+        backend.last_error = str(error)
+        backend.down.set()
+
+    def _ensure_monitor(self):
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._monitor = threading.Thread(target=self._watch, name="comfy-pool", daemon=True)
+        self.check_all()
+        self._monitor.start()
+
+    def _watch(self):
+        while not self._stop.wait(self.check_interval):
+            self.check_all()
+
+    def close(self):
+        self._stop.set()
+
+    # ── Dispatch ─────────────────────────────────────────────────────────
+
+    def pick(self, exclude=(), affinity=None):
+        """Healthy backend with the lowest expected wait (ties: fewest submitted).
+
+        The wait is its queue length, plus MODEL_SWAP_COST when ``affinity``
+        (e.g. checkpoint + VAE) differs from what it last loaded, which pins
+        each checkpoint to the backends already holding it.
+        """
+        with self._lock:
+            candidates = [b for b in self.backends if b.healthy and b not in exclude]
+            if not candidates:
+                raise NoBackendAvailable(
+                    "No healthy ComfyUI backend: "
+                    + ", ".join(f"{b.url} ({b.last_error})" for b in self.backends)
+                )
+
+            def cost(b):
+                swap = MODEL_SWAP_COST if affinity is not None and b.resident != affinity else 0
+                return (b.load + swap, b.submitted)
+
+            return min(candidates, key=cost)
+
+    def submit(self, workflow, exclude=(), affinity=None):
+        """Queue ``workflow`` on the best backend (see ``pick``); returns a Dispatch.
+
+        Backends that refuse the connection are marked down and the next one
+        is tried. ComfyUI rejecting the prompt itself (HTTPError, e.g. a
+        validation error) is raised as is.
+        """
+        self._ensure_monitor()
+        return self._submit(Dispatch(workflow, affinity), exclude)
+
+    def _submit(self, dispatch, exclude=()):
+        tried = set(exclude)
+        rechecked = False
+        while True:
+            try:
+                backend = self.pick(exclude=tried, affinity=dispatch.affinity)
+            except NoBackendAvailable:
+                if rechecked:
+                    raise
+                # Down backends may have come back since the last check.
+                rechecked = True
+                for b in self.backends:
+                    if b not in tried:
+                        self.check(b)
+                continue
+            stream = comfy_ws.get_stream(backend.url) if self.use_ws else None
+            try:
+                prompt_id = comfy.queue_prompt(backend.url, dispatch.workflow,
+                                               stream.client_id if stream else None)
+            except HTTPError:
+                raise
+            except (OSError, ValueError, http.client.HTTPException) as e:
+                with self._lock:
+                    self._mark_down(backend, e)
+                tried.add(backend)
+                continue
+            with self._lock:
+                backend.submitted += 1
+            return self._attach(dispatch, backend, prompt_id, stream)
+
+    def _attach(self, dispatch, backend, prompt_id, stream):
+        now = time.time()
+        with self._lock:
+            backend.inflight += 1
+            if dispatch.affinity is not None:
+                backend.resident = dispatch.affinity
+            if backend.first_submit is None:
+                backend.first_submit = now
+        dispatch.backend = backend
+        dispatch.prompt_id = prompt_id
+        dispatch.stream = stream
+        dispatch.submitted_at = now
+        dispatch.active = True
+        return dispatch
+
+    def adopt(self, workflow, url, prompt_id, affinity=None):
+        """Dispatch for a prompt queued by an earlier run, if ``url`` still has it.
+
+        Returns None when that backend is not in the pool, is down, or no
+        longer knows the prompt (e.g. it restarted); submit it again then.
+        """
+        url = comfy.normalize_base_url(url or "")
+        backend = next((b for b in self.backends if b.url == url), None)
+        if backend is None or not backend.healthy or not prompt_id:
+            return None
+        if not self._knows(backend, prompt_id):
+            return None
+        self._ensure_monitor()
+        # Its /ws events went to the earlier run's client id, so poll.
+        return self._attach(Dispatch(workflow, affinity), backend, prompt_id, None)
+
+    def _knows(self, backend, prompt_id):
+        """Whether ``backend`` has ``prompt_id`` queued or finished (None if unreachable)."""
+        try:
+            quoted = urllib.parse.quote(prompt_id)
+            if prompt_id in json.loads(comfy.http_get(f"{backend.url}/history/{quoted}")):
+                return True
+            queue = json.loads(comfy.http_get(f"{backend.url}/queue"))
+        except (OSError, ValueError, HTTPError, http.client.HTTPException):
+            return None
+        queued = (queue.get("queue_running") or []) + (queue.get("queue_pending") or [])
+        return any(len(item) > 1 and item[1] == prompt_id for item in queued)
+
+    def _settle(self, dispatch, ok):
+        with self._lock:
+            if not dispatch.active:
+                return
+            dispatch.active = False
+            backend = dispatch.backend
+            backend.inflight = max(0, backend.inflight - 1)
+            if ok:
+                backend.completed += 1
+                backend.busy_s += time.time() - dispatch.submitted_at
+            else:
+                backend.failed += 1
+
+    def wait(self, dispatch, stop=None, timeout_s=600):
+        """History entry of ``dispatch``.
+
+        While its backend is marked down the prompt keeps being polled in
+        rounds of ``check_interval``; it is resubmitted only once the backend
+        answers again and no longer knows it.
+        """
+        deadline = time.time() + timeout_s
+        while True:
+            backend = dispatch.backend
+            down = not backend.healthy
+            remaining = max(0.0, deadline - time.time())
+            try:
+                hist = comfy.wait_for_history(
+                    backend.url, dispatch.prompt_id,
+                    timeout_s=min(remaining, self.check_interval) if down else remaining,
+                    stop=stop if down else _Either(stop, backend.down), stream=dispatch.stream,
+                )
+            except InterruptedError:
+                if stop is not None and stop.is_set():
+                    self._settle(dispatch, ok=False)
+                    raise
+                continue  # Marked down meanwhile: keep polling in rounds.
+            except TimeoutError:
+                if time.time() >= deadline:
+                    self._settle(dispatch, ok=False)
+                    raise
+                if backend.healthy and self._knows(backend, dispatch.prompt_id) is False:
+                    self._resubmit(dispatch)
+                continue
+            except BaseException:
+                self._settle(dispatch, ok=False)
+                raise
+            self._settle(dispatch, ok=True)
+            return hist
+
+    def _resubmit(self, dispatch):
+        backend = dispatch.backend
+        self._settle(dispatch, ok=False)
+        if dispatch.moves >= MAX_FAILOVERS:
+            raise RuntimeError(
+                f"ComfyUI backend {backend.url} lost prompt {dispatch.prompt_id}; "
+                f"giving up after {dispatch.moves} failovers"
+            )
+        dispatch.moves += 1
+        with self._lock:
+            backend.failovers += 1
+        print(f"  Resubmitting prompt lost by {backend.url}")
+        self._submit(dispatch)
+
+    def fetch(self, dispatch, img_info):
+        """Bytes of one output image from the backend that rendered it."""
+        return comfy.http_get(comfy.view_url(dispatch.backend.url, img_info))
+
+    def cancel(self, dispatches):
+        """Best-effort removal of still-queued dispatches from their backends."""
+        by_url = {}
+        for d in dispatches:
+            if d is not None and d.backend is not None and d.prompt_id:
+                by_url.setdefault(d.backend.url, []).append(d.prompt_id)
+                self._settle(d, ok=False)
+        for url, prompt_ids in by_url.items():
+            comfy.cancel_prompts(url, prompt_ids)
+
+    def stats(self):
+        with self._lock:
+            return [b.to_dict() for b in self.backends]
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(urls, use_ws=True):
+    """Shared pool for this list of base URLs."""
+    key = (tuple(urls), use_ws)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ComfyPool(urls, use_ws=use_ws)
+        return pool
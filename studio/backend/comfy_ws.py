@@ -0,0 +1,292 @@
+"""ComfyUI ``/ws`` event stream (stdlib-only WebSocket client).
+
+ComfyUI pushes ``executing`` / ``executed`` / ``progress`` messages to the
+client id a prompt was queued with. ``ComfyEventStream`` keeps one such
+connection per server in a background thread and lets waiters block on a
+prompt's completion instead of polling ``/history`` every half second. When
+the socket is unavailable or drops, waiters fall back to polling (see
+``comfy.wait_for_history``).
+"""
+import base64
+import hashlib
+import json
+import os
+import socket
+import threading
+import urllib.parse
+import uuid
+from collections import OrderedDict
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# Message types that end a prompt's execution.
+_DONE_TYPES = ("execution_success", "execution_error", "execution_interrupted")
+
+
+class WebSocketError(Exception):
+    pass
+
+
+class WebSocket:
+    """Minimal RFC 6455 client: text/binary messages, ping/pong, close."""
+
+    def __init__(self, url, timeout=10.0):
+        parsed = urllib.parse.urlsplit(url)
+        if parsed.scheme not in ("ws", "http"):
+            raise WebSocketError(f"Unsupported WebSocket URL: {url}")
+        host = parsed.hostname
+        port = parsed.port or 80
+        resource = parsed.path or "/"
+        if parsed.query:
+            resource += "?" + parsed.query
+
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        self._send_lock = threading.Lock()
+        self._buffer = b""
+        try:
+            self._handshake(host, port, resource)
+        except Exception:
+            self.sock.close()
+            raise
+
+    def _handshake(self, host, port, resource):
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        request = (
+            f"GET {resource} HTTP/1.1\r\n"
+            f"Host: {host}:{port}\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Key: {key}\r\n"
+            "Sec-WebSocket-Version: 13\r\n\r\n"
+        )
+        self.sock.sendall(request.encode("ascii"))
+
+        while b"\r\n\r\n" not in self._buffer:
+            chunk = self.sock.recv(4096)
+            if not chunk:
+                raise WebSocketError("Connection closed during handshake")
+            self._buffer += chunk
+        head, self._buffer = self._buffer.split(b"\r\n\r\n", 1)
+        lines = head.decode("latin-1").split("\r\n")
+        if " 101 " not in lines[0] + " ":
+            raise WebSocketError(f"Handshake refused: {lines[0]}")
+        headers = {}
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        expected = base64.b64encode(hashlib.sha1((key + _WS_GUID).encode("ascii")).digest()).decode("ascii")
+        if headers.get("sec-websocket-accept") != expected:
+            raise WebSocketError("Bad Sec-WebSocket-Accept")
+
+    def settimeout(self, timeout):
+        self.sock.settimeout(timeout)
+
+    def _recv_exact(self, n):
+        while len(self._buffer) < n:
+            chunk = self.sock.recv(max(4096, n - len(self._buffer)))
+            if not chunk:
+                raise WebSocketError("Connection closed")
+            self._buffer += chunk
+        data, self._buffer = self._buffer[:n], self._buffer[n:]
+        return data
+
+    def _recv_frame(self):
+        b1, b2 = self._recv_exact(2)
+        fin = bool(b1 & 0x80)
+        opcode = b1 & 0x0F
+        length = b2 & 0x7F
+        if length == 126:
+            length = int.from_bytes(self._recv_exact(2), "big")
+        elif length == 127:
+            length = int.from_bytes(self._recv_exact(8), "big")
+        mask = self._recv_exact(4) if b2 & 0x80 else None
+        payload = self._recv_exact(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        return fin, opcode, payload
+
+    def recv(self):
+        """Next complete message as ``(opcode, payload)``; control frames handled inline."""
+        message_op = None
+        parts = []
+        while True:
+            fin, opcode, payload = self._recv_frame()
+            if opcode == OP_PING:
+                self.send(payload, OP_PONG)
+                continue
+            if opcode == OP_PONG:
+                continue
+            if opcode == OP_CLOSE:
+                try:
+                    self.send(payload[:2], OP_CLOSE)
+                except OSError:
+                    pass
+                raise WebSocketError("Closed by server")
+            if opcode != OP_CONT:
+                message_op = opcode
+                parts = []
+            parts.append(payload)
+            if fin:
+                return message_op, b"".join(parts)
+
+    def send(self, payload, opcode=OP_TEXT):
+        if isinstance(payload, str):
+            payload = payload.encode("utf-8")
+        header = bytearray([0x80 | opcode])
+        length = len(payload)
+        if length < 126:
+            header.append(0x80 | length)
+        elif length < 1 << 16:
+            header.append(0x80 | 126)
+            header += length.to_bytes(2, "big")
+        else:
+            header.append(0x80 | 127)
+            header += length.to_bytes(8, "big")
+        mask = os.urandom(4)
+        header += mask
+        masked = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        with self._send_lock:
+            self.sock.sendall(bytes(header) + masked)
+
+    def close(self):
+        try:
+            self.send(b"\x03\xe8", OP_CLOSE)
+        except OSError:
+            pass
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class PromptState:
+    __slots__ = ("done", "error", "step", "steps", "node")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+        self.step = 0
+        self.steps = 0
+        self.node = None
+
+
+class ComfyEventStream:
+    """Background listener on ``<base_url>/ws?clientId=<client_id>``.
+
+    Prompts must be queued with ``client_id`` so ComfyUI routes their
+    events here. ``connected`` is False until the handshake succeeds and
+    again after a drop (the thread keeps reconnecting with backoff).
+    """
+
+    def __init__(self, base_url, client_id=None, max_tracked=1024):
+        self.base_url = base_url.rstrip("/")
+        self.client_id = client_id or uuid.uuid4().hex
+        self.max_tracked = max_tracked
+        self.connected = False
+        self._prompts = OrderedDict()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._ready = threading.Event()
+        self._ws = None
+        self._thread = threading.Thread(target=self._run, name="comfy-ws", daemon=True)
+        self._thread.start()
+
+    @property
+    def ws_url(self):
+        parsed = urllib.parse.urlsplit(self.base_url)
+        scheme = "wss" if parsed.scheme == "https" else "ws"
+        return f"{scheme}://{parsed.netloc}/ws?clientId={urllib.parse.quote(self.client_id)}"
+
+    def wait_connected(self, timeout):
+        """Block until the first connection attempt finished; returns ``connected``."""
+        self._ready.wait(timeout)
+        return self.connected
+
+    def state(self, prompt_id):
+        with self._lock:
+            state = self._prompts.get(prompt_id)
+            if state is None:
+                state = self._prompts[prompt_id] = PromptState()
+                while len(self._prompts) > self.max_tracked:
+                    self._prompts.popitem(last=False)
+            return state
+
+    def forget(self, prompt_id):
+        with self._lock:
+            self._prompts.pop(prompt_id, None)
+
+    def close(self):
+        self._stop.set()
+        ws = self._ws
+        if ws is not None:
+            ws.close()
+
+    # ── Reader thread ────────────────────────────────────────────────────
+
+    def _run(self):
+        backoff = 0.5
+        while not self._stop.is_set():
+            try:
+                if urllib.parse.urlsplit(self.base_url).scheme == "https":
+                    raise WebSocketError("wss:// is not supported; polling instead")
+                self._ws = WebSocket(self.ws_url)
+                self._ws.settimeout(None)
+                self.connected = True
+                backoff = 0.5
+                self._ready.set()
+                while not self._stop.is_set():
+                    opcode, payload = self._ws.recv()
+                    if opcode == OP_TEXT:
+                        self._dispatch(payload)
+            except (OSError, WebSocketError):
+                pass
+            finally:
+                self.connected = False
+                self._ready.set()
+                if self._ws is not None:
+                    self._ws.close()
+                    self._ws = None
+            # Messages may have been missed while down; waiters poll meanwhile.
+            self._stop.wait(backoff)
+            backoff = min(backoff * 2, 30.0)
+
+    def _dispatch(self, payload):
+        try:
+            message = json.loads(payload.decode("utf-8"))
+        except ValueError:
+            return
+        msg_type = message.get("type")
+        data = message.get("data") or {}
+        prompt_id = data.get("prompt_id")
+        if not prompt_id:
+            return
+        state = self.state(prompt_id)
+        if msg_type == "progress":
+            state.step = data.get("value", 0)
+            state.steps = data.get("max", 0)
+        elif msg_type == "executing":
+            state.node = data.get("node")
+            if state.node is None:
+                state.done.set()
+        elif msg_type in _DONE_TYPES:
+            if msg_type != "execution_success":
+                state.error = data.get("exception_message") or msg_type
+            state.done.set()
+
+
+_streams = {}
+_streams_lock = threading.Lock()
+
+
+def get_stream(base_url, connect_timeout=2.0):
+    """Shared stream for ``base_url``; None when it cannot connect (use polling)."""
+    base_url = base_url.rstrip("/")
+    with _streams_lock:
+        stream = _streams.get(base_url)
+        if stream is None:
+            stream = _streams[base_url] = ComfyEventStream(base_url)
+    if not stream.wait_connected(connect_timeout):
+        return None
+    return stream
@@ -0,0 +1,131 @@
+import os
+from types import MappingProxyType
+
+_MEDIA_SUFFIXES = ('.png', '.wav', '.ogg', '.mp4')
+
+
+def asset_name(path):
+    name = os.path.basename(path)
+    for suffix in _MEDIA_SUFFIXES:
+        name = name.replace(suffix, '')
+    return name
+
+
+def freeze(config):
+    """Read-only view of a config dict shared by every item of an entry."""
+    return MappingProxyType(config) if config else None
+
+
+class EntryTemplate:
+    """Fields an index entry contributes identically to each expanded item.
+
+    One template is built per source entry; ``animation`` and ``composite``
+    are frozen so items can share them instead of copying per combination.
+    """
+
+    __slots__ = ('source_entry_id', 'format', 'size', 'status', 'type',
+                 'var_names', 'animation', 'composite')
+
+    def __init__(self, entry, entry_type, var_names=(), animation=None, composite=None):
+        self.source_entry_id = entry.get('id')
+        self.format = entry.get('format', 'png')
+        self.size = entry.get('size')
+        self.status = entry.get('status', 'planned')
+        self.type = entry_type
+        self.var_names = tuple(var_names)
+        self.animation = freeze(animation)
+        self.composite = freeze(composite)
+
+
+class ExpandedEntry:
+    """One expanded index item: a path, its var values and a shared template.
+
+    ``id``, ``name`` and ``vars`` are derived on demand; ``to_dict`` builds
+    the API shape only when the item is serialized.
+    """
+
+    __slots__ = ('template', 'path', 'combo', 'status', 'exists', '_id')
+
+    FIELDS = ('id', 'name', 'path', 'format', 'size', 'status', 'source_entry_id',
+              'vars', 'type', 'animation', 'composite', 'exists')
+
+    def __init__(self, template, path, combo=None, entry_id=None):
+        self.template = template
+        self.path = path
+        self.combo = combo
+        self.status = template.status
+        self.exists = None
+        self._id = entry_id
+
+    @property
+    def id(self):
+        if self._id is not None or self.combo is None:
+            return self._id
+        return self.path.replace('/', '-').replace('.', '-').replace('{', '').replace('}', '')
+
+    @property
+    def name(self):
+        return asset_name(self.path)
+
+    @property
+    def vars(self):
+        if self.combo is None:
+            return None
+        return dict(zip(self.template.var_names, self.combo))
+
+    @property
+    def format(self):
+        return self.template.format
+
+    @property
+    def size(self):
+        return self.template.size
+
+    @property
+    def source_entry_id(self):
+        return self.template.source_entry_id
+
+    @property
+    def type(self):
+        return self.template.type
+
+    @property
+    def animation(self):
+        return self.template.animation
+
+    @property
+    def composite(self):
+        return self.template.composite
+
+    def to_dict(self, fields=None):
+        data = {}
+        for key in fields or self.FIELDS:
+            if key not in self.FIELDS:
+                continue
+            value = getattr(self, key)
+            if value is None and key in ('vars', 'animation', 'composite', 'exists'):
+                # Optional keys are omitted, as in the original dict items.
+                continue
+            if isinstance(value, MappingProxyType):
+                value = dict(value)
+            data[key] = value
+        return data
+
+    # Read-only mapping access for callers written against dict items.
+    def __getitem__(self, key):
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        value = getattr(self, key, None) if key in self.FIELDS else None
+        return default if value is None else value
+
+
+def json_default(obj):
+    """``json.dumps`` hook for compact entries and frozen configs."""
+    if isinstance(obj, ExpandedEntry):
+        return obj.to_dict()
+    if isinstance(obj, MappingProxyType):
+        return dict(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,124 @@
+import json
+import queue
+import threading
+from collections import deque
+
+# Returned by Subscription.get once the bus (or this subscriber) is closed.
+CLOSED = object()
+
+
+class Event:
+    __slots__ = ("id", "type", "data")
+
+    def __init__(self, event_id, event_type, data):
+        self.id = event_id
+        self.type = event_type
+        self.data = data
+
+    def encode(self):
+        """Wire format of one Server-Sent Event."""
+        payload = json.dumps(self.data)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n".encode("utf-8")
+
+
+class Subscription:
+    """One connected stream; a bounded queue so a stalled client cannot grow memory."""
+
+    def __init__(self, max_pending=512):
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def offer(self, event):
+        with self._lock:
+            if self.closed:
+                return
+            try:
+                self._queue.put_nowait(event)
+            except queue.Full:
+                # Too far behind: drop the stream. The browser reconnects with
+                # Last-Event-ID and is replayed (or reset) from the history.
+                self._close()
+
+    def close(self):
+        with self._lock:
+            self._close()
+
+    def _close(self):
+        # Caller holds self._lock, so no offer can refill the queue before CLOSED.
+        if self.closed:
+            return
+        self.closed = True
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._queue.put_nowait(CLOSED)
+
+    def get(self, timeout=None):
+        """Next event, None on timeout, or CLOSED."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class EventBus:
+    """In-process publish/subscribe hub behind ``/api/events``.
+
+    Events get increasing ids and the last ``history`` of them are kept so a
+    reconnecting client can resume from its ``Last-Event-ID``. If the client
+    fell further behind than the history, it gets only a ``reset`` event and
+    is expected to refetch its state.
+    """
+
+    def __init__(self, history=256):
+        self._lock = threading.Lock()
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._next_id = 1
+
+    @property
+    def has_subscribers(self):
+        return bool(self._subscribers)
+
+    def publish(self, event_type, data):
+        with self._lock:
+            event = Event(self._next_id, event_type, data)
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers)
+        for sub in subscribers:
+            sub.offer(event)
+        return event
+
+    def subscribe(self, last_event_id=None):
+        # Room for a full history replay plus the events published while the
+        # client catches up; a replay must never overflow the queue by itself.
+        sub = Subscription(max_pending=2 * self._history.maxlen)
+        with self._lock:
+            if last_event_id is not None:
+                oldest = self._history[0].id if self._history else self._next_id
+                # Also reset ids from a previous server run.
+                if last_event_id + 1 < oldest or last_event_id >= self._next_id:
+                    # The client refetches everything, so the replay is moot;
+                    # the reset's id lets it resume from the newest event.
+                    sub.offer(Event(self._next_id - 1, "reset", {}))
+                else:
+                    for event in self._history:
+                        if event.id > last_event_id:
+                            sub.offer(event)
+            self._subscribers.add(sub)
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def close(self):
+        with self._lock:
+            subscribers = list(self._subscribers)
+            self._subscribers.clear()
+        for sub in subscribers:
+            sub.close()
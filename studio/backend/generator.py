@@ -1,14 +1,27 @@
-import os
 import json
+import os
 import random
-from PIL import Image
-from io import BytesIO
-from . import comfy, prompts, stitcher
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from . import comfy, comfy_pool, prompts, result_cache, stitcher, workflow_plan
 
 # Configuration
 COMFY_URL = "http://127.0.0.1:8188"
+# Every ComfyUI instance to render on; prompts go to the least loaded one
+COMFY_URLS = [COMFY_URL]
 REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 OUTPUT_DIR = os.path.join(REPO_ROOT, "assets")
+# Threads waiting on/downloading finished frames of one sheet
+MAX_FRAME_COLLECTORS = 4
+# How sheet frames are rendered (config "frame_mode" overrides):
+#   "frames" - one prompt per frame with seed + i
+#   "batch"  - one prompt with latent batch_size = frames and a single seed;
+#              frames differ from "frames" mode, need more VRAM and arrive
+#              together (falls back to "frames" when the workflow has no
+#              batchable latent node)
+DEFAULT_FRAME_MODE = "frames"
+# Rendered frames keyed by plan + inputs (config "use_cache": false bypasses)
+RESULT_CACHE = result_cache.ResultCache(os.path.join(REPO_ROOT, "build", "result-cache"))
 
 # Checkpoint-to-output-folder mapping
 CHECKPOINT_OUTPUT_PATHS = {
@@ -21,7 +34,149 @@ CHECKPOINT_OUTPUT_PATHS = {
     "default": "assets/zelos",
 }
 
-def generate_asset(rel_path: str, workflow_path: str, count: int = 1, config: dict = None):
+def find_workflow_path(repo_root: str = REPO_ROOT) -> str:
+    workflow_candidates = [
+        os.path.join(repo_root, "scripts", "comfyui", "workflow-api.json"),
+        os.path.join(repo_root, "scripts", "comfyui", "workflows", "assetgen_sdxl_api.json"),
+        os.path.join(repo_root, "scripts", "comfyui", "workflows", "assetgen_sdxl_api_pony.json"),
+    ]
+    workflow_path = next((p for p in workflow_candidates if os.path.exists(p)), None)
+    if not workflow_path:
+        raise FileNotFoundError(
+            "No ComfyUI workflow file found. Tried: " + ", ".join(workflow_candidates)
+        )
+    return workflow_path
+
+def comfy_backends():
+    """Shared pool over COMFY_URLS."""
+    return comfy_pool.get_pool(COMFY_URLS)
+
+def render_frames(workflows, progress=None, affinity=None, on_frame=None):
+    """Queue every frame's prompt up front, then collect images as they finish.
+
+    ComfyUI runs its queue back to back, so the GPU does not sit idle while we
+    download the previous frame. With several backends the frames spread
+    across them. Image bytes come back in frame order whatever order they
+    complete in. On any error (or when ``progress`` raises to cancel) our
+    remaining prompts are removed from the queues. ``affinity`` (checkpoint,
+    VAE) keeps the frames on backends that already have the model loaded.
+    With ``on_frame(i, data)`` each frame is handed over as it completes
+    instead of being kept (its slot in the returned list stays None).
+    """
+    backends = comfy_backends()
+    total = len(workflows)
+    dispatches = []
+    stop = threading.Event()
+    pool = None
+    try:
+        for workflow in workflows:
+            dispatches.append(backends.submit(workflow, affinity=affinity))
+        print(f"  Queued {total} frame(s)")
+
+        images = [None] * total
+        pool = ThreadPoolExecutor(max_workers=min(total, MAX_FRAME_COLLECTORS))
+        futures = {
+            pool.submit(_fetch_frame_image, backends, dispatch, stop): i
+            for i, dispatch in enumerate(dispatches)
+        }
+        done = 0
+        for future in as_completed(futures):
+            i = futures[future]
+            data = future.result()
+            if on_frame:
+                on_frame(i, data)
+            else:
+                images[i] = data
+            done += 1
+            print(f"  Frame {i+1}/{total} done ({done}/{total})")
+            if progress:
+                progress(done, total)
+        return images
+    except BaseException:
+        stop.set()
+        backends.cancel(dispatches)
+        raise
+    finally:
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+def render_batch(plan, frame_inputs, total, progress=None, affinity=None, on_frame=None):
+    """Render ``total`` frames from a single prompt via the latent batch size.
+
+    Returns None when the workflow has no batchable latent node. The graph
+    (checkpoint load, text encoding) runs once and every image is pulled from
+    the one history entry. ``on_frame`` works as in ``render_frames``.
+    """
+    if not plan.batchable:
+        return None
+    batched = plan.build(batch_size=total, **frame_inputs)
+
+    backends = comfy_backends()
+    dispatch = backends.submit(batched, affinity=affinity)
+    print(f"  Queued {total} frame(s) as one batch")
+    try:
+        hist = backends.wait(dispatch)
+    except BaseException:
+        backends.cancel([dispatch])
+        raise
+    infos = comfy.get_output_images(hist)[:total]
+    if not infos:
+        raise Exception("No image returned")
+
+    images = []
+    for i, img_info in enumerate(infos):
+        data = backends.fetch(dispatch, img_info)
+        if on_frame:
+            on_frame(i, data)
+            data = None
+        images.append(data)
+        if progress:
+            progress(i + 1, total)
+    return images
+
+def _fetch_frame_image(backends, dispatch, stop=None):
+    """Wait for ``dispatch`` and return its first image's bytes."""
+    hist = backends.wait(dispatch, stop=stop)
+    img_info = comfy.get_first_output_image(hist)
+    if not img_info:
+        raise Exception("No image returned")
+    return backends.fetch(dispatch, img_info)
+
+def _checkpoint_override(config):
+    """Checkpoint file named by the config, or None to keep the workflow's."""
+    if not config:
+        return None
+    for field in ("checkpoint", "checkpoint_file"):
+        candidate = config.get(field)
+        if isinstance(candidate, str):
+            c = candidate.lower().strip()
+            if c.endswith((".safetensors", ".ckpt", ".pt", ".pth")):
+                return candidate
+    return None
+
+def checkpoint_group(config, workflow_path=None):
+    """(checkpoint file, VAE) a generation of ``config`` will load.
+
+    Used to schedule jobs so ones sharing a model run back to back.
+    """
+    plan = workflow_plan.load_plan(workflow_path or find_workflow_path())
+    return (_checkpoint_override(config) or plan.default_checkpoint, plan.default_vae)
+
+def _frame_keys(plan, frame_inputs, seed, total, batched):
+    """Result-cache key per frame; batched frames share a seed and differ by index."""
+    if batched:
+        return [result_cache.result_key(plan.digest, seed=seed, batch=[total, i], **frame_inputs)
+                for i in range(total)]
+    return [result_cache.result_key(plan.digest, seed=seed + i, **frame_inputs)
+            for i in range(total)]
+
+def generate_asset(rel_path: str, workflow_path: str, count: int = 1, config: dict = None,
+                   progress=None):
+    """Generate one asset (or sheet) through ComfyUI.
+
+    ``progress(done, total)`` is called before the first frame and after each
+    finished frame; it may raise to abort the run between frames.
+    """
     if not isinstance(rel_path, str) or not rel_path.strip():
         return {"status": "error", "error": "Missing or invalid rel_path"}
 
@@ -73,9 +228,8 @@ def generate_asset(rel_path: str, workflow_path: str, count: int = 1, config: di
     
     print(f"Generating {rel_path} with ckpt={checkpoint}...")
     
-    # Reload workflow for each run to be safe
-    with open(workflow_path, "r", encoding="utf-8") as f:
-        workflow_base = json.load(f)
+    # Analyzed once per workflow file content; edits produce a new plan.
+    plan = workflow_plan.load_plan(workflow_path)
 
     # Detect if sheet and get frame count
     is_sheet = "sheet" in rel_path
@@ -107,73 +261,41 @@ def generate_asset(rel_path: str, workflow_path: str, count: int = 1, config: di
             elif "hit" in rel_path: frames_to_gen = 4
             else: frames_to_gen = 8  # Default for unknown sheets
     
-    generated_images = []
-
-    ckpt_override = None
-    if config:
-        candidate = config.get("checkpoint")
-        if isinstance(candidate, str):
-            c = candidate.lower().strip()
-            if c.endswith((".safetensors", ".ckpt", ".pt", ".pth")):
-                ckpt_override = candidate
-        candidate = config.get("checkpoint_file")
-        if not ckpt_override and isinstance(candidate, str):
-            c = candidate.lower().strip()
-            if c.endswith((".safetensors", ".ckpt", ".pt", ".pth")):
-                ckpt_override = candidate
+    ckpt_override = _checkpoint_override(config)
+    affinity = (ckpt_override or plan.default_checkpoint, plan.default_vae)
     
     # Get checkpoint-specific sampler settings
     sampler_settings = prompts.get_sampler_settings(ckpt_override or checkpoint or "")
     
-    for i in range(frames_to_gen):
-        print(f"  Frame {i+1}/{frames_to_gen}...")
-        
-        # Clone workflow
-        workflow = json.loads(json.dumps(workflow_base))
-        
-        # Settings
-        # Use provided seed or random
-        current_seed = seed + i
-        
-        # Apply checkpoint-specific settings
-        comfy.set_workflow_inputs(
-            workflow, positive, negative, 512, 512,
-            seed=current_seed,
-            ckpt_name=ckpt_override,
-            sampler_name=sampler_settings.get("sampler_name"),
-            scheduler=sampler_settings.get("scheduler"),
-            steps=sampler_settings.get("steps"),
-            cfg=sampler_settings.get("cfg"),
-        )
-        
-        # Dispatch
-        try:
-            res = comfy.http_json(f"{COMFY_URL}/prompt", {"prompt": workflow})
-            prompt_id = res["prompt_id"]
-            
-            hist = comfy.wait_for_history(COMFY_URL, prompt_id)
-            img_info = comfy.get_first_output_image(hist)
-            if not img_info:
-                raise Exception("No image returned")
-                
-            fname = img_info["filename"]
-            img_bytes = comfy.http_get(f"{COMFY_URL}/view?filename={fname}")
-            
-            img = Image.open(BytesIO(img_bytes)).convert("RGBA")
-            generated_images.append(img)
-            
-        except Exception as e:
-            print(f"Error frame {i}: {e}")
-            return {"status": "error", "error": str(e)}
+    if progress:
+        progress(0, frames_to_gen)
+
+    # Apply checkpoint-specific settings
+    frame_inputs = {
+        "positive": positive,
+        "negative": negative,
+        "width": 512,
+        "height": 512,
+        "ckpt_name": ckpt_override,
+        "checkpoint_keys": ("ckpt_name", "checkpoint"),
+        "sampler_name": sampler_settings.get("sampler_name"),
+        "scheduler": sampler_settings.get("scheduler"),
+        "steps": sampler_settings.get("steps"),
+        "cfg": sampler_settings.get("cfg"),
+    }
+    # Use provided seed or random. Per frame, frame i gets seed + i; a batch
+    # renders all frames from one prompt with seed (batch index i).
+    workflows = [plan.build(seed=seed + i, **frame_inputs) for i in range(frames_to_gen)]
+
+    frame_mode = (config or {}).get("frame_mode", DEFAULT_FRAME_MODE)
+    batched = frames_to_gen > 1 and frame_mode == "batch"
+    if batched and not plan.batchable:
+        print("  Workflow has no batchable latent node; rendering per frame")
+        batched = False
+
+    cache = RESULT_CACHE if (config or {}).get("use_cache", True) else None
+    frame_keys = _frame_keys(plan, frame_inputs, seed, frames_to_gen, batched)
 
-    # Finalize
-    final_img = None
-    if is_sheet:
-        final_img = stitcher.stitch_horizontal(generated_images)
-    else:
-        final_img = generated_images[0]
-        
-    # Save
     # Determine final output path.
     # When a checkpoint-specific output dir is used, extract just the filename
     # portion from the path to avoid nested "assets/..." issues.
@@ -195,9 +317,94 @@ def generate_asset(rel_path: str, workflow_path: str, count: int = 1, config: di
         full_path = os.path.join(REPO_ROOT, normalized_rel_path)
     else:
         full_path = os.path.join(abs_output_dir, rel_path)
+
+    # Frames are pasted into the sheet as they arrive and not kept around.
+    builder = stitcher.SheetBuilder(frames_to_gen)
+    # Config "preview": true rewrites <output>.partial.png as sheet frames land.
+    preview_path = None
+    if is_sheet and (config or {}).get("preview"):
+        preview_path = os.path.splitext(full_path)[0] + ".partial.png"
+
+    def accept(i, data, store=True):
+        if store and cache:
+            cache.put(frame_keys[i], data)
+        builder.add_bytes(i, data)
+        if preview_path and not builder.complete:
+            builder.flush(preview_path)
+
+    try:
+        todo = []
+        for i, key in enumerate(frame_keys):
+            data = cache.get(key) if cache else None
+            if data is None:
+                todo.append(i)
+            else:
+                accept(i, data, store=False)
+        cached = frames_to_gen - len(todo)
+        if cached:
+            print(f"  {cached}/{frames_to_gen} frame(s) from result cache")
+            if progress:
+                progress(cached, frames_to_gen)
+
+        def offset_progress(done, total):
+            if progress:
+                progress(cached + done, frames_to_gen)
+
+        if todo and batched:
+            # A batch cannot render a subset, so any miss re-renders it all;
+            # frames already taken from the cache are neither pasted nor
+            # counted again, so progress only moves forward.
+            missing = set(todo)
+
+            def batch_frame(i, data):
+                if i in missing:
+                    accept(i, data)
+
+            def batch_progress(done, total):
+                offset_progress(sum(1 for i in todo if i < done), total)
+
+            rendered = render_batch(plan, dict(frame_inputs, seed=seed), frames_to_gen, batch_progress, affinity,
+                                    on_frame=batch_frame)
+            rest = [i for i in todo if i >= len(rendered)]
+            if rest:
+                # Short batch (e.g. a custom save node): render the rest per frame.
+                print(f"  Batch returned {len(rendered)}/{frames_to_gen}; rendering the rest per frame")
+                render_frames([workflows[i] for i in rest], affinity=affinity,
+                              on_frame=lambda j, data: accept(rest[j], data))
+        elif todo:
+            render_frames([workflows[i] for i in todo], offset_progress, affinity,
+                          on_frame=lambda j, data: accept(todo[j], data))
+        if not builder.complete:
+            raise Exception(f"Missing frame(s) {builder.missing}")
+    except Exception as e:
+        print(f"Error generating {rel_path}: {e}")
+        if preview_path and os.path.exists(preview_path):
+            os.remove(preview_path)
+        return {"status": "error", "error": str(e)}
+
+    # Config "trim": true cuts transparent margins and writes <output>.json
+    # (Pixi spritesheet data) so the kit can place the frames as before.
+    final_img = builder.image()
+    metadata = None
+    if (config or {}).get("trim"):
+        pivot = tuple((config or {}).get("pivot") or stitcher.DEFAULT_PIVOT)
+        final_img, frames = builder.trim(padding=int(config.get("trim_padding", 0)), pivot=pivot)
+        image_name = os.path.basename(full_path)
+        stem, ext = os.path.splitext(image_name)
+        names = [f"{stem}-{i:02d}{ext}" for i in range(frames_to_gen)] if is_sheet else [image_name]
+        metadata = stitcher.spritesheet_data(dict(zip(names, frames)), image_name, final_img.size,
+                                             {stem: names} if is_sheet else None)
+
+    # Save
     os.makedirs(os.path.dirname(full_path), exist_ok=True)
     # Force PNG so we don't depend on filename extension.
     final_img.save(full_path, format="PNG")
     print(f"Saved to {full_path}")
-    
-    return {"status": "success", "path": full_path}
+    if preview_path and os.path.exists(preview_path):
+        os.remove(preview_path)
+    result = {"status": "success", "path": full_path}
+    if metadata:
+        result["metadata"] = os.path.splitext(full_path)[0] + ".json"
+        with open(result["metadata"], "w", encoding="utf-8") as f:
+            json.dump(metadata, f, indent=2)
+    return result
@@ -0,0 +1,169 @@
+"""Keep-alive HTTP client for talking to ComfyUI.
+
+``urllib.request.urlopen`` opens (and tears down) a TCP connection for every
+call, which adds a handshake to each prompt submit, history poll and /view
+download. ``ConnectionPool`` keeps idle ``http.client`` connections per
+(scheme, host, port) and reuses them, retrying transient failures with
+exponential backoff. ``default_pool`` is shared by ``comfy.py`` and
+``scripts/comfyui/generate-assets.py``.
+"""
+import http.client
+import json
+import select
+import socket
+import threading
+import time
+import urllib.parse
+
+# Statuses worth retrying for idempotent requests (server busy / restarting).
+RETRY_STATUSES = (502, 503, 504)
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "DELETE")
+
+
+class HTTPError(Exception):
+    """Non-2xx response; ``body`` holds the raw response bytes."""
+
+    def __init__(self, url, code, reason, body=b""):
+        super().__init__(f"HTTP {code} {reason} for {url}")
+        self.url = url
+        self.code = code
+        self.reason = reason
+        self.body = body
+
+
+def _dropped(conn):
+    """Whether an idle keep-alive socket was closed (or spoke out of turn)."""
+    sock = conn.sock
+    if sock is None:
+        return False
+    try:
+        readable, _, _ = select.select([sock], [], [], 0)
+    except (OSError, ValueError):
+        return True
+    return bool(readable)
+
+
+class ConnectionPool:
+    def __init__(self, timeout=60.0, max_idle_per_host=8, retries=2, backoff=0.25):
+        self.timeout = timeout
+        self.max_idle_per_host = max_idle_per_host
+        self.retries = retries
+        self.backoff = backoff
+        self._idle = {}  # (scheme, host, port) -> [HTTPConnection]
+        self._lock = threading.Lock()
+
+    # ── Connections ──────────────────────────────────────────────────────
+
+    def _acquire(self, key, timeout):
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                conn = idle.pop() if idle else None
+            if conn is None:
+                break
+            if _dropped(conn):
+                conn.close()
+                continue
+            conn.timeout = timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn, True
+        scheme, host, port = key
+        cls = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        return cls(host, port, timeout=timeout), False
+
+    def _release(self, key, conn):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle_per_host:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+    # ── Requests ─────────────────────────────────────────────────────────
+
+    def request(self, method, url, body=None, headers=None, timeout=None):
+        """Send a request and return ``(status, reason, body_bytes)``.
+
+        Connection errors are retried with backoff when nothing can have
+        reached the server (refused, or a stale keep-alive socket failing
+        while the request is sent) or when the method is idempotent;
+        idempotent requests also retry RETRY_STATUSES. Other failures
+        propagate: a POST whose response was lost may have been acted on.
+        """
+        parsed = urllib.parse.urlsplit(url)
+        scheme = parsed.scheme or "http"
+        port = parsed.port or (443 if scheme == "https" else 80)
+        key = (scheme, parsed.hostname, port)
+        target = parsed.path or "/"
+        if parsed.query:
+            target += "?" + parsed.query
+        timeout = self.timeout if timeout is None else timeout
+        idempotent = method in IDEMPOTENT_METHODS
+
+        attempt = 0
+        while True:
+            conn, reused = self._acquire(key, timeout)
+            sent = False
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                    # Headers and body go out in separate writes; without
+                    # TCP_NODELAY, Nagle + delayed ACKs stall reused sockets.
+                    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                conn.request(method, target, body=body, headers=headers or {})
+                sent = True
+                resp = conn.getresponse()
+                data = resp.read()
+            except (ConnectionError, http.client.HTTPException, OSError) as e:
+                conn.close()
+                # A reused socket the server already closed that fails while
+                # the request is written was not processed: resend at once.
+                # Once the request is out, even RemoteDisconnected may follow
+                # a request the server acted on (e.g. a queued prompt), so
+                # that falls under the usual idempotency rules.
+                stale = reused and not sent and isinstance(e, (ConnectionResetError, BrokenPipeError))
+                if stale:
+                    continue
+                safe = idempotent or isinstance(e, ConnectionRefusedError)
+                if not safe or attempt >= self.retries:
+                    raise
+                attempt += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+                continue
+
+            if resp.will_close:
+                conn.close()
+            else:
+                self._release(key, conn)
+
+            if idempotent and resp.status in RETRY_STATUSES and attempt < self.retries:
+                attempt += 1
+                time.sleep(self.backoff * (2 ** (attempt - 1)))
+                continue
+            return resp.status, resp.reason, data
+
+    def get(self, url, timeout=None):
+        status, reason, data = self.request("GET", url, timeout=timeout)
+        if status >= 400:
+            raise HTTPError(url, status, reason, data)
+        return data
+
+    def post_json(self, url, payload, timeout=None):
+        body = json.dumps(payload).encode("utf-8")
+        status, reason, data = self.request(
+            "POST", url, body=body, headers={"Content-Type": "application/json"}, timeout=timeout
+        )
+        if status >= 400:
+            raise HTTPError(url, status, reason, data)
+        return json.loads(data.decode("utf-8")) if data else {}
+
+
+default_pool = ConnectionPool()
@@ -8,10 +8,10 @@ from .specs import SpecManager
 logger = logging.getLogger(__name__)
 
 class RequestImporter:
-    def __init__(self, root_dir):
+    def __init__(self, root_dir, spec_manager=None):
         self.root_dir = root_dir
         self.requests_dir = os.path.join(root_dir, "requests")
-        self.spec_manager = SpecManager(root_dir)
+        self.spec_manager = spec_manager or SpecManager(root_dir)
 
     def list_requests(self):
         """List all .md files in the requests directory."""
@@ -0,0 +1,283 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATES = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class JobCancelled(Exception):
+    """Raised by a job's progress callback once cancellation was requested."""
+
+
+class Job:
+    """A single generation request and everything reported about it."""
+
+    def __init__(self, config, notify=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.config = config
+        self.state = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.frames_done = 0
+        self.frames_total = None
+        self.frame_times = []
+        self.result = None
+        self.error = None
+        self.cancel_event = threading.Event()
+        self.group = None
+        self._last_mark = None
+        self._notify = notify
+
+    @property
+    def path(self):
+        return self.config.get("path")
+
+    def report_progress(self, done, total):
+        """Progress callback handed to the runner: ``done`` of ``total`` frames."""
+        now = time.time()
+        if done > self.frames_done and self._last_mark is not None:
+            self.frame_times.append(round(now - self._last_mark, 3))
+        self._last_mark = now
+        self.frames_done = done
+        self.frames_total = total
+        if self._notify:
+            self._notify(self)
+        if self.cancel_event.is_set():
+            raise JobCancelled()
+
+    def to_dict(self):
+        end = self.finished_at or time.time()
+        return {
+            "id": self.id,
+            "path": self.path,
+            "checkpoint": self.config.get("checkpoint"),
+            "state": self.state,
+            "progress": {
+                "done": self.frames_done,
+                "total": self.frames_total,
+                "frame_seconds": list(self.frame_times),
+            },
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "queued_seconds": round((self.started_at or end) - self.created_at, 3),
+            "run_seconds": round(end - self.started_at, 3) if self.started_at else None,
+            "output_path": (self.result or {}).get("path"),
+            "error": self.error,
+        }
+
+
+class JobManager:
+    """Runs generation jobs on a fixed pool of worker threads.
+
+    ``runner(config, progress)`` does the work and returns the generator's
+    result dict; ``progress(done, total)`` raises JobCancelled when the job
+    was cancelled so long runs stop between frames. ``on_finish(job)`` is
+    called after every job that leaves the running state; ``on_update(job)``
+    whenever anything reported about a job changes (state, progress or
+    queue position).
+
+    ``group_key(config)`` optionally names what a job needs loaded (e.g. its
+    checkpoint). Jobs of one group are queued back to back, and a job whose
+    group is running right now moves ahead, so the model is not swapped
+    between every job. At most ``max_group_run`` jobs join a group's run
+    ahead of older jobs, so other groups are delayed but never starved.
+    """
+
+    def __init__(self, runner, workers=2, max_history=200, on_finish=None, on_update=None,
+                 group_key=None, max_group_run=8):
+        self.runner = runner
+        self.workers = max(1, workers)
+        self.max_history = max_history
+        self.on_finish = on_finish
+        self.on_update = on_update
+        self.group_key = group_key
+        self.max_group_run = max(1, max_group_run)
+        self._jobs = OrderedDict()
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._threads = []
+        self._closed = False
+        self._running_group = None
+        self._group_streak = 0  # consecutive starts of _running_group
+
+    def start(self):
+        with self._cond:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def close(self, timeout=2.0):
+        with self._cond:
+            self._closed = True
+            for job in self._queue:
+                self._finish(job, CANCELLED)
+            self._queue.clear()
+            for job in self._jobs.values():
+                job.cancel_event.set()
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    # ── API ──────────────────────────────────────────────────────────────
+
+    def submit(self, config):
+        job = Job(config, notify=self._updated)
+        if self.group_key is not None:
+            try:
+                job.group = self.group_key(config)
+            except Exception as e:
+                print(f"Job group lookup failed: {e}")
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Job manager is shut down")
+            self._jobs[job.id] = job
+            position = self._enqueue(job)
+            behind = list(self._queue)[position + 1:]
+            self._prune()
+            self._cond.notify()
+        self._updated(job, *behind)
+        return job
+
+    def get(self, job_id):
+        with self._cond:
+            return self._jobs.get(job_id)
+
+    def list(self):
+        with self._cond:
+            return list(self._jobs.values())
+
+    def describe(self, job):
+        """``job.to_dict()`` plus its 1-based position in the queue (None once started)."""
+        data = job.to_dict()
+        with self._cond:
+            try:
+                data["queue_position"] = self._queue.index(job) + 1
+            except ValueError:
+                data["queue_position"] = None
+        return data
+
+    def cancel(self, job_id):
+        """Cancel a job. Queued jobs stop at once; running jobs after the current frame."""
+        with self._cond:
+            job = self._jobs.get(job_id)
+            if job is None or job.state in FINISHED_STATES:
+                return job
+            job.cancel_event.set()
+            dequeued = job.state == QUEUED
+            if dequeued:
+                behind = list(self._queue)[self._queue.index(job) + 1:]
+                self._queue.remove(job)
+                self._finish(job, CANCELLED)
+        if dequeued:
+            self._updated(job, *behind)
+            if self.on_finish:
+                self.on_finish(job)
+        return job
+
+    # ── Scheduling ───────────────────────────────────────────────────────
+
+    def _enqueue(self, job):
+        """Place ``job`` in the queue and return its index (caller holds the lock)."""
+        queue = self._queue
+        if job.group is not None:
+            last = next((i for i in range(len(queue) - 1, -1, -1) if queue[i].group == job.group), None)
+            if last is not None:
+                start = last
+                while start > 0 and queue[start - 1].group == job.group:
+                    start -= 1
+                run = last - start + 1
+                if start == 0 and job.group == self._running_group:
+                    run += self._group_streak
+                if run < self.max_group_run:
+                    queue.insert(last + 1, job)
+                    return last + 1
+            elif job.group == self._running_group and self._group_streak < self.max_group_run:
+                # Its model is loaded right now.
+                queue.appendleft(job)
+                return 0
+        queue.append(job)
+        return len(queue) - 1
+
+    # ── Workers ──────────────────────────────────────────────────────────
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                job = self._queue.popleft()
+                if job.group is not None and job.group == self._running_group:
+                    self._group_streak += 1
+                else:
+                    self._running_group = job.group
+                    self._group_streak = 1
+                job.state = RUNNING
+                job.started_at = time.time()
+                behind = list(self._queue)
+            # Everyone still queued moved up one place.
+            self._updated(job, *behind)
+            self._run(job)
+
+    def _run(self, job):
+        try:
+            result = self.runner(job.config, job.report_progress)
+        except JobCancelled:
+            state, result = CANCELLED, None
+        except Exception as e:
+            print(f"Job {job.id} failed: {e}")
+            state, result = FAILED, {"status": "error", "error": str(e)}
+        else:
+            if isinstance(result, dict) and result.get("status") == "success":
+                state = SUCCEEDED
+            elif job.cancel_event.is_set():
+                state = CANCELLED
+            else:
+                state = FAILED
+
+        with self._cond:
+            job.result = result
+            if state == FAILED:
+                job.error = (result or {}).get("error") or "Generation failed"
+            self._finish(job, state)
+        self._updated(job)
+        if self.on_finish:
+            try:
+                self.on_finish(job)
+            except Exception as e:
+                print(f"Job {job.id} finish hook failed: {e}")
+
+    def _updated(self, *jobs):
+        if not self.on_update:
+            return
+        for job in jobs:
+            try:
+                self.on_update(job)
+            except Exception as e:
+                print(f"Job {job.id} update hook failed: {e}")
+
+    def _finish(self, job, state):
+        job.state = state
+        job.finished_at = time.time()
+
+    def _prune(self):
+        # Keep the history bounded; only finished jobs are dropped.
+        excess = len(self._jobs) - self.max_history
+        if excess <= 0:
+            return
+        for job_id in [j.id for j in self._jobs.values() if j.state in FINISHED_STATES][:excess]:
+            del self._jobs[job_id]
@@ -0,0 +1,101 @@
+"""Append-only JSONL journal of a batch generation run.
+
+Every line is one event (``planned``, ``submitted``, ``completed``,
+``failed``) for a work item identified by a signature of its inputs and
+output path. Lines are flushed as they are written, so after a crash the
+journal says which items finished and which prompts ComfyUI may still be
+working on; ``replay`` folds it back into the latest state per item. A
+torn last line (crash mid-write) is ignored, and cut off before a resumed
+run appends to the file.
+"""
+import json
+import os
+import threading
+import time
+
+PLANNED = "planned"
+SUBMITTED = "submitted"
+COMPLETED = "completed"
+FAILED = "failed"
+
+
+def replay(path):
+    """``{sig: fields}`` with the fields of all of an item's events merged in order.
+
+    ``fields["event"]`` is the item's latest event other than a re-``planned``.
+    """
+    items = {}
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except OSError:
+        return items
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            sig = record.get("sig")
+            if not sig:
+                continue
+            item = items.setdefault(sig, {})
+            if record.get("event") == PLANNED and "event" in item:
+                # Re-planning on resume does not undo what already happened.
+                record = {k: v for k, v in record.items() if k not in ("event", "t")}
+            item.update(record)
+    return items
+
+
+def _cut_torn_tail(path, chunk=65536):
+    # Drop a partial last line so the next record starts on a line of its own.
+    try:
+        f = open(path, "rb+")
+    except OSError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+        pos = end
+        while pos > 0:
+            start = max(0, pos - chunk)
+            f.seek(start)
+            newline = f.read(pos - start).rfind(b"\n")
+            if newline >= 0:
+                f.truncate(start + newline + 1)
+                return
+            pos = start
+        f.truncate(0)
+
+
+class RunJournal:
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.items = replay(path) if resume else {}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        if resume:
+            _cut_torn_tail(path)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        self._lock = threading.Lock()
+
+    def state(self, sig):
+        """Latest merged record of ``sig`` from earlier runs (None if unknown)."""
+        return self.items.get(sig)
+
+    def record(self, event, sig, **fields):
+        record = {"t": round(time.time(), 3), "event": event, "sig": sig}
+        record.update(fields)
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if event == COMPLETED:
+                # Completed work is what --resume skips; make it durable.
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,130 @@
+"""Content-addressed cache of rendered images.
+
+A render is fully determined by the workflow plan (its content hash) and the
+values patched into it: prompts, size, seed, checkpoint and sampler settings.
+``result_key`` hashes those into a key and ``ResultCache`` stores the image
+bytes ComfyUI returned under ``<root>/<key[:2]>/<key>.png``, evicting the
+least recently used files once the total size exceeds ``max_bytes``. Used by
+``generator.generate_asset`` and ``scripts/comfyui/generate-assets.py`` to
+skip the GPU for repeat renders.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Bump when the meaning of the keyed inputs changes.
+KEY_VERSION = 1
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+SUFFIX = ".png"
+
+
+def result_key(plan_digest, **params):
+    """Hex SHA-256 of the plan digest and render inputs.
+
+    ``None`` values mean "leave the workflow's value", which the plan digest
+    already covers, so they are dropped.
+    """
+    material = {k: v for k, v in params.items() if v is not None}
+    material["_plan"] = plan_digest
+    material["_v"] = KEY_VERSION
+    encoded = json.dumps(material, sort_keys=True, separators=(",", ":")).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = None  # key -> size, least recently used first
+        self._total = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.root, key[:2], key + SUFFIX)
+
+    def _ensure_index(self):
+        # Built lazily (under the lock) from the files left by earlier runs.
+        if self._entries is not None:
+            return
+        found = []
+        try:
+            shards = [e for e in os.scandir(self.root) if e.is_dir()]
+        except OSError:
+            shards = []
+        for shard in shards:
+            try:
+                with os.scandir(shard.path) as it:
+                    for entry in it:
+                        if entry.name.endswith(SUFFIX):
+                            st = entry.stat()
+                            found.append((st.st_mtime_ns, entry.name[:-len(SUFFIX)], st.st_size))
+            except OSError:
+                continue
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total = sum(self._entries.values())
+
+    def get(self, key):
+        """Cached bytes for ``key``, or None."""
+        with self._lock:
+            self._ensure_index()
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            # mtime doubles as the recency order when the index is rebuilt.
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self._total -= self._entries.pop(key, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            print(f"Result cache write failed for {key}: {e}")
+            return
+        with self._lock:
+            self._ensure_index()
+            self._total -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total += len(data)
+            evicted = []
+            while self._total > self.max_bytes and len(self._entries) > 1:
+                old_key, size = self._entries.popitem(last=False)
+                self._total -= size
+                evicted.append(old_key)
+        for old_key in evicted:
+            try:
+                os.remove(self._path(old_key))
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            self._ensure_index()
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -12,28 +12,36 @@ sys.path.append(os.path.dirname(__file__))
 
 # Configuration
 PORT = 8002
+# Concurrent generation jobs; ComfyUI queues prompts itself, so a couple of
+# workers keep it busy without flooding it.
+JOB_WORKERS = 2
+# Seconds between keep-alive comments on idle /api/events streams
+EVENT_KEEPALIVE = 15
 FRONTEND_DIR = os.path.join(os.path.dirname(__file__), "../frontend/dist")
 # Ensure we serve from absolute path
 FRONTEND_DIR = os.path.abspath(FRONTEND_DIR)
 
-from . import specs
-from .importer import RequestImporter
+from .catalog import SpecCatalog
+from .entries import json_default
+from .jobs import JobManager
+from .events import CLOSED, EventBus
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
 
 class StudioHandler(http.server.SimpleHTTPRequestHandler):
     def __init__(self, *args, **kwargs):
-        # We need to setup managers before calling super because super calls do_GET/etc immediately
-        # But SimpleHTTPRequestHandler is an old style class in some versions, 
-        # actually standard way is to set server.importer and access via self.server if using ThreadingHTTPServer.
-        # But here we are just instantiating per request? No, Handler is instantiated per request.
-        # We should probably initialize managers globally or check if they are lightweight.
-        # SpecManager scans FS, so maybe lightweight enough.
-        repo_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"))
-        self.repo_root = repo_root
-        self.spec_manager = specs.SpecManager(repo_root)
-        self.specs = self.spec_manager
-        self.importer = RequestImporter(repo_root)
+        # Handlers are instantiated per request, so anything expensive (spec and
+        # index caches) lives on the server's SpecCatalog instead of here.
+        self.repo_root = REPO_ROOT
         super().__init__(*args, directory=FRONTEND_DIR, **kwargs)
 
+    @property
+    def specs(self):
+        return self.server.catalog
+
+    @property
+    def importer(self):
+        return self.server.catalog
 
     def api_list_files(self, query):
         from urllib.parse import parse_qs
@@ -116,12 +124,11 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
         self.send_json({"status": "active"})
 
     def api_list_checkpoints(self):
-        from . import specs
-        if hasattr(self, 'specs'):
-            manager = self.specs
-        else:
-            manager = specs.SpecManager(self.repo_root)
-        self.send_json({"checkpoints": manager.get_checkpoints()})
+        self.send_json({"checkpoints": self.specs.get_checkpoints()})
+
+    def api_comfy_backends(self):
+        from .generator import comfy_backends
+        self.send_json({"backends": comfy_backends().stats()})
 
     def api_system_info(self):
         info = {
@@ -172,41 +179,118 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
 
+    def _read_generate_request(self):
+        """Parse and validate a generation body; sends 400 and returns None if invalid."""
+        length = int(self.headers["Content-Length"])
+        config = json.loads(self.rfile.read(length))
+
+        path = config.get("path")
+        if not isinstance(path, str) or not path.strip():
+            self.send_error(400, "Missing or invalid 'path' in request body")
+            return None
+
+        # Guard against paths that resolve to current/parent dir (e.g. assets/free/.)
+        # which later cause PIL save errors like "unknown file extension: .".
+        norm = path.strip().replace("\\", "/").rstrip("/")
+        base = os.path.basename(norm)
+        if base in {".", "..", ""}:
+            self.send_error(400, f"Invalid output filename in path: '{path}'")
+            return None
+        return config
+
     def api_generate(self):
-        from .generator import generate_asset
+        """Blocking generation, kept for older clients; prefer POST /api/jobs."""
+        from .generator import find_workflow_path, generate_asset
         
-        length = int(self.headers["Content-Length"])
         try:
-            config = json.loads(self.rfile.read(length))
-            workflow_candidates = [
-                os.path.join(self.repo_root, "scripts", "comfyui", "workflow-api.json"),
-                os.path.join(self.repo_root, "scripts", "comfyui", "workflows", "assetgen_sdxl_api.json"),
-                os.path.join(self.repo_root, "scripts", "comfyui", "workflows", "assetgen_sdxl_api_pony.json"),
-            ]
-            workflow_path = next((p for p in workflow_candidates if os.path.exists(p)), None)
-            if not workflow_path:
-                raise FileNotFoundError(
-                    "No ComfyUI workflow file found. Tried: " + ", ".join(workflow_candidates)
-                )
-            
-            path = config.get("path")
-            if not isinstance(path, str) or not path.strip():
-                self.send_error(400, "Missing or invalid 'path' in request body")
+            config = self._read_generate_request()
+            if config is None:
                 return
+            workflow_path = find_workflow_path(self.repo_root)
+            result = generate_asset(config["path"], workflow_path, config=config)
+            self.specs.invalidate_assets()
+            self.send_json(result)
+        except Exception as e:
+            self.send_error(500, str(e))
 
-            # Guard against paths that resolve to current/parent dir (e.g. assets/free/.)
-            # which later cause PIL save errors like "unknown file extension: .".
-            norm = path.strip().replace("\\", "/").rstrip("/")
-            base = os.path.basename(norm)
-            if base in {".", "..", ""}:
-                self.send_error(400, f"Invalid output filename in path: '{path}'")
-                return
+    # ─────────────────────────────────────────────────────────────────────────
+    # Generation Jobs
+    # ─────────────────────────────────────────────────────────────────────────
 
-            result = generate_asset(path, workflow_path, config=config)
-            self.send_json(result)
+    def api_submit_job(self):
+        """POST /api/jobs — queue a generation and return its id immediately."""
+        try:
+            config = self._read_generate_request()
+            if config is None:
+                return
+            job = self.server.jobs.submit(config)
+            self.send_json({"job": self.server.jobs.describe(job)}, status=202)
         except Exception as e:
             self.send_error(500, str(e))
 
+    def api_list_jobs(self):
+        jobs = [self.server.jobs.describe(job) for job in self.server.jobs.list()]
+        self.send_json({"jobs": jobs})
+
+    def api_get_job(self, job_id):
+        job = self.server.jobs.get(job_id)
+        if job is None:
+            self.send_error(404, f"Job '{job_id}' not found")
+            return
+        self.send_json({"job": self.server.jobs.describe(job)})
+
+    def api_cancel_job(self, job_id):
+        job = self.server.jobs.cancel(job_id)
+        if job is None:
+            self.send_error(404, f"Job '{job_id}' not found")
+            return
+        self.send_json({"job": self.server.jobs.describe(job)})
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Event Stream
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def api_events(self):
+        """GET /api/events — Server-Sent Events.
+
+        Event types:
+          job      job state/progress (same shape as GET /api/jobs/<id>)
+          catalog  {"specs", "added", "removed", "truncated"} after spec or asset changes
+          indexes  {"indexes": [...]} fresh index summaries after a catalog change
+          reset    the stream could not be resumed; refetch everything
+        """
+        last_event_id = self.headers.get("Last-Event-ID")
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            last_event_id = None
+
+        bus = self.server.events
+        sub = bus.subscribe(last_event_id)
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(b"retry: 3000\n\n")
+            self.wfile.flush()
+            while True:
+                event = sub.get(timeout=EVENT_KEEPALIVE)
+                if event is CLOSED:
+                    break
+                # Comment lines keep proxies and dead-peer detection happy.
+                self.wfile.write(event.encode() if event is not None else b": keepalive\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            bus.unsubscribe(sub)
+        self.close_connection = True
+
+    @staticmethod
+    def _job_id(path):
+        return path.split("?", 1)[0][len("/api/jobs/"):].strip("/")
+
     def api_import_request(self):
         try:
             length = int(self.headers.get('content-length', 0))
@@ -249,7 +333,17 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error(500, str(e))
 
     def api_get_index(self, query):
-        """Get a specific expanded index by ID."""
+        """Get a specific expanded index by ID.
+
+        Optional query parameters (pushed down into the expansion):
+          where=<var>=<v1>,<v2>   (repeatable; ':' also accepted as separator)
+          status=generated,planned
+          compositeType=<a>,<b>
+          source_entry_id=<a>,<b>
+          limit=<n>&offset=<n>
+          fields=id,path,status
+          raw=0                   (omit raw_entries)
+        """
         from urllib.parse import parse_qs
         try:
             params = parse_qs(query)
@@ -258,8 +352,14 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
             if not index_id:
                 self.send_error(400, "Missing index id parameter")
                 return
+
+            try:
+                index_query = self._parse_index_query(params)
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
             
-            expanded = self.specs.get_expanded_index(index_id)
+            expanded = self.specs.get_expanded_index(index_id, **index_query)
             if not expanded:
                 self.send_error(404, f"Index '{index_id}' not found")
                 return
@@ -268,6 +368,44 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
 
+    @staticmethod
+    def _parse_index_query(params):
+        def csv(name):
+            values = []
+            for raw in params.get(name, []):
+                values.extend(v.strip() for v in raw.split(",") if v.strip())
+            return values or None
+
+        def non_negative_int(name):
+            raw = params.get(name, [None])[0]
+            if raw in (None, ""):
+                return None
+            if not raw.isdigit():
+                raise ValueError(f"Invalid '{name}' parameter: {raw}")
+            return int(raw)
+
+        where = {}
+        for clause in params.get("where", []):
+            sep = "=" if "=" in clause else ":"
+            var, _, values = clause.partition(sep)
+            var = var.strip()
+            if not var or not values:
+                raise ValueError(f"Invalid 'where' clause: {clause}")
+            where.setdefault(var, []).extend(v.strip() for v in values.split(",") if v.strip())
+
+        query = {
+            "where": where or None,
+            "status": csv("status"),
+            "composite_type": csv("compositeType"),
+            "source_entry_id": csv("source_entry_id"),
+            "limit": non_negative_int("limit"),
+            "offset": non_negative_int("offset"),
+            "fields": csv("fields"),
+        }
+        if params.get("raw", ["1"])[0] in ("0", "false", "no"):
+            query["include_raw"] = False
+        return query
+
     def api_get_index_lists(self, query):
         """Get just the lists from an index (for UI dropdowns)."""
         from urllib.parse import parse_qs
@@ -360,11 +498,13 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             self.send_error(500, str(e))
 
-    def send_json(self, data):
-        self.send_response(200)
+    def send_json(self, data, status=200):
+        self.send_response(status)
         self.send_header("Content-type", "application/json")
         self.end_headers()
-        self.wfile.write(json.dumps(data).encode("utf-8"))
+        # Expanded index items are compact objects; json_default turns them
+        # into dicts only here.
+        self.wfile.write(json.dumps(data, default=json_default).encode("utf-8"))
 
     def serve_asset_file(self):
         # Serve from repo root assets directory
@@ -403,6 +543,8 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
             self.api_save_config()
         elif self.path.startswith("/api/generate"):
             self.api_generate()
+        elif self.path.split("?", 1)[0].rstrip("/") == "/api/jobs":
+            self.api_submit_job()
         elif self.path.startswith("/api/specs"):
              self.api_save_spec()
         elif self.path.startswith("/api/import-request"):
@@ -412,6 +554,12 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
         else:
             self.send_error(404, "Not Found")
 
+    def do_DELETE(self):
+        if self.path.startswith("/api/jobs/") and self._job_id(self.path):
+            self.api_cancel_job(self._job_id(self.path))
+        else:
+            self.send_error(404, "Not Found")
+
     def do_GET(self):
         if self.path.startswith("/assets/"):
             self.serve_asset_file()
@@ -439,6 +587,14 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
              self.api_list_requests()
         elif self.path.startswith("/api/checkpoints"):
              self.api_list_checkpoints()
+        elif self.path.split("?", 1)[0] == "/api/comfy/backends":
+            self.api_comfy_backends()
+        elif self.path.split("?", 1)[0] == "/api/events":
+            self.api_events()
+        elif self.path.startswith("/api/jobs/") and self._job_id(self.path):
+            self.api_get_job(self._job_id(self.path))
+        elif self.path.split("?", 1)[0].rstrip("/") == "/api/jobs":
+            self.api_list_jobs()
         elif self.path.startswith("/api/manifest"):
              self.api_serve_manifest()
         elif self.path.startswith("/api/context"):
@@ -458,6 +614,16 @@ class StudioHandler(http.server.SimpleHTTPRequestHandler):
         else:
             self.serve_react_app()
 
+def run_generation_job(config, progress):
+    from .generator import find_workflow_path, generate_asset
+    return generate_asset(config["path"], find_workflow_path(REPO_ROOT), config=config,
+                          progress=progress)
+
+def generation_job_group(config):
+    # Jobs needing the same checkpoint/VAE run back to back (fewer model swaps).
+    from .generator import checkpoint_group, find_workflow_path
+    return checkpoint_group(config, find_workflow_path(REPO_ROOT))
+
 def run_server():
     print(f"Starting Asset Studio at http://localhost:{PORT}")
 
@@ -466,10 +632,29 @@ def run_server():
         daemon_threads = True
 
     with ReusableThreadingTCPServer(("", PORT), StudioHandler) as httpd:
+        # One catalog per process: shared by all handler threads.
+        httpd.events = EventBus()
+
+        def publish_catalog_change(change):
+            httpd.events.publish("catalog", change)
+            if httpd.events.has_subscribers:
+                httpd.events.publish("indexes", {"indexes": httpd.catalog.list_all_indexes()})
+
+        httpd.catalog = SpecCatalog(REPO_ROOT, on_change=publish_catalog_change)
+        httpd.catalog.start_watcher()
+        httpd.jobs = JobManager(run_generation_job, workers=JOB_WORKERS,
+                                group_key=generation_job_group,
+                                on_finish=lambda job: httpd.catalog.invalidate_assets(),
+                                on_update=lambda job: httpd.events.publish("job", httpd.jobs.describe(job)))
+        httpd.jobs.start()
         try:
             httpd.serve_forever()
         except KeyboardInterrupt:
             pass
+        finally:
+            httpd.events.close()
+            httpd.jobs.close()
+            httpd.catalog.close()
 
 if __name__ == "__main__":
     run_server()
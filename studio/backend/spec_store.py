@@ -0,0 +1,132 @@
+import os
+import json
+import sqlite3
+import threading
+
+from .statcache import load_json, scan_tree
+
+SCHEMA_VERSION = 1
+# Seconds to wait for another process (e.g. generate-pixi-kit) holding the
+# write lock before sqlite3.OperationalError "database is locked".
+BUSY_TIMEOUT_S = 5.0
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS specs (
+    rel_path   TEXT PRIMARY KEY,
+    mtime_ns   INTEGER NOT NULL,
+    size       INTEGER NOT NULL,
+    listed     INTEGER NOT NULL DEFAULT 0,
+    asset_path TEXT,
+    doc        TEXT
+);
+CREATE INDEX IF NOT EXISTS specs_listed ON specs (listed, rel_path);
+"""
+
+
+def is_listed_spec(spec):
+    """Asset specs plus the project config; indexes and helper docs are skipped."""
+    if not isinstance(spec, dict):
+        return False
+    return bool(spec.get("path")) or spec.get("type") == "config" or spec.get("id") == "project-style"
+
+
+class SpecStore:
+    """On-disk catalog of the JSON specs under ``database/specs``.
+
+    Each row is keyed by the spec path relative to the specs directory and
+    carries the file's (mtime_ns, size) fingerprint, so ``sync`` only re-parses
+    files that actually changed and listing is a single indexed query.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+        # Shared between the server's handler threads; access is serialized
+        # through our own lock.
+        self._conn = sqlite3.connect(db_path, timeout=BUSY_TIMEOUT_S, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.executescript("DROP TABLE IF EXISTS specs;")
+                self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+            self._conn.executescript(SCHEMA)
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def sync(self, specs_dir):
+        """Bring the catalog up to date with ``specs_dir``.
+
+        Returns ``(changed, removed)`` counts. Raises sqlite3.OperationalError
+        when another writer keeps the database locked past BUSY_TIMEOUT_S; the
+        catalog then still holds the last synced rows.
+        """
+        on_disk = scan_tree(specs_dir, ".json")
+
+        with self._lock:
+            known = {
+                rel_path: (mtime_ns, size)
+                for rel_path, mtime_ns, size in self._conn.execute(
+                    "SELECT rel_path, mtime_ns, size FROM specs"
+                )
+            }
+
+            upserts = []
+            seen = set()
+            for filepath, fingerprint in on_disk.items():
+                rel_path = os.path.relpath(filepath, specs_dir)
+                seen.add(rel_path)
+                if known.get(rel_path) == fingerprint:
+                    continue
+                doc = None
+                listed = 0
+                asset_path = None
+                try:
+                    spec = load_json(filepath)
+                    doc = json.dumps(spec)
+                    listed = 1 if is_listed_spec(spec) else 0
+                    if isinstance(spec, dict):
+                        asset_path = spec.get("path")
+                except Exception as e:
+                    # Keep the fingerprint so a broken file is not re-read on every sync.
+                    print(f"Error loading spec {filepath}: {e}")
+                upserts.append((rel_path, fingerprint[0], fingerprint[1], listed, asset_path, doc))
+
+            removed = [(rel_path,) for rel_path in known if rel_path not in seen]
+
+            try:
+                if upserts:
+                    self._conn.executemany(
+                        "INSERT OR REPLACE INTO specs (rel_path, mtime_ns, size, listed, asset_path, doc) "
+                        "VALUES (?, ?, ?, ?, ?, ?)",
+                        upserts,
+                    )
+                if removed:
+                    self._conn.executemany("DELETE FROM specs WHERE rel_path = ?", removed)
+                if upserts or removed:
+                    self._conn.commit()
+            except sqlite3.OperationalError:
+                self._conn.rollback()
+                raise
+
+        return len(upserts), len(removed)
+
+    def list_specs(self):
+        """Return ``(rel_path, spec)`` pairs for listed specs, ordered by path."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rel_path, doc FROM specs WHERE listed = 1 ORDER BY rel_path"
+            ).fetchall()
+        return [(rel_path, json.loads(doc)) for rel_path, doc in rows]
+
+    def documents(self):
+        """Return ``(rel_path, document)`` for every parseable JSON file."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT rel_path, doc FROM specs WHERE doc IS NOT NULL ORDER BY rel_path"
+            ).fetchall()
+        return [(rel_path, json.loads(doc)) for rel_path, doc in rows]
@@ -1,59 +1,103 @@
 import os
 import json
-import glob
 import uuid
 import subprocess
 import shutil
 import zipfile
-import itertools
+import re
+import bisect
+import posixpath
+import sqlite3
 from datetime import datetime
 
+from .spec_store import SpecStore, is_listed_spec
+from .statcache import DirSnapshot, StatCache, list_tree, scan_tree
+from .patterns import PATTERN_VAR_RE, ExpansionPlan, plan_cache
+from .entries import EntryTemplate, ExpandedEntry
+
 class SpecManager:
     def __init__(self, root_dir):
         self.root_dir = root_dir
         self.specs_dir = os.path.join(root_dir, "database", "specs")
         self.assets_dir = os.path.join(root_dir, "assets")
+        self.catalog_db_path = os.path.join(root_dir, "database", "spec-catalog.sqlite3")
         self._indexes_cache = None
+        self._store = None
+        self._json_cache = StatCache()
+        self._assets_snapshot = DirSnapshot(self.assets_dir)
         self.ensure_dirs()
 
     def ensure_dirs(self):
         os.makedirs(self.specs_dir, exist_ok=True)
         os.makedirs(self.assets_dir, exist_ok=True)
 
+    def invalidate(self):
+        """Forget cached index data so the next access re-reads from disk."""
+        self._indexes_cache = None
+
+    # ─────────────────────────────────────────────────────────────────────────
+    # Asset existence (one snapshot of assets/ instead of a stat per asset)
+    # ─────────────────────────────────────────────────────────────────────────
+
+    def asset_snapshot(self):
+        """Refreshed snapshot of the assets directory (re-lists changed dirs only)."""
+        return self._assets_snapshot.refresh()
+
+    def asset_exists(self, path, snapshot=None):
+        """os.path.exists for a repo-relative path, answered from the snapshot.
+
+        Paths outside assets/ (or absolute ones) fall back to a real stat.
+        """
+        rel = posixpath.normpath(path.replace('\\', '/'))
+        if rel.startswith('assets/') and not os.path.isabs(path):
+            if snapshot is None:
+                snapshot = self.asset_snapshot()
+            return snapshot.exists(rel[len('assets/'):])
+        return os.path.exists(os.path.join(self.root_dir, path))
+
     # ─────────────────────────────────────────────────────────────────────────
     # Index File Support (zelos-asset-index.json, zelos-audio-index.json, etc.)
     # ─────────────────────────────────────────────────────────────────────────
 
     def get_index_files(self):
         """Find all *-index.json files in the specs directory."""
-        index_files = []
-        pattern = os.path.join(self.specs_dir, "**", "*-index.json")
-        for f in glob.glob(pattern, recursive=True):
-            index_files.append(f)
-        return index_files
+        return sorted(scan_tree(self.specs_dir, "-index.json"))
 
     def load_indexes(self, force=False):
-        """Load and cache all index files."""
+        """Load and cache all index files.
+
+        Re-loading is a stat sweep: only index files whose (mtime, size)
+        changed since the last load are parsed again.
+        """
         if self._indexes_cache is not None and not force:
             return self._indexes_cache
 
         indexes = {}
-        for filepath in self.get_index_files():
-            try:
-                with open(filepath, 'r', encoding='utf-8-sig') as f:
-                    data = json.load(f)
-                    name = os.path.basename(filepath).replace('.json', '')
-                    data['_source_file'] = filepath
-                    data['_index_id'] = name
-                    indexes[name] = data
-            except Exception as e:
-                print(f"Error loading index {filepath}: {e}")
+        for filepath, data in sorted(self._json_cache.sweep(self.specs_dir, "-index.json").items()):
+            if not isinstance(data, dict):
+                print(f"Error loading index {filepath}: not a JSON object")
+                continue
+            name = os.path.basename(filepath).replace('.json', '')
+            # A copy: the parsed object is shared by every sweep of the cache.
+            data = dict(data, _source_file=filepath, _index_id=name)
+            indexes[name] = data
 
         self._indexes_cache = indexes
         return indexes
 
     def expand_index_entry(self, entry, lists, root="", animation_types=None, composite_types=None):
         """Expand a single index entry using its vars and the lists definitions."""
+        return list(self.iter_index_entry(entry, lists, root, animation_types, composite_types))
+
+    def iter_index_entry(self, entry, lists, root="", animation_types=None, composite_types=None,
+                         value_overrides=None, cache_key=None):
+        """Lazily expand an index entry.
+
+        ``value_overrides`` maps var names to the (already filtered) values to
+        use instead of the full list, so filters prune the cartesian product
+        before any combination is generated. ``cache_key`` identifies the
+        index file version so the compiled plan can be reused.
+        """
         entry_type = entry.get('type')
         
         # Helper to build animation config from entry or type reference
@@ -101,96 +145,54 @@ class SpecManager:
             if root and not path.startswith('/'):
                 path = f"{root}/{path}"
             
-            result = {
-                'id': entry.get('id'),
-                'name': os.path.basename(path).replace('.png', '').replace('.wav', '').replace('.ogg', '').replace('.mp4', ''),
-                'path': path,
-                'format': entry.get('format', 'png'),
-                'size': entry.get('size'),
-                'status': entry.get('status', 'planned'),
-                'source_entry_id': entry.get('id'),
-                'type': 'file'
-            }
-            
-            # Add animation config if present
-            anim_config = get_animation_config(entry)
-            if anim_config:
-                result['animation'] = anim_config
-            
-            # Add composite config if present
-            comp_config = get_composite_config(entry)
-            if comp_config:
-                result['composite'] = comp_config
-                
-            return [result]
+            template = EntryTemplate(entry, 'file',
+                                     animation=get_animation_config(entry),
+                                     composite=get_composite_config(entry))
+            yield ExpandedEntry(template, path, entry_id=entry.get('id'))
         
         elif entry_type == 'pattern':
             # Pattern entry - expand using vars
             pattern = entry.get('pattern', '')
             vars_def = entry.get('vars', {})
             
-            # Get all variable values from lists
-            var_names = list(vars_def.keys())
-            var_values = []
-            for var_name in var_names:
-                list_key = vars_def[var_name]
-                values = lists.get(list_key, [])
-                var_values.append(values)
-            
-            if not var_values:
-                return []
+            # Resolve var values once into a compiled expansion plan; cached
+            # per (index fingerprint, entry id) unless filters override values.
+            def build_plan():
+                return ExpansionPlan.from_entry(pattern, vars_def, lists, value_overrides)
+
+            if cache_key is not None and not value_overrides:
+                plan = plan_cache.get((cache_key, entry.get('id'), pattern), build_plan)
+            else:
+                plan = build_plan()
+            var_names = plan.var_names
             
-            # Get animation config from entry (shared by all expanded items)
-            base_anim_config = get_animation_config(entry)
+            if not var_names:
+                return
             
-            # Get composite config from entry (shared by all expanded items)
-            base_comp_config = get_composite_config(entry)
+            # Animation/composite configs are built once and shared (read-only)
+            # by every expanded item.
+            template = EntryTemplate(entry, 'pattern-expanded', var_names,
+                                     animation=get_animation_config(entry),
+                                     composite=get_composite_config(entry))
             
             # Generate all combinations
-            expanded = []
-            for combo in itertools.product(*var_values):
-                path = pattern
-                var_dict = {}
-                for i, var_name in enumerate(var_names):
-                    path = path.replace(f"{{{var_name}}}", combo[i])
-                    var_dict[var_name] = combo[i]
-                
+            for path, combo in plan:
                 if root and not path.startswith('/'):
                     path = f"{root}/{path}"
-                
-                # Generate a unique ID from the path
-                asset_id = path.replace('/', '-').replace('.', '-').replace('{', '').replace('}', '')
-                
-                item = {
-                    'id': asset_id,
-                    'name': os.path.basename(path).replace('.png', '').replace('.wav', '').replace('.ogg', '').replace('.mp4', ''),
-                    'path': path,
-                    'format': entry.get('format', 'png'),
-                    'size': entry.get('size'),
-                    'status': entry.get('status', 'planned'),
-                    'source_entry_id': entry.get('id'),
-                    'vars': var_dict,
-                    'type': 'pattern-expanded'
-                }
-                
-                # Add animation config if present
-                if base_anim_config:
-                    item['animation'] = base_anim_config.copy()
-                
-                # Add composite config if present
-                if base_comp_config:
-                    item['composite'] = base_comp_config.copy()
-                
-                expanded.append(item)
-            
-            return expanded
-            
-            return expanded
-        
-        return []
+                yield ExpandedEntry(template, path, combo)
+
+    def get_expanded_index(self, index_id, where=None, status=None, composite_type=None,
+                           source_entry_id=None, limit=None, offset=0, fields=None, include_raw=True):
+        """Get an expanded index with all patterns resolved.
 
-    def get_expanded_index(self, index_id):
-        """Get a fully expanded index with all patterns resolved."""
+        Optional filters are pushed down into the expansion:
+        - ``where``: {var: [allowed values]}; each pattern var's list is pruned
+          before the cartesian product is built, and items lacking a filtered
+          var are excluded.
+        - ``status``, ``composite_type``, ``source_entry_id``: allowed values.
+        - ``limit``/``offset`` page the matches (stats still cover all matches).
+        - ``fields`` projects each returned item to the given keys.
+        """
         indexes = self.load_indexes()
         index_data = indexes.get(index_id)
         if not index_data:
@@ -201,19 +203,55 @@ class SpecManager:
         entries = index_data.get('entries', [])
         animation_types = index_data.get('animationTypes', {})
         composite_types = index_data.get('compositeTypes', {})
+
+        where = {var: set(values) for var, values in (where or {}).items()}
+        status = set(status) if status else None
+        composite_type = set(composite_type) if composite_type else None
+        source_entry_id = set(source_entry_id) if source_entry_id else None
+        offset = offset or 0
         
+        source_file = index_data.get('_source_file')
+        cache_key = (source_file, self._json_cache.fingerprint(source_file)) if source_file else None
+
+        snapshot = self.asset_snapshot()
         expanded_entries = []
+        matched = 0
+        generated = 0
         for entry in entries:
-            expanded = self.expand_index_entry(entry, lists, root, animation_types, composite_types)
-            for item in expanded:
+            if source_entry_id is not None and entry.get('id') not in source_entry_id:
+                continue
+            if composite_type is not None and entry.get('compositeType') not in composite_type:
+                continue
+
+            value_overrides = None
+            if where:
+                vars_def = entry.get('vars', {}) if entry.get('type') == 'pattern' else {}
+                if not all(var in vars_def for var in where):
+                    continue
+                value_overrides = {
+                    var: [v for v in lists.get(vars_def[var], []) if v in allowed]
+                    for var, allowed in where.items()
+                }
+
+            for item in self.iter_index_entry(entry, lists, root, animation_types, composite_types,
+                                              value_overrides, cache_key):
                 # Check if file exists
-                full_path = os.path.join(self.root_dir, item['path'])
-                item['exists'] = os.path.exists(full_path)
-                if item['exists']:
-                    item['status'] = 'generated'
-            expanded_entries.extend(expanded)
+                item.exists = self.asset_exists(item.path, snapshot)
+                if item.exists:
+                    item.status = 'generated'
+                if status is not None and item.status not in status:
+                    continue
+
+                matched += 1
+                if item.exists:
+                    generated += 1
+                if matched <= offset or (limit is not None and matched > offset + limit):
+                    continue
+                if fields:
+                    item = item.to_dict(fields)
+                expanded_entries.append(item)
         
-        return {
+        result = {
             'id': index_id,
             'version': index_data.get('version', 1),
             'root': root,
@@ -221,57 +259,236 @@ class SpecManager:
             'animationTypes': animation_types,
             'compositeTypes': composite_types,
             'entries': expanded_entries,
-            'raw_entries': entries,
             'stats': {
-                'total': len(expanded_entries),
-                'generated': len([e for e in expanded_entries if e.get('exists')]),
-                'planned': len([e for e in expanded_entries if not e.get('exists')])
+                'total': matched,
+                'generated': generated,
+                'planned': matched - generated
             }
         }
+        if include_raw:
+            result['raw_entries'] = entries
+        if limit is not None or offset:
+            result['page'] = {'offset': offset, 'limit': limit, 'returned': len(expanded_entries)}
+        return result
 
     def list_all_indexes(self):
         """List all available indexes with summary stats."""
         indexes = self.load_indexes()
         summaries = []
+        listings = {}
         
         for index_id, data in indexes.items():
-            expanded = self.get_expanded_index(index_id)
+            expanded_count, generated_count = self._count_index(data, listings)
             summaries.append({
                 'id': index_id,
                 'version': data.get('version', 1),
                 'root': data.get('root', ''),
                 'list_count': len(data.get('lists', {})),
                 'entry_count': len(data.get('entries', [])),
-                'expanded_count': expanded['stats']['total'] if expanded else 0,
-                'generated_count': expanded['stats']['generated'] if expanded else 0,
+                'expanded_count': expanded_count,
+                'generated_count': generated_count,
                 'source_file': data.get('_source_file', '')
             })
         
         return summaries
 
+    def _list_files(self, rel_dir):
+        """Sorted repo-relative ('/'-separated) paths of all files under rel_dir."""
+        rel_dir = posixpath.normpath(rel_dir.replace('\\', '/')) if rel_dir else ''
+        if rel_dir == 'assets' or rel_dir.startswith('assets/'):
+            files = self.asset_snapshot().sorted_files()
+            prefix = rel_dir[len('assets/'):] + '/' if rel_dir != 'assets' else ''
+            start = bisect.bisect_left(files, prefix)
+            listed = []
+            for i in range(start, len(files)):
+                if not files[i].startswith(prefix):
+                    break
+                listed.append('assets/' + files[i])
+            return listed
+
+        base = os.path.join(self.root_dir, rel_dir) if rel_dir else self.root_dir
+        files = []
+        for path in list_tree(base):
+            files.append(os.path.relpath(path, self.root_dir).replace(os.sep, '/'))
+        files.sort()
+        return files
+
+    def _count_index(self, index_data, listings=None):
+        """Return (expanded, generated) totals for an index without expanding it.
+
+        Totals are products of list lengths. Generated counts come from one
+        listing of the index root: each pattern entry is compiled to a regex
+        and only files sharing its literal prefix are tested.
+        """
+        lists = index_data.get('lists', {})
+        root = index_data.get('root', '')
+        if listings is None:
+            listings = {}
+        files = listings.get(root)
+        file_set = None
+
+        expanded_count = 0
+        generated_count = 0
+        for entry in index_data.get('entries', []):
+            entry_type = entry.get('type')
+            if entry_type == 'file':
+                path = entry.get('path', '')
+                if root and not path.startswith('/'):
+                    path = f"{root}/{path}"
+                expanded_count += 1
+                if path.startswith('/'):
+                    generated_count += os.path.exists(os.path.join(self.root_dir, path))
+                    continue
+                if file_set is None:
+                    if files is None:
+                        files = listings[root] = self._list_files(root)
+                    file_set = set(files)
+                generated_count += path in file_set
+            elif entry_type == 'pattern':
+                vars_def = entry.get('vars', {})
+                if not vars_def:
+                    continue
+                sizes = {name: len(lists.get(key, [])) for name, key in vars_def.items()}
+                total = 1
+                for size in sizes.values():
+                    total *= size
+                if not total:
+                    continue
+                expanded_count += total
+
+                pattern = entry.get('pattern', '')
+                if root and not pattern.startswith('/'):
+                    pattern = f"{root}/{pattern}"
+                if pattern.startswith('/'):
+                    expanded = self.expand_index_entry(entry, lists, root)
+                    generated_count += sum(
+                        os.path.exists(os.path.join(self.root_dir, item.path)) for item in expanded
+                    )
+                    continue
+
+                regex, used_vars, prefix = self._compile_pattern_matcher(pattern, vars_def, lists)
+                # Vars missing from the pattern still multiply the expansion
+                # (every combination repeats the same path).
+                repeat = 1
+                for name, size in sizes.items():
+                    if name not in used_vars:
+                        repeat *= size
+
+                if files is None:
+                    files = listings[root] = self._list_files(root)
+                start = bisect.bisect_left(files, prefix)
+                matches = 0
+                for i in range(start, len(files)):
+                    candidate = files[i]
+                    if not candidate.startswith(prefix):
+                        break
+                    if regex.fullmatch(candidate):
+                        matches += 1
+                generated_count += matches * repeat
+
+        return expanded_count, generated_count
+
+    @staticmethod
+    def _compile_pattern_matcher(pattern, vars_def, lists):
+        """Compile a pattern into (regex, vars used, literal prefix)."""
+        parts = []
+        groups = {}
+        pos = 0
+        prefix = None
+        for m in PATTERN_VAR_RE.finditer(pattern):
+            name = m.group(1)
+            parts.append(re.escape(pattern[pos:m.start()]))
+            if name not in vars_def:
+                parts.append(re.escape(m.group(0)))
+            else:
+                if prefix is None:
+                    prefix = pattern[:m.start()]
+                if name in groups:
+                    parts.append(f"(?P={groups[name]})")
+                else:
+                    groups[name] = f"v{len(groups)}"
+                    # Longest first so alternation prefers the most specific value.
+                    values = sorted(lists.get(vars_def[name], []), key=len, reverse=True)
+                    alternatives = '|'.join(re.escape(v) for v in values)
+                    parts.append(f"(?P<{groups[name]}>{alternatives})")
+            pos = m.end()
+        parts.append(re.escape(pattern[pos:]))
+        if prefix is None:
+            prefix = pattern
+        return re.compile(''.join(parts)), set(groups), prefix
+
+    def _get_store(self):
+        """Open the SQLite spec catalog lazily; None if it cannot be used."""
+        if self._store is None:
+            try:
+                self._store = SpecStore(self.catalog_db_path)
+            except sqlite3.Error as e:
+                print(f"Spec catalog unavailable ({self.catalog_db_path}): {e}")
+                self._store = False
+        return self._store or None
+
     def list_specs(self):
-        specs = []
         if not os.path.exists(self.specs_dir):
-            return specs
-            
-        # Use recursive glob to find specs in subdirectories (like specs/zelos/)
-        search_pattern = os.path.join(self.specs_dir, "**", "*.json")
-        for file in glob.glob(search_pattern, recursive=True):
-            try:
-                with open(file, 'r', encoding='utf-8-sig') as f:
-                    spec = json.load(f)
-                    # Ignore non-asset specs (indexes, helper docs) except config
-                    if not spec.get("path") and spec.get("type") != "config" and spec.get("id") != "project-style":
-                        continue
-                    # Add status check
-                    spec['status'] = self.check_status(spec)
-                    # Add relative path for saving back to same location
-                    spec['_rel_path'] = os.path.relpath(file, self.specs_dir)
-                    specs.append(spec)
-            except Exception as e:
-                print(f"Error loading spec {file}: {e}")
+            return []
+
+        store = self._get_store()
+        if store is None:
+            return self._scan_specs()
+
+        # Incremental: only files whose (mtime, size) changed are re-parsed.
+        try:
+            store.sync(self.specs_dir)
+        except sqlite3.OperationalError as e:
+            # e.g. "database is locked" while generate-pixi-kit writes the
+            # catalog: serve the rows of the last successful sync.
+            print(f"Spec catalog sync skipped: {e}")
+        try:
+            rows = store.list_specs()
+        except sqlite3.OperationalError as e:
+            print(f"Spec catalog unreadable, scanning files: {e}")
+            return self._scan_specs()
+        snapshot = self.asset_snapshot()
+        specs = []
+        for rel_path, spec in rows:
+            spec['status'] = self.check_status(spec, snapshot)
+            spec['_rel_path'] = rel_path
+            specs.append(spec)
+        return specs
+
+    def _scan_specs(self):
+        """Fallback when the catalog is unavailable: in-memory stat cache."""
+        snapshot = self.asset_snapshot()
+        specs = []
+        for file, spec in sorted(self._json_cache.sweep(self.specs_dir, ".json").items()):
+            # Ignore non-asset specs (indexes, helper docs) except config
+            if not is_listed_spec(spec):
+                continue
+            spec = dict(spec)
+            spec['status'] = self.check_status(spec, snapshot)
+            # Add relative path for saving back to same location
+            spec['_rel_path'] = os.path.relpath(file, self.specs_dir)
+            specs.append(spec)
         return specs
 
+    def iter_spec_documents(self):
+        """Yield every parsed JSON document under database/specs.
+
+        This includes indexes and helper sheets, not just listed asset specs;
+        the kit generator reads them through here so repeated runs only
+        re-parse files that changed.
+        """
+        store = self._get_store()
+        if store is None:
+            for _, doc in sorted(self._json_cache.sweep(self.specs_dir, ".json").items()):
+                yield doc
+            return
+        try:
+            store.sync(self.specs_dir)
+        except sqlite3.OperationalError as e:
+            print(f"Spec catalog sync skipped: {e}")
+        for _, doc in store.documents():
+            yield doc
+
     def save_spec(self, data):
         if not data.get('id'):
             data['id'] = str(uuid.uuid4())
@@ -291,13 +508,12 @@ class SpecManager:
             
         return data
 
-    def check_status(self, spec):
+    def check_status(self, spec, snapshot=None):
         # Check if asset exists at targeted path
         if not spec.get('path'):
             return "planned"
             
-        full_path = os.path.join(self.root_dir, spec['path'])
-        if os.path.exists(full_path):
+        if self.asset_exists(spec['path'], snapshot):
             return "generated"
         return "planned"
 
@@ -313,9 +529,11 @@ class SpecManager:
             {"id": "default", "label": "Default (assets/zelos)", "path": "assets/zelos"}
         ]
 
-    def get_manifest(self):
-        specs = self.list_specs()
-        indexes = self.list_all_indexes()
+    def get_manifest(self, specs=None, indexes=None):
+        if specs is None:
+            specs = self.list_specs()
+        if indexes is None:
+            indexes = self.list_all_indexes()
         
         # Organize into projects based on paths
         manifest = {
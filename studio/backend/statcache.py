@@ -0,0 +1,201 @@
+import os
+import json
+import threading
+
+# Marker for files that failed to parse (distinct from a parsed ``null``).
+_FAILED = object()
+
+
+def scan_tree(root, suffix=None):
+    """Stat every file under ``root`` in a single ``os.scandir`` walk.
+
+    Returns ``{path: (mtime_ns, size)}``; ``suffix`` restricts the walk to
+    matching file names (e.g. ``".json"`` or ``"-index.json"``).
+    """
+    found = {}
+    _scan(root, suffix, found)
+    return found
+
+
+def _scan(directory, suffix, out):
+    try:
+        with os.scandir(directory) as it:
+            entries = list(it)
+    except OSError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                _scan(entry.path, suffix, out)
+            elif suffix is None or entry.name.endswith(suffix):
+                st = entry.stat()
+                out[entry.path] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            continue
+
+
+def list_tree(root):
+    """Paths of every file under ``root`` (no per-file stat)."""
+    found = []
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        found.append(entry.path)
+        except OSError:
+            continue
+    return found
+
+
+def load_json(path):
+    # Some Windows tooling writes UTF-8 with BOM.
+    with open(path, "r", encoding="utf-8-sig") as f:
+        return json.load(f)
+
+
+class StatCache:
+    """In-memory ``path -> (mtime_ns, size, parsed object)`` cache.
+
+    ``sweep`` stats a whole tree and only re-parses files whose fingerprint
+    changed since the previous sweep, so an unchanged tree costs a stat per
+    file instead of a parse per file.
+    """
+
+    def __init__(self, loader=load_json):
+        self.loader = loader
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def sweep(self, root, suffix=".json"):
+        """Return ``{path: parsed}`` for every matching file under ``root``.
+
+        Files that fail to parse are reported once and left out until they
+        change again.
+        """
+        on_disk = scan_tree(root, suffix)
+        prefix = os.path.join(root, "")
+        result = {}
+        with self._lock:
+            for path, fingerprint in on_disk.items():
+                cached = self._entries.get(path)
+                if cached is None or cached[0] != fingerprint:
+                    try:
+                        value = self.loader(path)
+                    except Exception as e:
+                        print(f"Error loading {path}: {e}")
+                        value = _FAILED
+                    cached = (fingerprint, value)
+                    self._entries[path] = cached
+                if cached[1] is not _FAILED:
+                    result[path] = cached[1]
+
+            # Forget files that disappeared from this tree.
+            for path in [p for p in self._entries if p.startswith(prefix) and p not in on_disk]:
+                if suffix is None or path.endswith(suffix):
+                    del self._entries[path]
+        return result
+
+    def fingerprint(self, path):
+        """(mtime_ns, size) recorded at the last sweep, or None."""
+        with self._lock:
+            cached = self._entries.get(path)
+        return cached[0] if cached else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class DirSnapshot:
+    """Set of the files under a directory tree, refreshed by directory mtime.
+
+    A directory's mtime changes whenever an entry is added, removed or
+    renamed in it, so ``refresh`` stats every directory but only re-lists
+    the ones whose mtime moved. Existence checks are then set lookups
+    instead of one ``stat`` syscall per asset.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self._dirs = {}
+        self._files = None
+        self._sorted = None
+        self._normcased = None
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            dirs = {}
+            changed = False
+            stack = [""]
+            while stack:
+                rel = stack.pop()
+                directory = os.path.join(self.root, rel) if rel else self.root
+                try:
+                    mtime_ns = os.stat(directory).st_mtime_ns
+                except OSError:
+                    continue
+                cached = self._dirs.get(rel)
+                if cached is None or cached[0] != mtime_ns:
+                    cached = self._list_dir(directory, mtime_ns)
+                    changed = True
+                dirs[rel] = cached
+                for name in cached[2]:
+                    stack.append(f"{rel}/{name}" if rel else name)
+            if changed or len(dirs) != len(self._dirs):
+                self._files = None
+                self._sorted = None
+                self._normcased = None
+            self._dirs = dirs
+        return self
+
+    @staticmethod
+    def _list_dir(directory, mtime_ns):
+        files = []
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    else:
+                        files.append(entry.name)
+        except OSError:
+            pass
+        return mtime_ns, files, subdirs
+
+    def files(self):
+        """Set of '/'-separated paths relative to the snapshot root."""
+        with self._lock:
+            if self._files is None:
+                self._files = {
+                    f"{rel}/{name}" if rel else name
+                    for rel, (_, names, _) in self._dirs.items()
+                    for name in names
+                }
+            return self._files
+
+    def sorted_files(self):
+        files = self.files()
+        with self._lock:
+            if self._sorted is None:
+                self._sorted = sorted(files)
+            return self._sorted
+
+    def exists(self, rel_path):
+        # Directories count too and case follows the platform (os.path.normcase),
+        # matching os.path.exists, which ignores case on Windows.
+        with self._lock:
+            if self._normcased is None:
+                self._normcased = {
+                    os.path.normcase(f"{rel}/{name}" if rel else name)
+                    for rel, (_, names, _) in self._dirs.items()
+                    for name in names
+                }
+                self._normcased.update(os.path.normcase(rel) for rel in self._dirs)
+            return os.path.normcase(rel_path) in self._normcased
@@ -1,31 +1,524 @@
+import json
+import os
+import threading
+from io import BytesIO
+
 from PIL import Image
 
+try:
+    import numpy as np
+except ImportError:  # Trimming falls back to per-frame PIL bounding boxes
+    np = None
+
+# Where a frame is placed from, as a fraction of its untrimmed size; becomes
+# the Pixi texture's default anchor.
+DEFAULT_PIVOT = (0.5, 0.5)
+
+
+class SheetBuilder:
+    """Sprite sheet assembled frame by frame as frames arrive.
+
+    The sheet is allocated once, from ``frame_size`` or the first frame's
+    size, and each frame is pasted into its slot (any order) and dropped, so
+    only one full-size image is held. ``cols`` defaults to a single row.
+    """
+
+    def __init__(self, count: int, frame_size: tuple[int, int] = None, cols: int = None):
+        if count < 1:
+            raise ValueError("SheetBuilder needs at least one frame")
+        self.count = count
+        self.cols = max(1, cols or count)
+        self.rows = (count + self.cols - 1) // self.cols
+        self.frame_size = frame_size
+        self.sheet = None
+        self._filled = set()
+        self._lock = threading.Lock()
+
+    def _allocate(self, frame_size):
+        width, height = frame_size
+        self.frame_size = (width, height)
+        self.sheet = Image.new("RGBA", (width * self.cols, height * self.rows))
+
+    def add(self, index: int, image: Image.Image):
+        """Paste ``image`` into slot ``index``."""
+        if not 0 <= index < self.count:
+            raise IndexError(f"Frame {index} out of range for a {self.count}-frame sheet")
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        with self._lock:
+            if self.sheet is None:
+                self._allocate(self.frame_size or image.size)
+            width, height = self.frame_size
+            self.sheet.paste(image, ((index % self.cols) * width, (index // self.cols) * height))
+            self._filled.add(index)
+
+    def add_bytes(self, index: int, data: bytes):
+        """Decode encoded image bytes (e.g. a ComfyUI PNG) into slot ``index``."""
+        with Image.open(BytesIO(data)) as image:
+            self.add(index, image)
+
+    @property
+    def missing(self) -> list[int]:
+        with self._lock:
+            return [i for i in range(self.count) if i not in self._filled]
+
+    @property
+    def complete(self) -> bool:
+        return not self.missing
+
+    def flush(self, path: str):
+        """Write the sheet as it stands (empty slots transparent) to ``path``."""
+        with self._lock:
+            if self.sheet is None:
+                return False
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            tmp = f"{path}.{os.getpid()}.tmp"
+            self.sheet.save(tmp, format="PNG")
+        os.replace(tmp, path)
+        return True
+
+    def image(self) -> Image.Image:
+        """The sheet (None if no frame arrived)."""
+        return self.sheet
+
+    def trim(self, padding: int = 0, threshold: int = 0, pivot=DEFAULT_PIVOT):
+        """Cut every cell down to the box that is opaque in any frame.
+
+        All frames share the one box, so the result is still a regular grid
+        and the animation does not jitter. Returns ``(sheet, frames)``, the
+        Pixi frame data of each slot (see ``TrimmedFrame.frame_data``).
+        """
+        with self._lock:
+            if self.sheet is None:
+                return None, []
+            width, height = self.frame_size
+            box = self._union_bbox(threshold)
+            box = _pad_box(box or (0, 0, 1, 1), padding, self.frame_size)
+            left, top, right, bottom = box
+            cell_w, cell_h = right - left, bottom - top
+            if (cell_w, cell_h) == (width, height):
+                sheet = self.sheet
+            else:
+                sheet = Image.new("RGBA", (cell_w * self.cols, cell_h * self.rows))
+                for i in range(self.count):
+                    x, y = (i % self.cols) * width, (i // self.cols) * height
+                    cell = self.sheet.crop((x + left, y + top, x + right, y + bottom))
+                    sheet.paste(cell, ((i % self.cols) * cell_w, (i // self.cols) * cell_h))
+        cell = TrimmedFrame(None, (left, top), (width, height), pivot, size=(cell_w, cell_h))
+        frames = [cell.frame_data((i % self.cols) * cell_w, (i // self.cols) * cell_h)
+                  for i in range(self.count)]
+        return sheet, frames
+
+    def _union_bbox(self, threshold):
+        width, height = self.frame_size
+        if np is None:
+            boxes = []
+            for i in range(self.count):
+                x, y = (i % self.cols) * width, (i // self.cols) * height
+                box = alpha_bbox(self.sheet.crop((x, y, x + width, y + height)), threshold)
+                if box:
+                    boxes.append(box)
+            if not boxes:
+                return None
+            return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                    max(b[2] for b in boxes), max(b[3] for b in boxes))
+        # (rows*h, cols*w) alpha -> (rows, h, cols, w), folded to one cell-sized
+        # plane holding each pixel's max over all frames.
+        alpha = _alpha_array(self.sheet).reshape(self.rows, height, self.cols, width)
+        return _max_bbox(alpha.max(axis=2).max(axis=0), threshold)
+
+
 def stitch_horizontal(images: list[Image.Image]) -> Image.Image:
     if not images:
         return None
-    
-    width, height = images[0].size
-    total_width = width * len(images)
-    
-    sheet = Image.new("RGBA", (total_width, height))
-    
+
+    builder = SheetBuilder(len(images), images[0].size)
     for idx, img in enumerate(images):
-        sheet.paste(img, (idx * width, 0))
-        
-    return sheet
+        builder.add(idx, img)
+    return builder.image()
 
 def stitch_grid(images: list[Image.Image], cols: int) -> Image.Image:
     if not images:
         return None
-        
-    width, height = images[0].size
-    rows = (len(images) + cols - 1) // cols
-    
-    sheet = Image.new("RGBA", (width * cols, height * rows))
-    
+
+    builder = SheetBuilder(len(images), images[0].size, cols)
     for idx, img in enumerate(images):
-        row = idx // cols
-        col = idx % cols
-        sheet.paste(img, (col * width, row * height))
-        
-    return sheet
+        builder.add(idx, img)
+    return builder.image()
+
+
+# ── Trimming ─────────────────────────────────────────────────────────────
+
+def alpha_bbox(image: Image.Image, threshold: int = 0):
+    """(left, top, right, bottom) of pixels with alpha above ``threshold``, or None."""
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    if np is None:
+        alpha = image.getchannel("A")
+        if threshold:
+            alpha = alpha.point(lambda v: 255 if v > threshold else 0)
+        return alpha.getbbox()
+    return _max_bbox(_alpha_array(image), threshold)
+
+
+def _alpha_array(image):
+    # Straight from the raw alpha bytes; cheaper than getchannel() + asarray.
+    width, height = image.size
+    return np.frombuffer(image.tobytes("raw", "A"), dtype=np.uint8).reshape(height, width)
+
+
+def _max_bbox(alpha, threshold):
+    # Row/column maxima of a uint8 plane, then the first/last above threshold.
+    rows = np.flatnonzero(alpha.max(axis=1) > threshold)
+    if not rows.size:
+        return None
+    cols = np.flatnonzero(alpha.max(axis=0) > threshold)
+    return int(cols[0]), int(rows[0]), int(cols[-1]) + 1, int(rows[-1]) + 1
+
+
+def _pad_box(box, padding, size):
+    left, top, right, bottom = box
+    return (max(0, left - padding), max(0, top - padding),
+            min(size[0], right + padding), min(size[1], bottom + padding))
+
+
+class TrimmedFrame:
+    """A frame cut to its opaque box plus what is needed to place it as before.
+
+    ``offset`` is where the crop sat in the original ``source_size`` canvas
+    and ``pivot`` the anchor as a fraction of that canvas (Pixi anchors of
+    trimmed textures are relative to the untrimmed size, so it is unchanged
+    by trimming). ``image`` may be None when only the geometry is needed.
+    """
+
+    __slots__ = ("image", "size", "offset", "source_size", "pivot")
+
+    def __init__(self, image, offset=(0, 0), source_size=None, pivot=DEFAULT_PIVOT, size=None):
+        self.image = image
+        self.size = size or image.size
+        self.offset = offset
+        self.source_size = source_size or self.size
+        self.pivot = pivot
+
+    @property
+    def trimmed(self):
+        return self.size != self.source_size
+
+    def frame_data(self, x, y, rotated=False):
+        """Pixi/TexturePacker frame entry for this frame stored at (x, y)."""
+        w, h = self.size
+        return {
+            "frame": {"x": x, "y": y, "w": w, "h": h},
+            "rotated": rotated,
+            "trimmed": self.trimmed,
+            "spriteSourceSize": {"x": self.offset[0], "y": self.offset[1], "w": w, "h": h},
+            "sourceSize": {"w": self.source_size[0], "h": self.source_size[1]},
+            "anchor": {"x": self.pivot[0], "y": self.pivot[1]},
+        }
+
+
+def trim_frame(image: Image.Image, padding: int = 0, threshold: int = 0,
+               pivot=DEFAULT_PIVOT) -> TrimmedFrame:
+    """Crop ``image`` to its alpha bounding box, keeping ``padding`` pixels around it.
+
+    A fully transparent image is cut to its top-left pixel.
+    """
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    box = alpha_bbox(image, threshold) or (0, 0, 1, 1)
+    box = _pad_box(box, padding, image.size)
+    if box == (0, 0) + image.size:
+        return TrimmedFrame(image, (0, 0), image.size, pivot)
+    return TrimmedFrame(image.crop(box), box[:2], image.size, pivot)
+
+
+def spritesheet_data(frames: dict, image_name: str, size, animations=None) -> dict:
+    """Pixi spritesheet JSON (TexturePacker JSON hash) for ``{name: frame data}``."""
+    data = {
+        "frames": frames,
+        "meta": {
+            "app": "assetgen-studio",
+            "version": "1.0",
+            "image": image_name,
+            "format": "RGBA8888",
+            "size": {"w": size[0], "h": size[1]},
+            "scale": "1",
+        },
+    }
+    if animations:
+        data["animations"] = animations
+    return data
+
+
+# ── Texture atlases ──────────────────────────────────────────────────────
+
+def _contains(outer, inner):
+    return (inner[0] >= outer[0] and inner[1] >= outer[1]
+            and inner[0] + inner[2] <= outer[0] + outer[2]
+            and inner[1] + inner[3] <= outer[1] + outer[3])
+
+
+class MaxRectsPacker:
+    """MaxRects bin of ``width`` x ``height`` with best-short-side-fit placement.
+
+    Keeps the maximal free rectangles left in the bin; each insert takes the
+    free rectangle the item fits most tightly and splits every free
+    rectangle it overlaps.
+    """
+
+    def __init__(self, width: int, height: int, allow_rotation: bool = False):
+        self.width = width
+        self.height = height
+        self.allow_rotation = allow_rotation
+        self.free = [(0, 0, width, height)]
+
+    def find(self, w: int, h: int):
+        """Best (x, y, rotated) for a w x h item, or None if it does not fit."""
+        best = None
+        orientations = [(w, h, False)]
+        if self.allow_rotation and w != h:
+            orientations.append((h, w, True))
+        for fx, fy, fw, fh in self.free:
+            for rw, rh, rotated in orientations:
+                if rw <= fw and rh <= fh:
+                    score = (min(fw - rw, fh - rh), max(fw - rw, fh - rh))
+                    if best is None or score < best[0]:
+                        best = (score, fx, fy, rotated)
+        return None if best is None else best[1:]
+
+    def place(self, x: int, y: int, w: int, h: int):
+        split = []
+        for free in self.free:
+            fx, fy, fw, fh = free
+            if x >= fx + fw or x + w <= fx or y >= fy + fh or y + h <= fy:
+                split.append(free)
+                continue
+            if x > fx:
+                split.append((fx, fy, x - fx, fh))
+            if x + w < fx + fw:
+                split.append((x + w, fy, fx + fw - x - w, fh))
+            if y > fy:
+                split.append((fx, fy, fw, y - fy))
+            if y + h < fy + fh:
+                split.append((fx, y + h, fw, fy + fh - y - h))
+        # Drop free rectangles inside another (of duplicates keep the first).
+        self.free = [
+            a for i, a in enumerate(split)
+            if not any(j != i and _contains(b, a) and (a != b or j < i) for j, b in enumerate(split))
+        ]
+
+    def insert(self, w: int, h: int):
+        """Place a w x h item; returns (x, y, rotated) or None."""
+        spot = self.find(w, h)
+        if spot is None:
+            return None
+        x, y, rotated = spot
+        self.place(x, y, h if rotated else w, w if rotated else h)
+        return spot
+
+
+class AtlasPage:
+    """One atlas texture: ``image`` plus Pixi frame data for the sprites on it."""
+
+    def __init__(self, max_size, padding, allow_rotation):
+        # Padding is reserved right/below each sprite; the bin grows by one
+        # padding so sprites can still reach the page edge.
+        self.packer = MaxRectsPacker(max_size + padding, max_size + padding, allow_rotation)
+        self.placements = {}   # id(sprite) -> (sprite, x, y, rotated); unique pixels only
+        self.sprites = {}      # frame name -> sprite (may share pixels with another)
+        self.frames = {}
+        self.animations = {}
+        self.image = None
+
+    @property
+    def size(self):
+        return self.image.size if self.image is not None else (0, 0)
+
+
+class _Sprite(TrimmedFrame):
+    __slots__ = ("name", "alias_of")
+
+    def __init__(self, name, frame):
+        super().__init__(frame.image, frame.offset, frame.source_size, frame.pivot)
+        self.name = name
+        self.alias_of = None
+
+
+def _next_pow2(n):
+    return 1 << max(0, n - 1).bit_length()
+
+
+def _extrude(atlas, image, x, y, extrude):
+    # Repeat the edge pixels ``extrude`` times around the sprite at (x, y) so
+    # linear filtering at the border does not sample the neighbour.
+    w, h = image.size
+    atlas.paste(image, (x, y))
+    for i in range(1, extrude + 1):
+        atlas.paste(image.crop((0, 0, w, 1)), (x, y - i))
+        atlas.paste(image.crop((0, h - 1, w, h)), (x, y + h - 1 + i))
+    column_left = atlas.crop((x, y - extrude, x + 1, y + h + extrude))
+    column_right = atlas.crop((x + w - 1, y - extrude, x + w, y + h + extrude))
+    for i in range(1, extrude + 1):
+        atlas.paste(column_left, (x - i, y - extrude))
+        atlas.paste(column_right, (x + w - 1 + i, y - extrude))
+
+
+def pack_atlas(sprites, animations=None, max_size: int = 2048, padding: int = 2, extrude: int = 0,
+               allow_rotation: bool = False, power_of_two: bool = True, trim: bool = True,
+               trim_padding: int = 0, pivot=DEFAULT_PIVOT, pivots=None):
+    """Pack ``(name, image)`` sprites into as few atlas pages as needed.
+
+    Sprites are trimmed to their opaque bounds plus ``trim_padding``
+    (``trim``) and anchored at ``pivot`` (``pivots`` overrides it per name).
+    Identical trimmed sprites share one rectangle, and every frame of an ``animations`` entry
+    (``{name: [frame names]}``) lands on the same page so Pixi can resolve
+    it. Pages are cut to their used area, rounded up to powers of two when
+    ``power_of_two``. Rotated sprites are stored 90 degrees clockwise.
+    Raises ValueError for a sprite larger than ``max_size``.
+    """
+    if power_of_two and max_size & (max_size - 1):
+        raise ValueError(f"max_size {max_size} is not a power of two")
+    border = 2 * extrude + padding
+
+    entries = {}
+    by_pixels = {}
+    for name, image in sprites:
+        if image.mode != "RGBA":
+            image = image.convert("RGBA")
+        anchor = (pivots or {}).get(name, pivot)
+        frame = trim_frame(image, trim_padding, pivot=anchor) if trim else TrimmedFrame(image, pivot=anchor)
+        w, h = frame.image.size
+        if max(w, h) + 2 * extrude > max_size:
+            raise ValueError(f"Sprite {name} ({w}x{h}) does not fit a {max_size}px atlas page")
+        sprite = _Sprite(name, frame)
+        digest = (frame.image.size, frame.image.tobytes())
+        sprite.alias_of = by_pixels.setdefault(digest, sprite)
+        entries[name] = sprite
+
+    # Animations first, as a unit; then the rest, largest first.
+    groups = []
+    grouped = set()
+    for anim_name, frame_names in (animations or {}).items():
+        members = [entries[n] for n in frame_names if n in entries]
+        groups.append((anim_name, members))
+        grouped.update(s.name for s in members)
+    loose = sorted((s for s in entries.values() if s.name not in grouped),
+                   key=lambda s: (max(s.image.size), s.image.size[0] * s.image.size[1]), reverse=True)
+    groups.extend((None, [s]) for s in loose)
+
+    pages = []
+    for anim_name, members in groups:
+        uniques = list({id(s.alias_of): s.alias_of for s in members}.values())
+        uniques.sort(key=lambda s: max(s.image.size), reverse=True)
+        # Prefer pages already holding some of these pixels.
+        candidates = sorted(pages, key=lambda p: -sum(id(s) in p.placements for s in uniques))
+        for page in candidates + [None]:
+            if page is None:
+                page = AtlasPage(max_size, padding, allow_rotation)
+                pages.append(page)
+            free = list(page.packer.free)
+            added = []
+            for sprite in uniques:
+                if id(sprite) in page.placements:
+                    continue
+                w, h = sprite.image.size
+                spot = page.packer.insert(w + border, h + border)
+                if spot is None:
+                    break
+                page.placements[id(sprite)] = (sprite,) + spot
+                added.append(id(sprite))
+            else:
+                break
+            # Does not fit: undo and try the next page.
+            page.packer.free = free
+            for key in added:
+                del page.placements[key]
+            if not page.placements:
+                raise ValueError(f"Animation {anim_name} does not fit on one {max_size}px atlas page")
+        if anim_name is not None:
+            page.animations[anim_name] = [s.name for s in members]
+        for sprite in members:
+            page.sprites[sprite.name] = sprite
+
+    for page in pages:
+        if power_of_two:
+            _shrink_page(page, max_size, padding, border, allow_rotation)
+        _render_page(page, extrude, power_of_two)
+    return pages
+
+
+def _shrink_page(page, max_size, padding, border, allow_rotation):
+    # Re-pack a page into the smallest power-of-two bin that holds it; mostly
+    # helps the last, partly filled page.
+    sprites = sorted((p[0] for p in page.placements.values()), key=lambda s: max(s.image.size), reverse=True)
+    area = sum((s.image.size[0] + border) * (s.image.size[1] + border) for s in sprites)
+    sizes = []
+    w = 1
+    while w <= max_size:
+        h = 1
+        while h <= max_size:
+            if w * h < max_size * max_size and (w + padding) * (h + padding) >= area:
+                sizes.append((w * h, abs(w - h), w, h))
+            h *= 2
+        w *= 2
+    for _, _, w, h in sorted(sizes):
+        packer = MaxRectsPacker(w + padding, h + padding, allow_rotation)
+        placements = {}
+        for sprite in sprites:
+            spot = packer.insert(sprite.image.size[0] + border, sprite.image.size[1] + border)
+            if spot is None:
+                break
+            placements[id(sprite)] = (sprite,) + spot
+        else:
+            page.placements = placements
+            return
+
+
+def _render_page(page, extrude, power_of_two):
+    right = bottom = 1
+    rects = {}
+    for sprite, x, y, rotated in page.placements.values():
+        image = sprite.image.transpose(Image.Transpose.ROTATE_270) if rotated else sprite.image
+        w, h = image.size
+        rects[id(sprite)] = (x + extrude, y + extrude, rotated, image)
+        right = max(right, x + w + 2 * extrude)
+        bottom = max(bottom, y + h + 2 * extrude)
+    if power_of_two:
+        right, bottom = _next_pow2(right), _next_pow2(bottom)
+    page.image = Image.new("RGBA", (right, bottom))
+    for x, y, rotated, image in rects.values():
+        if extrude:
+            _extrude(page.image, image, x, y, extrude)
+        else:
+            page.image.paste(image, (x, y))
+
+    for name, sprite in page.sprites.items():
+        x, y, rotated, _ = rects[id(sprite.alias_of)]
+        page.frames[name] = sprite.frame_data(x, y, rotated)
+    # Pixel data now lives in the page image.
+    page.placements = {}
+    page.sprites = {}
+    page.packer = None
+
+
+def write_pixi_spritesheet(pages, out_dir: str, name: str) -> list[str]:
+    """Write ``<name>.png/.json`` (``<name>-<n>.*`` for several pages).
+
+    The JSON is Pixi's spritesheet format (TexturePacker JSON hash); pages
+    list each other in ``meta.related_multi_packs`` so loading the first
+    JSON loads them all. Returns the JSON paths.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    stems = [name] if len(pages) == 1 else [f"{name}-{i}" for i in range(len(pages))]
+    paths = []
+    for stem, page in zip(stems, pages):
+        page.image.save(os.path.join(out_dir, stem + ".png"), format="PNG")
+        data = spritesheet_data(page.frames, stem + ".png", page.size, page.animations)
+        others = [s + ".json" for s in stems if s != stem]
+        if others:
+            data["meta"]["related_multi_packs"] = others
+        path = os.path.join(out_dir, stem + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        paths.append(path)
+    return paths
@@ -0,0 +1,276 @@
+"""Compiled patch plans for ComfyUI API-format workflows.
+
+A workflow is analyzed once into the exact (node id, input key) slots that
+receive each per-run value: prompt texts, size, seed, checkpoint, sampler
+settings, VAE, filename prefix and latent batch size. ``WorkflowPlan.build``
+then produces a payload by copying only the nodes it patches; every other
+node is shared with the parsed base workflow (payloads are only serialized,
+never mutated). Plans are cached by the workflow's content hash, so the
+studio backend and ``scripts/comfyui/generate-assets.py`` stop re-reading,
+deep-copying and re-scanning the workflow per frame.
+"""
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+CHECKPOINT_KEYS = ("ckpt_name", "checkpoint", "model_name")
+VAE_LOADER_TYPES = ("VAELoader", "VAELoaderSimple")
+
+
+def _inputs(node):
+    if not isinstance(node, dict):
+        return None
+    inputs = node.get("inputs")
+    return inputs if isinstance(inputs, dict) else None
+
+
+def _is_negative_title(node):
+    title = ((node.get("_meta") or {}).get("title") or "").lower()
+    return "neg" in title
+
+
+class WorkflowPlan:
+    def __init__(self, workflow, digest=None):
+        self.base = workflow
+        # Content hash identifying the workflow (e.g. for result caching).
+        self.digest = digest or hashlib.sha1(
+            json.dumps(workflow, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        self.text_nodes = []        # [(node_id, keys)] in workflow order
+        self.negative_ids = set()   # text nodes that take the negative prompt
+        self.size_slots = []        # node ids with int width/height
+        self.target_size_slots = {}  # node id -> [target/crop keys]
+        self.seed_slots = []
+        self.checkpoint_slots = []  # [(node_id, key)]
+        self.sampler_slots = {"sampler_name": [], "scheduler": [], "steps": [], "cfg": []}
+        self.vae_loader_ids = []
+        self.vae_decode_ids = []
+        self.filename_prefix_slots = []
+        self.batch_slots = []       # empty-latent nodes with an int batch_size
+        self._analyze()
+
+    # ── Analysis ─────────────────────────────────────────────────────────
+
+    def _analyze(self):
+        negative_links = set()
+        for node_id, node in self.base.items():
+            inputs = _inputs(node)
+            if inputs is None:
+                continue
+            class_type = node.get("class_type", "") or ""
+            lowered = class_type.lower()
+
+            if "text" in inputs and isinstance(inputs.get("text"), str):
+                self.text_nodes.append((node_id, ("text",)))
+            elif ("text_g" in inputs or "text_l" in inputs) and (
+                isinstance(inputs.get("text_g", ""), str) or isinstance(inputs.get("text_l", ""), str)
+            ):
+                keys = tuple(k for k in ("text_g", "text_l") if k in inputs)
+                self.text_nodes.append((node_id, keys))
+
+            if isinstance(inputs.get("width"), int) and isinstance(inputs.get("height"), int):
+                self.size_slots.append(node_id)
+                if "latent" in lowered and isinstance(inputs.get("batch_size"), int):
+                    self.batch_slots.append(node_id)
+            targets = [k for k in ("target_width", "target_height", "crop_w", "crop_h")
+                       if isinstance(inputs.get(k), int)]
+            if targets:
+                self.target_size_slots[node_id] = targets
+
+            if isinstance(inputs.get("seed"), int):
+                self.seed_slots.append(node_id)
+
+            for key in CHECKPOINT_KEYS:
+                if key in inputs and isinstance(inputs.get(key), str):
+                    self.checkpoint_slots.append((node_id, key))
+
+            if "sampler" in lowered:
+                if isinstance(inputs.get("sampler_name"), str):
+                    self.sampler_slots["sampler_name"].append(node_id)
+                if isinstance(inputs.get("scheduler"), str):
+                    self.sampler_slots["scheduler"].append(node_id)
+                if isinstance(inputs.get("steps"), int):
+                    self.sampler_slots["steps"].append(node_id)
+                if isinstance(inputs.get("cfg"), (int, float)):
+                    self.sampler_slots["cfg"].append(node_id)
+                link = inputs.get("negative")
+                if isinstance(link, list) and link:
+                    negative_links.add(str(link[0]))
+
+            if class_type in VAE_LOADER_TYPES and isinstance(inputs.get("vae_name"), str):
+                self.vae_loader_ids.append(str(node_id))
+            if class_type == "VAEDecode" and isinstance(inputs.get("vae"), list):
+                self.vae_decode_ids.append(node_id)
+
+            if isinstance(inputs.get("filename_prefix"), str):
+                self.filename_prefix_slots.append(node_id)
+
+        self._resolve_negative(negative_links)
+
+    def _resolve_negative(self, negative_links):
+        # Node titles win; otherwise follow the sampler's "negative" wiring;
+        # otherwise assume the common two-encoder layout (positive, negative).
+        titled = {nid for nid, _ in self.text_nodes if _is_negative_title(self.base[nid])}
+        if titled:
+            self.negative_ids = titled
+            return
+        wired = self._upstream_text_nodes(negative_links)
+        if wired:
+            self.negative_ids = wired
+        elif len(self.text_nodes) >= 2:
+            self.negative_ids = {self.text_nodes[1][0]}
+
+    def _upstream_text_nodes(self, start_ids):
+        text_ids = {str(nid) for nid, _ in self.text_nodes}
+        found = set()
+        seen = set()
+        stack = list(start_ids)
+        while stack:
+            nid = stack.pop()
+            if nid in seen or nid not in self.base:
+                continue
+            seen.add(nid)
+            if nid in text_ids:
+                found.add(nid)
+                continue
+            # Walk back through conditioning nodes (combine, area, ...).
+            for value in (_inputs(self.base[nid]) or {}).values():
+                if isinstance(value, list) and len(value) == 2 and isinstance(value[0], str):
+                    stack.append(value[0])
+        return {nid for nid, _ in self.text_nodes if str(nid) in found}
+
+    @property
+    def has_vae_loader(self):
+        return bool(self.vae_loader_ids)
+
+    @property
+    def batchable(self):
+        return bool(self.batch_slots)
+
+    @property
+    def default_checkpoint(self):
+        """Checkpoint the workflow loads when none is patched in."""
+        for node_id, key in self.checkpoint_slots:
+            return self.base[node_id]["inputs"][key]
+        return None
+
+    @property
+    def default_vae(self):
+        if not self.vae_loader_ids:
+            return None
+        return self.base[self.vae_loader_ids[0]]["inputs"]["vae_name"]
+
+    # ── Payloads ─────────────────────────────────────────────────────────
+
+    def build(self, positive=None, negative=None, width=None, height=None, seed=None,
+              ckpt_name=None, sampler_name=None, scheduler=None, steps=None, cfg=None,
+              vae_name=None, filename_prefix=None, batch_size=None,
+              target_size=False, checkpoint_keys=CHECKPOINT_KEYS):
+        """Return a payload with the given values patched in.
+
+        ``None`` leaves a slot at its workflow value. ``target_size`` also sets
+        SDXL target dimensions (and zero crops); ``checkpoint_keys`` limits
+        which loader inputs receive ``ckpt_name``.
+        """
+        payload = dict(self.base)
+        copied = set()
+
+        def inputs_of(node_id):
+            if node_id not in copied:
+                node = dict(payload[node_id])
+                node["inputs"] = dict(node["inputs"])
+                payload[node_id] = node
+                copied.add(node_id)
+            return payload[node_id]["inputs"]
+
+        if positive is not None or negative is not None:
+            for node_id, keys in self.text_nodes:
+                value = negative if node_id in self.negative_ids else positive
+                if value is None:
+                    continue
+                inputs = inputs_of(node_id)
+                for key in keys:
+                    inputs[key] = value
+
+        if width is not None and height is not None:
+            for node_id in self.size_slots:
+                inputs = inputs_of(node_id)
+                inputs["width"] = width
+                inputs["height"] = height
+            if target_size:
+                for node_id, keys in self.target_size_slots.items():
+                    inputs = inputs_of(node_id)
+                    for key in keys:
+                        if key == "target_width":
+                            inputs[key] = width
+                        elif key == "target_height":
+                            inputs[key] = height
+                        else:
+                            inputs[key] = 0
+
+        if seed is not None:
+            for node_id in self.seed_slots:
+                inputs_of(node_id)["seed"] = seed
+
+        if ckpt_name:
+            for node_id, key in self.checkpoint_slots:
+                if key in checkpoint_keys:
+                    inputs_of(node_id)[key] = ckpt_name
+
+        for key, value in (("sampler_name", sampler_name), ("scheduler", scheduler),
+                           ("steps", steps), ("cfg", cfg)):
+            if value is None or (key in ("sampler_name", "scheduler") and not value):
+                continue
+            for node_id in self.sampler_slots[key]:
+                inputs_of(node_id)[key] = value
+
+        if vae_name and self.vae_loader_ids:
+            for node_id in self.vae_loader_ids:
+                inputs_of(node_id)["vae_name"] = vae_name
+            for node_id in self.vae_decode_ids:
+                inputs_of(node_id)["vae"] = [self.vae_loader_ids[0], 0]
+
+        if filename_prefix is not None:
+            for node_id in self.filename_prefix_slots:
+                inputs_of(node_id)["filename_prefix"] = filename_prefix
+
+        if batch_size is not None:
+            for node_id in self.batch_slots:
+                inputs_of(node_id)["batch_size"] = batch_size
+
+        return payload
+
+
+class PlanCache:
+    """LRU of WorkflowPlans keyed by the SHA-1 of the workflow file bytes."""
+
+    def __init__(self, max_entries=16):
+        self.max_entries = max_entries
+        self._plans = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self, path):
+        with open(path, "rb") as f:
+            raw = f.read()
+        key = hashlib.sha1(raw).hexdigest()
+        with self._lock:
+            plan = self._plans.get(key)
+            if plan is not None:
+                self._plans.move_to_end(key)
+                return plan
+        # Some Windows tooling writes UTF-8 with BOM.
+        plan = WorkflowPlan(json.loads(raw.decode("utf-8-sig")), digest=key)
+        with self._lock:
+            self._plans[key] = plan
+            while len(self._plans) > self.max_entries:
+                self._plans.popitem(last=False)
+        return plan
+
+
+plan_cache = PlanCache()
+
+
+def load_plan(path):
+    """Cached WorkflowPlan for the workflow JSON at ``path``."""
+    return plan_cache.load(path)
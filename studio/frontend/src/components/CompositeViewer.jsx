@@ -452,7 +452,7 @@ export default function CompositeViewer({ onClose, initialGroup }) {
     const loadIndex = async (indexId) => {
         setLoading(true);
         try {
-            const res = await fetch(`/api/indexes/?id=${indexId}`);
+            const res = await fetch(`/api/indexes/?id=${indexId}&raw=0`);
             const data = await res.json();
             setSelectedIndexId(indexId);
             setExpandedIndex(data);
@@ -1,6 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import SpecView from './SpecView';
 import { Database, Image, Music, Gamepad2, ChevronRight } from 'lucide-react';
+import { subscribe } from '../lib/events';
 
 const INDEX_META = {
     'zelos-asset-index': { label: 'Core Assets', icon: Image, color: 'text-blue-400', bg: 'bg-blue-500/10' },
@@ -17,6 +18,22 @@ export default function Dashboard({ onNavigateToStudio, onNavigateToTab }) {
         fetchIndexes();
     }, []);
 
+    // Live updates: the server pushes fresh index summaries after every
+    // catalog change, so nothing is refetched while idle.
+    useEffect(() => {
+        const unsubscribers = [
+            subscribe('indexes', data => setIndexes(data.indexes || [])),
+            subscribe('catalog', change => {
+                if (change.specs) fetchRequests();
+            }),
+            subscribe('reset', () => {
+                fetchRequests();
+                fetchIndexes();
+            }),
+        ];
+        return () => unsubscribers.forEach(unsubscribe => unsubscribe());
+    }, []);
+
     const fetchRequests = async () => {
         try {
             const res = await fetch('/api/requests');
@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from 'react';
 import { Play, Folder, Save } from 'lucide-react';
+import { runGenerationJob } from '../lib/jobs';
 
 export default function FreeMode() {
     const [selectedCheckpoint, setSelectedCheckpoint] = useState("");
@@ -78,12 +79,7 @@ export default function FreeMode() {
         // ... rest of generation logic
 
         try {
-            const res = await fetch('/api/generate', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify(config)
-            });
-            const data = await res.json();
+            const data = await runGenerationJob(config);
 
             if (data.status === 'success') {
                 setLastResult(data.path);
@@ -4,6 +4,7 @@ import {
     CheckCircle, Circle, RefreshCw, Filter, Search, Volume2, Play, 
     Folder, FileImage, FileAudio, Square, Pause, Layers
 } from 'lucide-react';
+import { subscribe } from '../lib/events';
 
 const INDEX_ICONS = {
     'zelos-asset-index': Image,
@@ -39,6 +40,36 @@ function isImageFormat(format) {
     return ['png', 'jpg', 'jpeg', 'gif', 'webp'].includes(format);
 }
 
+// Flip exists/status for entries whose files appeared or disappeared and
+// keep the stats in step. Returns the same object when nothing matched.
+function applyAssetChanges(index, added = [], removed = []) {
+    if (!index?.entries || (!added.length && !removed.length)) return index;
+    const addedSet = new Set(added);
+    const removedSet = new Set(removed);
+    let delta = 0;
+    let changed = false;
+    const entries = index.entries.map(entry => {
+        if (!entry.exists && addedSet.has(entry.path)) {
+            changed = true;
+            delta += 1;
+            return { ...entry, exists: true, status: 'generated' };
+        }
+        if (entry.exists && removedSet.has(entry.path)) {
+            changed = true;
+            delta -= 1;
+            return { ...entry, exists: false, status: 'planned' };
+        }
+        return entry;
+    });
+    if (!changed) return index;
+    const stats = index.stats ? {
+        ...index.stats,
+        generated: index.stats.generated + delta,
+        planned: index.stats.planned - delta,
+    } : index.stats;
+    return { ...index, entries, stats };
+}
+
 // Audio Player Component
 function AudioPreview({ src, onClose }) {
     const audioRef = useRef(null);
@@ -139,6 +170,26 @@ export default function IndexBrowser({ onSelectAsset, onOpenComposite }) {
         fetchIndexes();
     }, []);
 
+    // Live updates: summaries arrive ready-made; asset additions/removals are
+    // applied to the loaded index in place instead of reloading it.
+    useEffect(() => {
+        const unsubscribers = [
+            subscribe('indexes', data => setIndexes(data.indexes || [])),
+            subscribe('catalog', change => {
+                if (change.specs || change.truncated) {
+                    if (selectedIndexId) loadIndex(selectedIndexId, { keepGroups: true });
+                    return;
+                }
+                setExpandedIndex(prev => applyAssetChanges(prev, change.added, change.removed));
+            }),
+            subscribe('reset', () => {
+                fetchIndexes();
+                if (selectedIndexId) loadIndex(selectedIndexId, { keepGroups: true });
+            }),
+        ];
+        return () => unsubscribers.forEach(unsubscribe => unsubscribe());
+    }, [selectedIndexId]);
+
     const fetchIndexes = async () => {
         setLoading(true);
         try {
@@ -152,13 +203,14 @@ export default function IndexBrowser({ onSelectAsset, onOpenComposite }) {
         }
     };
 
-    const loadIndex = async (indexId) => {
+    const loadIndex = async (indexId, { keepGroups = false } = {}) => {
         setSelectedIndexId(indexId);
-        setPreviewAsset(null);
+        if (!keepGroups) setPreviewAsset(null);
         try {
-            const res = await fetch(`/api/indexes/?id=${indexId}`);
+            const res = await fetch(`/api/indexes/?id=${indexId}&raw=0`);
             const data = await res.json();
             setExpandedIndex(data);
+            if (keepGroups) return;
             // Expand all groups by default
             const groups = new Set();
             (data.entries || []).forEach(entry => {
@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useMemo } from 'react';
 import { Folder, FileImage, Plus, RefreshCw, Play, CheckCircle, Circle, Square, CheckSquare, MinusSquare, Zap, Loader, Settings, Save, X, Tag, Wand2, FileText, List, ChevronRight, ChevronDown } from 'lucide-react';
 import GptAssistant from './GptAssistant';
+import { runGenerationJob } from '../lib/jobs';
 
 export default function SpecView({ onGenerate, requests = [], onImport }) {
     const [allSpecs, setAllSpecs] = useState([]);
@@ -337,11 +338,10 @@ export default function SpecView({ onGenerate, requests = [], onImport }) {
                     negative_prompt: spec.params?.negative_prompt || '',
                 };
 
-                await fetch('/api/generate', {
-                    method: 'POST',
-                    headers: { 'Content-Type': 'application/json' },
-                    body: JSON.stringify(payload)
-                });
+                const result = await runGenerationJob(payload);
+                if (result.status !== 'success') {
+                    console.error(`Failed ${spec.name}`, result.error);
+                }
 
             } catch (e) {
                 console.error(`Failed ${spec.name}`, e);
@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { Play, Image as ImageIcon, Loader2 } from 'lucide-react';
 
 import FileBrowser from './FileBrowser';
+import { runGenerationJob } from '../lib/jobs';
 
 export default function StudioStep({ initialPath }) {
     const [path, setPath] = useState(initialPath || '');
@@ -18,12 +19,16 @@ export default function StudioStep({ initialPath }) {
         setLogs(prev => [...prev, `Starting generation for: ${path}`]);
 
         try {
-            const res = await fetch('/api/generate', {
-                method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ path: path })
+            let lastDone = -1;
+            const json = await runGenerationJob({ path: path }, {
+                onProgress: (job) => {
+                    const { done, total } = job.progress;
+                    if (total && done !== lastDone) {
+                        lastDone = done;
+                        setLogs(prev => [...prev, `Frame ${done}/${total} (${job.state})`]);
+                    }
+                }
             });
-            const json = await res.json();
 
             if (json.status === 'success') {
                 setResult(json.path);
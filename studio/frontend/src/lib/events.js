@@ -0,0 +1,39 @@
+// Shared connection to the studio's /api/events stream (Server-Sent Events).
+// One EventSource per page; components subscribe to event types and get the
+// parsed JSON payload. EventSource reconnects on its own and resumes from the
+// last event id; a 'reset' event means events were missed and state should be
+// refetched.
+
+let source = null;
+const handlers = new Map();
+
+function ensureSource() {
+    if (source || typeof EventSource === 'undefined') return;
+    source = new EventSource('/api/events');
+}
+
+function dispatch(type, message) {
+    let data = {};
+    try {
+        data = JSON.parse(message.data || '{}');
+    } catch (e) {
+        console.error(`Bad ${type} event`, e);
+        return;
+    }
+    (handlers.get(type) || new Set()).forEach(handler => handler(data));
+}
+
+export function subscribe(type, handler) {
+    ensureSource();
+    if (!handlers.has(type)) {
+        handlers.set(type, new Set());
+        source?.addEventListener(type, message => dispatch(type, message));
+    }
+    handlers.get(type).add(handler);
+    return () => handlers.get(type).delete(handler);
+}
+
+export function eventsAvailable() {
+    ensureSource();
+    return source !== null;
+}
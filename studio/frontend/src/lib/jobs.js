@@ -0,0 +1,82 @@
+// Generation jobs: submit to /api/jobs and follow the job until it finishes.
+// Resolves with the same shape /api/generate used to return
+// ({ status: 'success', path } or { status: 'error', error }).
+import { subscribe, eventsAvailable } from './events';
+
+const FINISHED = new Set(['succeeded', 'failed', 'cancelled']);
+const POLL_MS = 1000;
+// With the event stream connected, polling is only a safety net.
+const FALLBACK_POLL_MS = 5000;
+
+export async function submitJob(config) {
+    const res = await fetch('/api/jobs', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify(config)
+    });
+    if (!res.ok) {
+        throw new Error(`Job submission failed (${res.status})`);
+    }
+    const data = await res.json();
+    return data.job;
+}
+
+export async function getJob(jobId) {
+    const res = await fetch(`/api/jobs/${jobId}`);
+    if (!res.ok) {
+        throw new Error(`Job ${jobId} not found`);
+    }
+    const data = await res.json();
+    return data.job;
+}
+
+export async function cancelJob(jobId) {
+    await fetch(`/api/jobs/${jobId}`, { method: 'DELETE' });
+}
+
+export function jobResult(job) {
+    if (job.state === 'succeeded') {
+        return { status: 'success', path: job.output_path, job };
+    }
+    if (job.state === 'cancelled') {
+        return { status: 'cancelled', error: 'Cancelled', job };
+    }
+    return { status: 'error', error: job.error || 'Generation failed', job };
+}
+
+export async function runGenerationJob(config, { onProgress } = {}) {
+    let job = await submitJob(config);
+    onProgress?.(job);
+    if (FINISHED.has(job.state)) return jobResult(job);
+
+    const pollMs = eventsAvailable() ? FALLBACK_POLL_MS : POLL_MS;
+    return new Promise(resolve => {
+        let done = false;
+        let timer = null;
+        let unsubscribe = () => {};
+
+        const update = (latest) => {
+            if (done || latest.id !== job.id) return;
+            job = latest;
+            onProgress?.(job);
+            if (FINISHED.has(job.state)) {
+                done = true;
+                clearTimeout(timer);
+                unsubscribe();
+                resolve(jobResult(job));
+            }
+        };
+        const poll = async () => {
+            try {
+                update(await getJob(job.id));
+            } catch (e) {
+                console.error(e);
+            }
+            if (!done) timer = setTimeout(poll, pollMs);
+        };
+
+        unsubscribe = subscribe('job', update);
+        // Catch up once in case the job changed before we subscribed.
+        poll();
+    });
+}